@@ -0,0 +1,375 @@
+"""Benchmarks do painel contra um bot falso (bench/stub_bot.js), sem rede.
+
+Sobe o servidor.py numa pasta temporária com vários bots falsos (bots.json)
+e mede, pela API HTTP:
+    ingest     linhas de log por segundo que chegam ao buffer do painel
+    polling    p50/p99 de /api/logs e /api/bot/status com vários clientes
+    commands   listagem e leitura com pastas de 10, 1k e 10k comandos
+    variables  leitura de um defaults.js grande
+    restart    tempo fora do ar de cada restart
+
+Uso:
+    python bench/bench.py --saida resultado.json
+    python bench/bench.py --rapido --comparar resultado.json
+
+O resultado é um JSON; com --comparar, cada número é mostrado ao lado do
+valor do arquivo anterior, para achar regressões entre commits.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import http.client
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+SERVIDOR = os.path.join(REPO_DIR, 'servidor.py')
+STUB = os.path.join(BENCH_DIR, 'stub_bot.js')
+
+COMMAND_TREES = {'c10': 10, 'c1k': 1000, 'c10k': 10000}
+QUICK_COMMAND_TREES = {'c10': 10, 'c1k': 1000}
+
+COMMAND_TEMPLATE = '''module.exports = ({{
+  name: "{name}",
+  aliases: ["{name}2"],
+  code: `
+$title[Comando {name}]
+$description[$username usou {name} em $serverName]
+$color[#{color:06x}]
+$setUserVar[uso_{name};$sum[$getUserVar[uso_{name}];1]]
+$onlyIf[$getUserVar[uso_{name}]<100;Limite atingido]
+  `
+}});'''
+
+# --- Preparação da Pasta ---
+def _criar_bot(path):
+    os.makedirs(os.path.join(path, 'commands'), exist_ok=True)
+    os.makedirs(os.path.join(path, 'variables'), exist_ok=True)
+    shutil.copy(STUB, os.path.join(path, 'index.js'))
+
+def _criar_comandos(path, count):
+    commands = os.path.join(path, 'commands')
+    for i in range(count):
+        name = f"cmd{i:05d}"
+        with open(os.path.join(commands, name + '.js'), 'w', encoding='utf-8') as f:
+            f.write(COMMAND_TEMPLATE.format(name=name, color=i * 2654435761 % 0xFFFFFF))
+
+def _criar_variaveis(path, count):
+    with open(os.path.join(path, 'variables', 'defaults.js'), 'w', encoding='utf-8') as f:
+        f.write("module.exports = {\n")
+        for i in range(count):
+            if i % 2:
+                f.write(f'  "var{i}": {{ type: "number", default: {i} }},\n')
+            else:
+                f.write(f'  "var{i}": {{ type: "string", default: "valor {i}" }},\n')
+        f.write("};")
+
+def preparar(root, args):
+    """Cria a pasta do painel: o bot principal (logs contínuos) e um bot por cenário."""
+    _criar_bot(root)
+    trees = QUICK_COMMAND_TREES if args.rapido else COMMAND_TREES
+    bots = [
+        {"id": "ingest", "path": "bots/ingest", "env": {
+            "STUB_RATE": "0", "STUB_LINES": str(args.linhas), "STUB_LINE_BYTES": str(args.tamanho_linha),
+            "STUB_STDERR_EVERY": str(args.stderr_cada)}},
+        {"id": "vars", "path": "bots/vars"},
+    ]
+    bots += [{"id": bot_id, "path": f"bots/{bot_id}"} for bot_id in trees]
+    for bot in bots:
+        _criar_bot(os.path.join(root, bot["path"]))
+    for bot_id, count in trees.items():
+        _criar_comandos(os.path.join(root, 'bots', bot_id), count)
+    _criar_variaveis(os.path.join(root, 'bots', 'vars'), args.variaveis)
+    with open(os.path.join(root, 'bots.json'), 'w', encoding='utf-8') as f:
+        json.dump(bots, f, indent=2)
+    return trees
+
+# --- Cliente HTTP ---
+class Cliente:
+    """Conexão keep-alive com o painel; reconecta se o servidor fechar."""
+
+    def __init__(self, port):
+        self.port = port
+        self._conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+
+    def pedir(self, method, path, body=None):
+        """Devolve (status, json ou None, segundos)."""
+        started = time.perf_counter()
+        try:
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            self._conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = self._conn.getresponse()
+            data = response.read()
+            if response.will_close:
+                self.fechar()
+        except (OSError, http.client.HTTPException):
+            self.fechar()
+            raise
+        elapsed = time.perf_counter() - started
+        try:
+            payload = json.loads(data) if data else None
+        except ValueError:
+            payload = None
+        return response.status, payload, elapsed
+
+    def get(self, path):
+        return self.pedir('GET', path)
+
+    def post(self, path, body=None):
+        return self.pedir('POST', path, body if body is not None else {})
+
+    def fechar(self):
+        self._conn.close()
+        self._conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=120)
+
+def _percentis(samples):
+    if not samples:
+        return {"n": 0}
+    samples = sorted(samples)
+    pick = lambda q: round(samples[min(len(samples) - 1, int(len(samples) * q))] * 1000, 3)
+    return {"n": len(samples), "p50_ms": pick(0.50), "p99_ms": pick(0.99), "max_ms": round(samples[-1] * 1000, 3)}
+
+def _porta_livre():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def iniciar_painel(root, port, args):
+    """Sobe o servidor.py em modo produção. O bot principal herda o ambiente do
+    painel, então é ele quem recebe o ritmo de logs do teste de polling."""
+    log = open(os.path.join(root, 'painel.log'), 'wb')
+    env = {**os.environ, "STUB_RATE": str(args.ritmo), "STUB_LINE_BYTES": str(args.tamanho_linha)}
+    process = subprocess.Popen(
+        [sys.executable, SERVIDOR, '--producao', '--porta', str(port), '--threads', str(args.threads)],
+        cwd=root, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"O painel saiu com código {process.returncode}; veja {log.name}")
+        try:
+            if Cliente(port).get('/api/bots')[0] == 200:
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit("O painel não respondeu em 30 s.")
+
+# --- Cenários ---
+def medir_ingest(client, args):
+    """Liga o bot que imprime --linhas linhas de uma vez e mede quanto o painel
+    leva para ter todas no buffer (a partir da primeira que chegou)."""
+    status, data, _ = client.post('/api/bots/ingest/bot/start')
+    if not data or not data.get("success"):
+        return {"error": data}
+    first = first_count = None
+    target = args.linhas + 2   # linha de início do stub e o sinal de pronto
+    deadline = time.monotonic() + 300
+    received, now = 0, None
+    while time.monotonic() < deadline:
+        # Cursor além do fim: a resposta é curta e traz o "next" atual.
+        _, data, _ = client.get('/api/bots/ingest/logs?since=999999999999')
+        received, now = data["next"], time.perf_counter()
+        if received and first is None:
+            first, first_count = now, received
+        if received >= target:
+            break
+        time.sleep(0.005)
+    client.post('/api/bots/ingest/bot/stop')
+    elapsed = now - first if first is not None and now > first else None
+    return {
+        "lines": args.linhas,
+        "line_bytes": args.tamanho_linha,
+        "received": received,
+        "seconds": round(elapsed, 3) if elapsed else None,
+        "lines_per_s": round((received - first_count) / elapsed) if elapsed else None,
+    }
+
+def medir_polling(port, args):
+    """Clientes concorrentes consultando /api/logs (cada um com o seu cursor) e
+    /api/bot/status enquanto o bot principal imprime --ritmo linhas por segundo."""
+    results = {}
+    for route in ('/api/logs', '/api/bot/status'):
+        latencies, errors = [], [0]
+        stop = time.monotonic() + args.duracao
+
+        def worker():
+            client = Cliente(port)
+            cursor = None
+            while time.monotonic() < stop:
+                path = route
+                if route == '/api/logs' and cursor is not None:
+                    path = f'{route}?since={cursor}'
+                try:
+                    status, data, elapsed = client.get(path)
+                except (OSError, http.client.HTTPException):
+                    errors[0] += 1
+                    continue
+                if status != 200:
+                    errors[0] += 1
+                    continue
+                latencies.append(elapsed)
+                if route == '/api/logs':
+                    cursor = data["next"]
+
+        workers = [threading.Thread(target=worker) for _ in range(args.clientes)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        results[route] = {**_percentis(latencies), "req_s": round(len(latencies) / args.duracao),
+                          "errors": errors[0]}
+    return {"clients": args.clientes, "seconds": args.duracao, "bot_lines_per_s": args.ritmo, "routes": results}
+
+def medir_comandos(client, trees, repeat):
+    results = {}
+    for bot_id, count in trees.items():
+        base = f'/api/bots/{bot_id}'
+        _, files, cold = client.get(f'{base}/commands')
+        warm = [client.get(f'{base}/commands')[2] for _ in range(repeat)]
+        details = [client.get(f'{base}/commands?details=1')[2] for _ in range(max(1, repeat // 5))]
+        picks = random.Random(count).sample(files, min(len(files), repeat))
+        reads = [client.get(f'{base}/command/{name}')[2] for name in picks]
+        results[str(count)] = {
+            "list_cold_ms": round(cold * 1000, 3),
+            "list": _percentis(warm),
+            "list_details": _percentis(details),
+            "read": _percentis(reads),
+        }
+    return results
+
+def medir_variaveis(client, count, repeat):
+    status, data, first = client.get('/api/bots/vars/variables')
+    timings = [client.get('/api/bots/vars/variables')[2] for _ in range(repeat)]
+    size = len(data.get("content", {})) if isinstance(data, dict) else None
+    # O que a aba abre: a primeira página, e uma busca por trecho do nome.
+    page = [client.get('/api/bots/vars/variables?offset=0&limit=200')[2] for _ in range(repeat)]
+    search = [client.get('/api/bots/vars/variables?q=9&limit=200&sort=name')[2] for _ in range(repeat)]
+    return {"variables": count, "parsed": size, "first_ms": round(first * 1000, 3), "get": _percentis(timings),
+            "page": _percentis(page), "search": _percentis(search)}
+
+def medir_restart(client, count):
+    runs = []
+    for _ in range(count):
+        _, data, elapsed = client.post('/api/bot/restart')
+        restart = (data or {}).get("restart") or {}
+        runs.append({"success": bool(data and data.get("success")), "wall_ms": round(elapsed * 1000, 1),
+                     "downtime_ms": restart.get("downtime_ms"), "ready_ms": restart.get("ready_ms"),
+                     "mode": restart.get("mode")})
+        time.sleep(0.5)
+    return runs
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+# --- Comparação ---
+def _folhas(data, prefix=''):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _folhas(value, f'{prefix}{key}.')
+    elif isinstance(data, list):
+        for i, value in enumerate(data):
+            yield from _folhas(value, f'{prefix}{i}.')
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix[:-1], data
+
+def comparar(before, after):
+    old = dict(_folhas({k: v for k, v in before.items() if k != 'meta'}))
+    print(f"{'métrica':60} {'antes':>12} {'agora':>12} {'dif.':>8}")
+    for key, value in _folhas({k: v for k, v in after.items() if k != 'meta'}):
+        previous = old.get(key)
+        change = f"{(value - previous) / previous * 100:+.1f}%" if previous else ''
+        print(f"{key:60} {previous if previous is not None else '-':>12} {value:>12} {change:>8}")
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks do painel com um bot falso.")
+    parser.add_argument('--saida', help="Grava o resultado (JSON) neste arquivo.")
+    parser.add_argument('--comparar', metavar='JSON', help="Compara com um resultado anterior.")
+    parser.add_argument('--rapido', action='store_true', help="Cenários menores (sem a pasta de 10k comandos).")
+    parser.add_argument('--linhas', type=int, default=None, help="Linhas do teste de ingest.")
+    parser.add_argument('--tamanho-linha', type=int, default=100, help="Bytes por linha de log.")
+    parser.add_argument('--stderr-cada', type=int, default=50, help="1 a cada N linhas vai para o stderr (0 = nenhuma).")
+    parser.add_argument('--ritmo', type=int, default=1000, help="Linhas/s do bot principal durante o polling.")
+    parser.add_argument('--clientes', type=int, default=8, help="Clientes concorrentes no polling.")
+    parser.add_argument('--duracao', type=float, default=None, help="Segundos de polling por rota.")
+    parser.add_argument('--variaveis', type=int, default=None, help="Variáveis no defaults.js grande.")
+    parser.add_argument('--restarts', type=int, default=3)
+    parser.add_argument('--threads', type=int, default=16, help="Threads do painel (--producao).")
+    parser.add_argument('--manter', action='store_true', help="Não apaga a pasta temporária no fim.")
+    args = parser.parse_args()
+    args.linhas = args.linhas or (50000 if args.rapido else 200000)
+    args.duracao = args.duracao or (3.0 if args.rapido else 10.0)
+    args.variaveis = args.variaveis or (1000 if args.rapido else 5000)
+    return args
+
+def main():
+    args = _parse_args()
+    if not shutil.which('node'):
+        raise SystemExit("Node.js não encontrado (o bot falso precisa dele).")
+
+    root = tempfile.mkdtemp(prefix='painel-bench-')
+    trees = preparar(root, args)
+    port = _porta_livre()
+    panel = iniciar_painel(root, port, args)
+    client = Cliente(port)
+    result = {"meta": {
+        "commit": _commit(), "time": time.strftime('%Y-%m-%dT%H:%M:%S'), "python": platform.python_version(),
+        "platform": platform.platform(), "cpus": os.cpu_count(), "quick": args.rapido,
+    }}
+    try:
+        print("ingest...", file=sys.stderr)
+        result["ingest"] = medir_ingest(client, args)
+
+        print("polling...", file=sys.stderr)
+        client.post('/api/bot/start')
+        time.sleep(1)
+        result["polling"] = medir_polling(port, args)
+
+        print("restart...", file=sys.stderr)
+        result["restart"] = medir_restart(client, args.restarts)
+        client.post('/api/bot/stop')
+
+        print("comandos...", file=sys.stderr)
+        result["commands"] = medir_comandos(client, trees, 20 if args.rapido else 50)
+
+        print("variáveis...", file=sys.stderr)
+        result["variables"] = medir_variaveis(client, args.variaveis, 10 if args.rapido else 20)
+    finally:
+        for bot in ('', '/bots/ingest'):
+            try:
+                client.post(f'/api{bot}/bot/stop')
+            except OSError:
+                pass
+        panel.terminate()
+        try:
+            panel.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            panel.kill()
+        if args.manter:
+            print(f"Pasta mantida: {root}", file=sys.stderr)
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            comparar(json.load(f), result)
+    elif not args.saida:
+        print(text)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+// Bot falso usado pelos benchmarks do painel (bench/bench.py).
+// Não conecta em nada: avisa que está pronto e imprime linhas de log no ritmo
+// pedido pelas variáveis de ambiente abaixo.
+const rate = Number(process.env.STUB_RATE || 0);              // linhas/s; 0 = o mais rápido possível
+const total = Number(process.env.STUB_LINES || 0);            // para de imprimir depois disso (0 = sem fim)
+const lineBytes = Number(process.env.STUB_LINE_BYTES || 80);  // tamanho de cada linha
+const stderrEvery = Number(process.env.STUB_STDERR_EVERY || 0); // 1 a cada N linhas vai para o stderr
+const readyDelay = Number(process.env.STUB_READY_MS || 200);   // espera antes do sinal de pronto
+
+let sent = 0;
+
+function line() {
+    sent++;
+    const prefix = `linha ${sent} `;
+    return prefix + 'x'.repeat(Math.max(0, lineBytes - prefix.length)) + '\n';
+}
+
+function block(count) {
+    let out = '', err = '';
+    for (let i = 0; i < count; i++) {
+        if (stderrEvery && sent % stderrEvery === stderrEvery - 1) {
+            err += 'TypeError: falha simulada ' + line();
+        } else {
+            out += line();
+        }
+    }
+    if (err) process.stderr.write(err);
+    return process.stdout.write(out);
+}
+
+function remaining(count) {
+    return total ? Math.min(count, total - sent) : count;
+}
+
+// O mais rápido possível, respeitando o buffer do pipe.
+function flood() {
+    while (!total || sent < total) {
+        if (!block(remaining(1000))) {
+            process.stdout.once('drain', flood);
+            return;
+        }
+    }
+}
+
+// Ritmo fixo: um bloco a cada 10 ms.
+function paced() {
+    let owed = 0;
+    const timer = setInterval(() => {
+        owed += rate / 100;
+        const count = remaining(Math.floor(owed));
+        owed -= Math.floor(owed);
+        if (count > 0) block(count);
+        if (total && sent >= total) clearInterval(timer);
+    }, 10);
+}
+
+console.log('stub pronto para iniciar, pid ' + process.pid);
+setTimeout(() => {
+    console.log('PAINEL_STATUS:BOT_ONLINE_READY');
+    if (rate > 0) paced(); else if (total || process.env.STUB_FLOOD) flood();
+}, readyDelay);
+
+process.on('SIGTERM', () => process.exit(0));
+setInterval(() => {}, 60 * 1000);
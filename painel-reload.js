@@ -0,0 +1,128 @@
+// Hook de hot-reload carregado pelo painel com `node --require painel-reload.js index.js`.
+//
+// O painel escreve na stdin do bot linhas `PAINEL_RELOAD {"id", "files", "deleted"}`
+// depois de salvar comandos; aqui só esses arquivos são recarregados e o resultado
+// volta no stdout como `PAINEL_RELOAD_DONE {"id", "ms", "files", "errors"}`.
+//
+// Para bots com um carregador próprio, defina global.painelReload = (file, commands, previous) => {...}.
+'use strict';
+
+const Module = require('module');
+const readline = require('readline');
+
+const bots = [];
+
+// Guarda as instâncias de Bot criadas pelo dbd.js para poder trocar os comandos nelas.
+const originalLoad = Module._load;
+Module._load = function (request, parent, isMain) {
+    const exported = originalLoad.apply(this, arguments);
+    if (request === 'dbd.js' && exported && typeof exported.Bot === 'function' && !exported.Bot.painelWrapped) {
+        const OriginalBot = exported.Bot;
+        class Bot extends OriginalBot {
+            constructor(...args) {
+                super(...args);
+                bots.push(this);
+            }
+        }
+        Bot.painelWrapped = true;
+        try {
+            exported.Bot = Bot;
+        } catch (error) {
+            // Exports congelados: o reload fica só com global.painelReload.
+        }
+    }
+    return exported;
+};
+
+function asList(exported) {
+    if (Array.isArray(exported)) return exported;
+    return exported ? [exported] : [];
+}
+
+function commandMaps(bot) {
+    const cmd = bot && bot.cmd;
+    if (!cmd) return [];
+    return Object.values(cmd).filter(value => value instanceof Map);
+}
+
+function sameCommand(a, b) {
+    return a && b && a.name === b.name && (a.type || 'default') === (b.type || 'default');
+}
+
+function applyToBot(bot, commands, previous) {
+    // Remove o que o arquivo exportava antes e não exporta mais.
+    for (const old of previous) {
+        if (commands.some(command => sameCommand(command, old))) continue;
+        for (const map of commandMaps(bot)) {
+            for (const [key, existing] of map) {
+                if (sameCommand(existing, old)) map.delete(key);
+            }
+        }
+    }
+    for (const command of commands) {
+        let found = false;
+        for (const map of commandMaps(bot)) {
+            for (const existing of map.values()) {
+                if (sameCommand(existing, command)) {
+                    Object.assign(existing, command);
+                    found = true;
+                }
+            }
+        }
+        if (!found && typeof bot.command === 'function') bot.command(command);
+    }
+}
+
+function reloadFile(file, deleted) {
+    let resolved;
+    try {
+        resolved = require.resolve(file);
+    } catch (error) {
+        resolved = file;
+    }
+    const cached = require.cache[resolved];
+    const previous = cached ? asList(cached.exports) : [];
+    delete require.cache[resolved];
+    const commands = deleted ? [] : asList(require(resolved));
+
+    if (typeof global.painelReload === 'function') {
+        global.painelReload(file, commands, previous);
+        return;
+    }
+    for (const bot of bots) applyToBot(bot, commands, previous);
+}
+
+function handle(message) {
+    const started = process.hrtime.bigint();
+    const errors = [];
+    const reload = (file, deleted) => {
+        try {
+            reloadFile(file, deleted);
+        } catch (error) {
+            errors.push({ file, error: String(error && error.message || error) });
+        }
+    };
+    (message.files || []).forEach(file => reload(file, false));
+    (message.deleted || []).forEach(file => reload(file, true));
+
+    const ms = Number(process.hrtime.bigint() - started) / 1e6;
+    const result = {
+        id: message.id,
+        ms: Math.round(ms * 1000) / 1000,
+        files: (message.files || []).concat(message.deleted || []),
+        errors
+    };
+    process.stdout.write('PAINEL_RELOAD_DONE ' + JSON.stringify(result) + '\n');
+}
+
+const input = readline.createInterface({ input: process.stdin });
+input.on('line', line => {
+    if (!line.startsWith('PAINEL_RELOAD ')) return;
+    try {
+        handle(JSON.parse(line.slice('PAINEL_RELOAD '.length)));
+    } catch (error) {
+        process.stdout.write('PAINEL_RELOAD_DONE ' + JSON.stringify({ id: null, ms: 0, files: [], errors: [{ error: String(error) }] }) + '\n');
+    }
+});
+// A stdin não deve manter vivo um bot que já terminou o que tinha para fazer.
+if (typeof process.stdin.unref === 'function') process.stdin.unref();
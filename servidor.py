@@ -2,413 +2,3030 @@ import os
 import json
 import subprocess
 import threading
+import time
 import re
+import ast
 import shutil
+import stat
+import tarfile
+import tempfile
+import zipfile
 import logging
-from flask import Flask, request, render_template_string, jsonify
+import socket
+import argparse
+import gzip
+import hashlib
+import codecs
+import queue
+import random
+import signal
+import atexit
+import sqlite3
+import selectors
+import bisect
+import math
+from array import array
+from collections import deque
+from datetime import datetime
+from flask import Flask, Blueprint, Response, g, request, render_template_string, jsonify, send_from_directory
 from markupsafe import escape
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 # --- CONFIGURAÇÃO ---
 BOT_PATH = os.path.abspath('.')
 BOT_FILE_NAME = 'index.js'
 BOT_DISPLAY_NAME = "Styllena"
 
-# --- Paths Derivados ---
-BOT_FILE_PATH = os.path.join(BOT_PATH, BOT_FILE_NAME)
-COMMANDS_PATH = os.path.join(BOT_PATH, 'commands')
-VARIABLES_PATH = os.path.join(BOT_PATH, 'variables', 'defaults.js')
-ENV_PATH = os.path.join(BOT_PATH, '.env')
-STATUS_CONFIG_PATH = os.path.join(BOT_PATH, 'status_config.json')
+# --- Paths Derivados (relativos à pasta de cada bot) ---
+COMMANDS_DIR = 'commands'
+VARIABLES_FILE = os.path.join('variables', 'defaults.js')
+ENV_FILE = '.env'
+STATUS_CONFIG_FILE = 'status_config.json'
+
+# --- Vários Bots ---
+# O bot configurado acima é o principal (rotas /api/...). Outros bots são
+# listados em bots.json e respondem em /api/bots/<id>/...:
+#   [{"id": "loja", "path": "bots/loja", "file": "index.js", "name": "Loja", "env": {"TOKEN": "..."}}]
+# path é relativo a BOT_PATH; file, name e env são opcionais.
+DEFAULT_BOT_ID = 'principal'
+BOTS_CONFIG_PATH = os.path.join(BOT_PATH, 'bots.json')
+
+# --- Supervisor Externo (supervisor.py) ---
+# Se definido, o bot roda no supervisor.py e o painel só conversa com ele
+# por este socket Unix (também pode ser passado com --supervisor).
+SUPERVISOR_SOCKET = os.environ.get('PAINEL_SUPERVISOR_SOCKET')
+SUPERVISOR_TIMEOUT = 15             # Segundos para start/stop/restart responderem
+
+# --- Hot-reload de Comandos ---
+HOT_RELOAD = True                   # Recarrega no bot os comandos salvos, sem reiniciar
+RELOAD_HOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'painel-reload.js')
+RELOAD_HISTORY_SIZE = 50            # Resultados de reload guardados para /api/bot/reloads
+
+# --- Regras de Logs ---
+# Lidas do log_rules.json de cada bot (uma lista de regras); sem o arquivo, valem estas.
+LOG_RULES_FILE = 'log_rules.json'
+DEFAULT_LOG_RULES = [
+    {"name": "pronto", "pattern": "PAINEL_STATUS:BOT_ONLINE_READY", "stream": "stdout",
+     "state": "online", "message": "{bot} online"},
+    {"name": "token_invalido", "pattern": "Invalid Token",
+     "state": "error", "message": "Erro de Conexão (Verifique Token/Intents)"},
+    {"name": "intents", "pattern": "DISALLOWED_INTENTS",
+     "state": "error", "message": "Erro de Conexão (Verifique Token/Intents)"},
+    {"name": "aviso", "pattern": r"\b\w*Warning\b", "regex": True, "stream": "stderr", "event": "aviso"},
+    {"name": "erro", "pattern": r"\b\w*(?:Error|Exception)\b|\bERR_[A-Z_]+|^Unhandled", "regex": True, "stream": "stderr",
+     "state": "error", "message": "Erro de Execução (Verifique logs)"},
+]
+
+# --- Restart ---
+RESTART_MODE = 'warm'               # 'warm': sobe o novo processo antes de parar o antigo; 'cold': para e depois inicia
+RESTART_READY_TIMEOUT = 60          # Segundos para o processo novo mandar PAINEL_STATUS:BOT_ONLINE_READY
+RESTART_DRAIN_TIMEOUT = 10          # Segundos para o processo antigo encerrar antes de ser morto
+STOP_TIMEOUT = 5                    # Segundos para o processo sair num stop antes de ser morto
+
+# --- Reinício Automático ---
+AUTO_RESTART = 'on-failure'         # 'on-failure': só se o bot sair com erro; 'always': qualquer saída sem stop; 'never'
+AUTO_RESTART_DELAY = 1.0            # Segundos antes da primeira tentativa; dobra a cada queda seguida
+AUTO_RESTART_MAX_DELAY = 60.0       # Teto da espera entre tentativas
+AUTO_RESTART_JITTER = 0.2           # Variação aleatória da espera (0.2 = ±20%)
+AUTO_RESTART_STABLE = 60            # Segundos rodando para a queda seguinte voltar à primeira espera
+CRASH_LOOP_MAX = 5                  # Quedas dentro da janela que suspendem o reinício automático
+CRASH_LOOP_WINDOW = 300             # Janela, em segundos, da contagem de quedas
+
+# --- Comandos em Lote e Importação ---
+BATCH_MAX_OPERATIONS = 5000         # Operações aceitas por /api/commands/batch
+IMPORT_MAX_FILES = 20000            # Arquivos aceitos num pacote importado
+IMPORT_MAX_FILE_BYTES = 5 * 1024 * 1024
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024  # Acima disso o upload vai para disco
+
+# --- Variáveis ---
+VARIABLES_PAGE_LIMIT = 500          # Máximo de variáveis por página em /api/variables
+VARIABLES_SORTS = ('file', '-file', 'name', '-name')  # Ordens aceitas (arquivo ou nome, '-' inverte)
+
+# --- Servidor do Painel ---
+PANEL_HOST = '127.0.0.1'
+PANEL_PORT = 2000
+PRODUCTION_MODE = False             # Mesmo efeito de rodar com --producao
+PRODUCTION_THREADS = 16             # Threads do servidor WSGI no modo produção
+
+# --- Arquivos do Painel ---
+STATIC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+STATIC_ASSETS = {
+    'css_url': ('painel.css', 'text/css'),
+    'js_url': ('painel.js', 'text/javascript'),
+}
+
+# --- Limites do Buffer de Logs ---
+LOG_MAX_LINES = 10000               # Máximo de linhas mantidas em memória
+LOG_MAX_BYTES = 4 * 1024 * 1024     # Máximo de bytes (UTF-8) mantidos em memória
+LOG_PAGE_LIMIT = 1000               # Máximo de linhas por resposta de /api/logs
+LOG_READ_CHUNK = 64 * 1024          # Bytes lidos de cada vez dos pipes do bot
+LOG_MAX_LINE_CHARS = 16 * 1024      # Linhas maiores são cortadas (com aviso de quanto faltou)
+
+# --- Histórico de Logs (SQLite) ---
+LOG_HISTORY_ENABLED = True
+LOG_HISTORY_PATH = os.path.join(BOT_PATH, 'logs.db')  # Um banco só, compartilhado pelos bots
+LOG_HISTORY_BATCH = 1000            # Linhas gravadas por transação
+LOG_HISTORY_FLUSH = 1.0             # Segundos no máximo até uma linha ir para o banco
+LOG_HISTORY_QUEUE = 100000          # Linhas pendentes antes de começar a descartar
+LOG_HISTORY_DAYS = 30               # Linhas mais antigas que isso são apagadas
+LOG_SEARCH_LIMIT = 500              # Máximo de resultados por página em /api/logs/search
+
+# --- Arquivos de Log em Disco ---
+LOG_FILES_ENABLED = True
+LOG_DIR_NAME = 'logs'                # Pasta dos segmentos, dentro da pasta de cada bot
+LOG_SEGMENT_BYTES = 8 * 1024 * 1024  # Tamanho em que o segmento ativo é fechado
+LOG_SEGMENT_SECONDS = 24 * 3600      # Idade em que o segmento ativo é fechado
+LOG_RETENTION_SEGMENTS = 30          # Segmentos fechados (.log.gz) mantidos
+LOG_FILE_FLUSH = 1.0                 # Segundos no máximo com linhas só no buffer
+LOG_RESTORE_LINES = 1000             # Linhas recarregadas do disco quando o painel sobe
+
+# --- Stream de Eventos (SSE) ---
+SSE_QUEUE_SIZE = 5000               # Eventos pendentes por cliente antes de desconectá-lo
+SSE_HEARTBEAT = 15                  # Segundos entre pings para clientes ociosos
+SSE_MAX_CLIENTS = 32                # Acima disso novos clientes caem para o polling
+
+# --- Métricas de Recursos do Bot (/proc) ---
+METRICS_ENABLED = True              # Só funciona onde existe /proc (Linux, Termux)
+METRICS_INTERVAL = 2.0              # Segundos entre amostras
+METRICS_HISTORY = 1800              # Amostras guardadas por bot (1 hora com 2 s)
+METRICS_MAX_POINTS = 500            # Máximo de pontos por resposta de /api/bot/metrics
+
+# --- Métricas do Painel (/metrics) ---
+PANEL_METRICS_ENABLED = True        # Contagem e latência por rota, no formato do Prometheus
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
 
 # Configure o logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-app = Flask(__name__)
+app = Flask(__name__, static_folder=None)
 
-# --- Variáveis Globais de Controle do Bot ---
-bot_process = None
-bot_logs = []
-log_lock = threading.Lock()
-is_bot_process_running = False
-is_bot_truly_online = False
-bot_status_message = "Desligado"
+# --- Armazenamento de Logs ---
+class LogStore:
+    """Buffer circular de linhas de log com limite por quantidade e por bytes.
 
-# --- Função Auxiliar para Capturar Logs e Verificar Status ---
-def stream_logs(process):
-    """Lê stdout/stderr em uma thread separada para não bloquear."""
-    global bot_logs, is_bot_truly_online, bot_status_message
+    As linhas ficam como UTF-8 dentro de uma arena (bytearray, que cresce sob
+    demanda até max_bytes) e um índice de offsets/tamanhos aponta para cada
+    uma, em vez de guardar um str Python por linha. Cada linha recebe um
+    número de sequência monotônico; as mais antigas são descartadas quando um
+    dos limites é atingido.
 
-    while True:
-        output = process.stdout.readline()
-        error_output = process.stderr.readline()
+    Não é thread-safe: quem chama deve segurar o lock do bot.
+    """
 
-        if output == b'' and error_output == b'' and process.poll() is not None:
-            break
+    def __init__(self, max_lines, max_bytes):
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self._arena = bytearray(min(max_bytes, 64 * 1024))
+        self._starts = array('I', [0]) * max_lines
+        self._lengths = array('I', [0]) * max_lines
+        self._head = 0        # slot da linha mais antiga
+        self._count = 0       # linhas vivas
+        self._write = 0       # próxima posição livre na arena
+        self._used = 0        # bytes ocupados por linhas vivas
+        self.next_seq = 0     # sequência que a próxima linha vai receber
+        self.dropped = 0      # linhas descartadas por falta de espaço
 
-        if output:
-            decoded_line = output.decode('utf-8', errors='ignore').strip()
-            with log_lock:
-                bot_logs.append(decoded_line)
-                if "PAINEL_STATUS:BOT_ONLINE_READY" in decoded_line:
-                    is_bot_truly_online = True
-                    bot_status_message = f"{BOT_DISPLAY_NAME} online"
-                elif "Invalid Token" in decoded_line or "DISALLOWED_INTENTS" in decoded_line:
-                    is_bot_truly_online = False
-                    bot_status_message = "Erro de Conexão (Verifique Token/Intents)"
-
-        if error_output:
-            decoded_line = f"ERROR: {error_output.decode('utf-8', errors='ignore').strip()}"
-            with log_lock:
-                bot_logs.append(decoded_line)
-                is_bot_truly_online = False
-                bot_status_message = "Erro de Execução (Verifique logs)"
-    
-    is_bot_process_running = False
-    if not is_bot_truly_online:
-        bot_status_message = "Processo finalizado."
+    def __len__(self):
+        return self._count
 
-# HTML Template completo e funcional
-HTML_TEMPLATE = '''<!DOCTYPE html>
-<html lang="pt-br">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Painel de Controle - Styllena Bot</title>
-    <style>
-        body { 
-            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; 
-            background-color: #1e1e1e; 
-            color: #d4d4d4; 
-            margin: 0; 
-            padding: 20px; 
-        }
-        .container { 
-            max-width: 1200px; 
-            margin: auto; 
-            background-color: #252526; 
-            border-radius: 8px; 
-            box-shadow: 0 4px 12px rgba(0,0,0,0.5); 
-            overflow: hidden; 
-        }
-        .header { 
-            background-color: #007acc; 
-            color: white; 
-            padding: 15px 20px; 
-            text-align: center; 
-        }
-        .tabs { 
-            display: flex; 
-            background-color: #333; 
-            border-bottom: 2px solid #007acc; 
-        }
-        .tab-button { 
-            flex: 1; 
-            padding: 15px; 
-            background: none; 
-            border: none; 
-            color: #d4d4d4; 
-            cursor: pointer; 
-            font-size: 16px; 
-            transition: background-color 0.3s; 
-        }
-        .tab-button:hover { 
-            background-color: #444; 
-        }
-        .tab-button.active { 
-            background-color: #007acc; 
-            color: white; 
-        }
-        .tab-content { 
-            display: none; 
-            padding: 20px; 
-        }
-        .tab-content.active { 
-            display: block; 
-        }
-        .card { 
-            background-color: #2d2d2d; 
-            border-radius: 6px; 
-            padding: 20px; 
-            margin-bottom: 20px; 
-            border: 1px solid #444; 
-        }
-        .card h3 { 
-            margin-top: 0; 
-            color: #007acc; 
-        }
-        button { 
-            background-color: #007acc; 
-            color: white; 
-            border: none; 
-            padding: 10px 15px; 
-            border-radius: 4px; 
-            cursor: pointer; 
-            font-size: 14px; 
-            margin: 5px; 
-        }
-        button:hover { 
-            background-color: #005f9e; 
-        }
-        button.danger { 
-            background-color: #d9534f; 
-        }
-        button.danger:hover { 
-            background-color: #c9302c; 
-        }
-        input, textarea, select { 
-            width: 100%; 
-            padding: 10px; 
-            border-radius: 4px; 
-            border: 1px solid #555; 
-            background-color: #3c3c3c; 
-            color: #d4d4d4; 
-            box-sizing: border-box; 
-        }
-        textarea { 
-            font-family: "Consolas", "Monaco", monospace; 
-            min-height: 200px; 
-            resize: vertical; 
-        }
-        .file-list { 
-            list-style: none; 
-            padding: 0; 
-            max-height: 400px; 
-            overflow-y: auto;
-        }
-        .file-list li { 
-            background-color: #3c3c3c; 
-            padding: 10px; 
-            margin-bottom: 5px; 
-            border-radius: 4px; 
-            display: flex; 
-            justify-content: space-between; 
-            align-items: center; 
-        }
-        .file-list a { 
-            color: #61dafb; 
-            text-decoration: none; 
-            cursor: pointer; 
-        }
-        .file-list a:hover { 
-            text-decoration: underline; 
-        }
-        .log-container { 
-            background-color: #0c0c0c; 
-            color: #00ff00; 
-            font-family: "Consolas", "Monaco", monospace; 
-            padding: 15px; 
-            border-radius: 4px; 
-            height: 300px; 
-            overflow-y: scroll; 
-            white-space: pre-wrap; 
-        }
-        .status-indicator { 
-            display: inline-block; 
-            width: 12px; 
-            height: 12px; 
-            border-radius: 50%; 
-            margin-right: 8px; 
-        }
-        .status-online { 
-            background-color: #28a745; 
-        }
-        .status-offline { 
-            background-color: #dc3545; 
-        }
-        .status-starting { 
-            background-color: #f0ad4e; 
-        }
-        .env-entry { 
-            margin-bottom: 15px; 
-        }
-        .env-entry label { 
-            display: block; 
-            margin-bottom: 5px; 
-        }
-        .env-input-wrapper { 
-            position: relative; 
-        }
-        .env-input-wrapper input { 
-            padding-right: 40px; 
-        }
-        .env-toggle { 
-            position: absolute; 
-            right: 10px; 
-            top: 50%; 
-            transform: translateY(-50%); 
-            background: none; 
-            border: none; 
-            color: #d4d4d4; 
-            cursor: pointer; 
-        }
-        
-        .status-list {
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
-            gap: 15px;
-            margin-top: 15px;
-        }
-        
-        .status-card {
-            background-color: #3c3c3c;
-            border-radius: 6px;
-            padding: 15px;
-            border: 1px solid #555;
-        }
-        
-        .status-card .status-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 10px;
-        }
-        
-        .status-card .status-actions {
-            display: flex;
-            gap: 5px;
+    @property
+    def first_seq(self):
+        return self.next_seq - self._count
+
+    def _evict_oldest(self):
+        self._used -= self._lengths[self._head]
+        self._head = (self._head + 1) % self.max_lines
+        self._count -= 1
+        self.dropped += 1
+
+    def append(self, line):
+        """Adiciona uma linha e devolve o número de sequência dela."""
+        data = line.encode('utf-8')[:self.max_bytes]
+        size = len(data)
+
+        while self._count >= self.max_lines:
+            self._evict_oldest()
+
+        if self._write + size > len(self._arena) and len(self._arena) < self.max_bytes:
+            # Bots quietos não pagam pela arena inteira: ela dobra até max_bytes.
+            grown = min(self.max_bytes, max(2 * len(self._arena), self._write + size))
+            self._arena.extend(bytes(grown - len(self._arena)))
+        if self._write + size > len(self._arena):
+            # Não cabe no fim da arena: descarta o que sobrou da volta anterior
+            # e recomeça do início.
+            while self._count and self._starts[self._head] >= self._write:
+                self._evict_oldest()
+            self._write = 0
+        end = self._write + size
+        while self._count and self._write <= self._starts[self._head] < end:
+            self._evict_oldest()
+
+        slot = (self._head + self._count) % self.max_lines
+        self._starts[slot] = self._write
+        self._lengths[slot] = size
+        self._arena[self._write:end] = data
+        self._write = end
+        self._count += 1
+        self._used += size
+
+        seq = self.next_seq
+        self.next_seq += 1
+        return seq
+
+    def reset(self, next_seq):
+        """Descarta todas as linhas e continua a numeração a partir de next_seq."""
+        self.dropped += self._count
+        self._head = self._count = self._write = self._used = 0
+        self.next_seq = next_seq
+
+    def _line_at(self, index):
+        slot = (self._head + index) % self.max_lines
+        start = self._starts[slot]
+        return self._arena[start:start + self._lengths[slot]].decode('utf-8', errors='ignore')
+
+    def tail(self, n):
+        """Devolve as últimas n linhas, da mais antiga para a mais nova."""
+        n = min(n, self._count)
+        return [self._line_at(i) for i in range(self._count - n, self._count)]
+
+    def since(self, seq, limit):
+        """Devolve até limit linhas a partir da sequência seq.
+
+        Retorna (linhas, próximo cursor, gap). gap é True quando linhas entre
+        seq e a mais antiga ainda guardada já foram descartadas.
+        """
+        gap = seq < self.first_seq
+        start = max(seq, self.first_seq)
+        stop = min(self.next_seq, start + limit)
+        lines = [self._line_at(s - self.first_seq) for s in range(start, stop)]
+        return lines, max(stop, start), gap
+
+    def stats(self):
+        return {
+            "lines": self._count,
+            "bytes": self._used,
+            "max_lines": self.max_lines,
+            "max_bytes": self.max_bytes,
+            "first_seq": self.first_seq,
+            "next_seq": self.next_seq,
+            "dropped": self.dropped,
         }
-        
-        .form-group {
-            margin-bottom: 15px;
+
+# --- Histórico de Logs em SQLite ---
+class LogHistory:
+    """Histórico pesquisável das linhas dos bots num banco SQLite com índice
+    FTS5; cada linha e cada execução guardam o id do bot.
+
+    Quem drena os pipes só enfileira (sem bloquear); uma thread
+    própria grava em lotes de até LOG_HISTORY_BATCH linhas por transação. Se a
+    fila encher, as linhas excedentes não vão para o histórico (contadas em
+    dropped) mas continuam no buffer em memória.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, started REAL, pid INTEGER, bot TEXT);
+        CREATE TABLE IF NOT EXISTS lines (id INTEGER PRIMARY KEY, run INTEGER, ts REAL, stream TEXT, text TEXT, bot TEXT);
+    """
+    INDEXES = """
+        CREATE INDEX IF NOT EXISTS lines_ts ON lines(ts);
+        CREATE INDEX IF NOT EXISTS lines_run ON lines(run);
+        CREATE INDEX IF NOT EXISTS lines_bot ON lines(bot, id);
+    """
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS lines_fts USING fts5(text, content='lines', content_rowid='id');
+        CREATE TRIGGER IF NOT EXISTS lines_ai AFTER INSERT ON lines BEGIN
+            INSERT INTO lines_fts(rowid, text) VALUES (new.id, new.text);
+        END;
+        CREATE TRIGGER IF NOT EXISTS lines_ad AFTER DELETE ON lines BEGIN
+            INSERT INTO lines_fts(lines_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        END;
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fts = True
+        self.inserted = 0
+        self.dropped = 0
+        self.batches = 0
+        self._queue = queue.Queue(maxsize=LOG_HISTORY_QUEUE)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._next_run = None
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _iniciar(self):
+        """Cria o banco e a thread gravadora no primeiro uso. Chamar com _lock."""
+        conn = self._conectar()
+        conn.executescript(self.SCHEMA)
+        for table in ('runs', 'lines'):
+            # Bancos criados antes do suporte a vários bots: tudo era do principal.
+            if 'bot' not in [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]:
+                with conn:
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN bot TEXT')
+                    conn.execute(f'UPDATE {table} SET bot = ?', (DEFAULT_BOT_ID,))
+        conn.executescript(self.INDEXES)
+        try:
+            conn.executescript(self.FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite sem FTS5: a busca cai para LIKE.
+            self.fts = False
+        self._next_run = (conn.execute('SELECT MAX(id) FROM runs').fetchone()[0] or 0) + 1
+        self._thread = threading.Thread(target=self._gravar, args=(conn,), daemon=True)
+        self._thread.start()
+
+    def _pronto(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._iniciar()
+
+    def nova_execucao(self, bot_id, pid):
+        """Registra um processo de bot e devolve o id da execução."""
+        self._pronto()
+        with self._lock:
+            run = self._next_run
+            self._next_run += 1
+        try:
+            self._queue.put_nowait(('run', (run, time.time(), pid, bot_id)))
+        except queue.Full:
+            pass
+        return run
+
+    def registrar_lote(self, bot_id, run, stream, texts):
+        """Enfileira um lote de linhas; nunca bloqueia quem está drenando o pipe."""
+        self._pronto()
+        now = time.time()
+        try:
+            self._queue.put_nowait(('lines', [(run, now, stream, text, bot_id) for text in texts]))
+        except queue.Full:
+            self.dropped += len(texts)
+
+    def _gravar(self, conn):
+        last_cleanup = 0
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + LOG_HISTORY_FLUSH
+            while len(items) < LOG_HISTORY_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            runs, lines = [], []
+            for kind, data in items:
+                if kind == 'run':
+                    runs.append(data)
+                else:
+                    lines.extend(data)
+            try:
+                with conn:
+                    conn.executemany('INSERT INTO runs (id, started, pid, bot) VALUES (?, ?, ?, ?)', runs)
+                    conn.executemany('INSERT INTO lines (run, ts, stream, text, bot) VALUES (?, ?, ?, ?, ?)', lines)
+                    if time.monotonic() - last_cleanup > 3600:
+                        conn.execute('DELETE FROM lines WHERE ts < ?', (time.time() - LOG_HISTORY_DAYS * 86400,))
+                        last_cleanup = time.monotonic()
+                self.inserted += len(lines)
+                self.batches += 1
+            except sqlite3.Error as e:
+                self.dropped += len(lines)
+                logging.error(f"Falha ao gravar histórico de logs: {e}")
+
+    def buscar(self, bot_id, query=None, since=None, until=None, stream=None, run=None, before=None, limit=100):
+        """Linhas de um bot, mais novas primeiro; `before` é o id a partir do qual continuar."""
+        self._pronto()
+        where, params = [], []
+        for clause, value in (('l.bot = ?', bot_id), ('l.ts >= ?', since), ('l.ts <= ?', until), ('l.stream = ?', stream),
+                              ('l.run = ?', run), ('l.id < ?', before)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+
+        def consultar(conn, match):
+            sql = 'SELECT l.id, l.run, l.ts, l.stream, l.text FROM lines l'
+            conditions, args = list(where), list(params)
+            if match is not None and self.fts:
+                sql = 'SELECT l.id, l.run, l.ts, l.stream, l.text FROM lines_fts f JOIN lines l ON l.id = f.rowid'
+                conditions.insert(0, 'lines_fts MATCH ?')
+                args.insert(0, match)
+            elif match is not None:
+                conditions.insert(0, 'l.text LIKE ?')
+                args.insert(0, f'%{match}%')
+            if conditions:
+                sql += ' WHERE ' + ' AND '.join(conditions)
+            return conn.execute(sql + ' ORDER BY l.id DESC LIMIT ?', args + [limit]).fetchall()
+
+        conn = self._conectar()
+        try:
+            try:
+                rows = consultar(conn, query)
+            except sqlite3.OperationalError:
+                if not query:
+                    raise
+                # Sintaxe FTS inválida (aspas, parênteses...): busca a frase literal.
+                rows = consultar(conn, '"' + query.replace('"', '""') + '"')
+        finally:
+            conn.close()
+        return [{"id": r[0], "run": r[1], "ts": r[2], "stream": r[3], "text": r[4]} for r in rows]
+
+    def execucoes(self, bot_id, limit=50):
+        self._pronto()
+        conn = self._conectar()
+        try:
+            rows = conn.execute('SELECT r.id, r.started, r.pid, '
+                                '(SELECT COUNT(*) FROM lines l WHERE l.run = r.id) '
+                                'FROM runs r WHERE r.bot = ? ORDER BY r.id DESC LIMIT ?', (bot_id, limit)).fetchall()
+        finally:
+            conn.close()
+        return [{"id": r[0], "started": r[1], "pid": r[2], "lines": r[3]} for r in rows]
+
+    def stats(self):
+        return {
+            "inserted": self.inserted,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "pending": self._queue.qsize(),
+            "fts": self.fts,
         }
-        
-        .form-group label {
-            display: block;
-            margin-bottom: 5px;
-            color: #d4d4d4;
+
+# --- Segmentos de Log em Disco ---
+class LogSegments:
+    """Grava as linhas de um bot em arquivos de segmento na pasta dele.
+
+    O segmento ativo (bot-<data>.log) é fechado quando passa de
+    LOG_SEGMENT_BYTES ou de LOG_SEGMENT_SECONDS; os fechados são comprimidos
+    para .log.gz e só os LOG_RETENTION_SEGMENTS mais novos ficam. Quem registra
+    só enfileira; a escrita, com buffer, é feita pela thread do
+    _GravadorDeSegmentos, uma só para todos os bots.
+    """
+
+    PREFIX = 'bot-'
+
+    def __init__(self, directory, writer):
+        self.directory = directory
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self._writer = writer
+        self._out = None
+        self._path = None
+        self._started = None
+        self._size = 0
+
+    def segmentos(self):
+        """Nomes dos segmentos, do mais antigo para o mais novo."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(n for n in names if n.startswith(self.PREFIX) and n.endswith(('.log', '.log.gz')))
+
+    def ativo(self):
+        """Caminho do segmento ativo (o .log mais novo), ou None."""
+        logs = [n for n in self.segmentos() if n.endswith('.log')]
+        return os.path.join(self.directory, logs[-1]) if logs else None
+
+    def _novo(self):
+        now = time.time()
+        name = f"{self.PREFIX}{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1000) % 1000:03d}.log"
+        return os.path.join(self.directory, name), now
+
+    def registrar(self, lines):
+        """Enfileira um lote de linhas; nunca bloqueia quem está drenando o pipe."""
+        self._writer.enfileirar(self, lines)
+
+    # Os métodos abaixo só rodam na thread do gravador.
+    def _abrir(self):
+        os.makedirs(self.directory, exist_ok=True)
+        # Continua o segmento ativo da execução anterior se ele ainda couber.
+        path = self.ativo()
+        if path is not None and os.path.getsize(path) < LOG_SEGMENT_BYTES:
+            try:
+                stamp = os.path.basename(path)[len(self.PREFIX):len(self.PREFIX) + 15]
+                started = time.mktime(time.strptime(stamp, '%Y%m%d-%H%M%S'))
+            except ValueError:
+                started = os.path.getmtime(path)
+        else:
+            path, started = self._novo()
+        for name in self.segmentos():
+            # .log esquecidos por uma execução que caiu antes de comprimir.
+            old = os.path.join(self.directory, name)
+            if name.endswith('.log') and old != path:
+                self._comprimir(old)
+        self._out = open(path, 'ab', buffering=256 * 1024)
+        self._path, self._started = path, started
+        self._size = os.path.getsize(path)
+
+    def _escrever(self, lines):
+        if self._out is None:
+            self._abrir()
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        self._out.write(data)
+        self._size += len(data)
+        self.written += len(lines)
+        if self._size >= LOG_SEGMENT_BYTES:
+            self._rodar()
+
+    def _descarregar(self):
+        """Flush periódico; também fecha segmentos que passaram da idade."""
+        if self._out is None:
+            return
+        self._out.flush()
+        if self._size and time.time() - self._started >= LOG_SEGMENT_SECONDS:
+            self._rodar()
+
+    def _rodar(self):
+        self._out.close()
+        threading.Thread(target=self._comprimir, args=(self._path,), daemon=True).start()
+        self._path, self._started = self._novo()
+        self._out = open(self._path, 'ab', buffering=256 * 1024)
+        self._size = 0
+        self.rotations += 1
+
+    def _fechar(self):
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+    def _comprimir(self, path):
+        """Troca um segmento fechado pela versão .gz e aplica a retenção."""
+        try:
+            with open(path, 'rb') as src, gzip.open(path + '.gz.tmp', 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(path + '.gz.tmp', path + '.gz')
+            os.remove(path)
+        except OSError as e:
+            logging.error(f"Falha ao comprimir {path}: {e}")
+            return
+        closed = [n for n in self.segmentos() if n.endswith('.gz')]
+        for name in closed[:-LOG_RETENTION_SEGMENTS]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def tail(self, n, path=None):
+        """Últimas n linhas de um segmento, lendo blocos a partir do fim."""
+        path = path or self.ativo()
+        if path is None:
+            return []
+        chunks, newlines = [], 0
+        with open(path, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            while pos > 0 and newlines <= n:
+                step = min(64 * 1024, pos)
+                pos -= step
+                f.seek(pos)
+                chunk = f.read(step)
+                chunks.append(chunk)
+                newlines += chunk.count(b'\n')
+        lines = b''.join(reversed(chunks)).decode('utf-8', errors='replace').splitlines()
+        return lines[-n:] if n else []
+
+    def stats(self):
+        active = self.ativo()
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "rotations": self.rotations,
+            "active": active and os.path.basename(active),
         }
-        
-        .variables-list {
-            display: flex;
-            flex-direction: column;
-            gap: 15px;
-            margin: 15px 0;
+
+class _GravadorDeSegmentos:
+    """Thread única que grava os segmentos de log de todos os bots."""
+
+    _FIM = object()
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=LOG_HISTORY_QUEUE)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stores = set()
+
+    def enfileirar(self, store, lines):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._gravar, daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait((store, lines))
+        except queue.Full:
+            store.dropped += len(lines)
+
+    def _gravar(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=LOG_FILE_FLUSH)
+            except queue.Empty:
+                item = None
+            if item is self._FIM:
+                for store in self._stores:
+                    store._fechar()
+                return
+            if item is not None:
+                store, lines = item
+                self._stores.add(store)
+                try:
+                    store._escrever(lines)
+                except OSError as e:
+                    store.dropped += len(lines)
+                    logging.error(f"Falha ao gravar logs em {store.directory}: {e}")
+            if item is None or time.monotonic() - last_flush >= LOG_FILE_FLUSH:
+                for store in self._stores:
+                    try:
+                        store._descarregar()
+                    except OSError as e:
+                        logging.error(f"Falha ao gravar logs em {store.directory}: {e}")
+                last_flush = time.monotonic()
+
+    def fechar(self):
+        """Grava o que estiver pendente (chamado na saída do processo)."""
+        if self._thread is not None and self._thread.is_alive():
+            try:
+                self._queue.put(self._FIM, timeout=1)
+            except queue.Full:
+                return
+            self._thread.join(timeout=5)
+
+    def stats(self):
+        return {"pending": self._queue.qsize(), "files": len(self._stores)}
+
+# --- Armazenamento Compartilhado pelos Bots ---
+log_history = LogHistory(LOG_HISTORY_PATH)
+segment_writer = _GravadorDeSegmentos()
+atexit.register(segment_writer.fechar)
+
+# --- Eventos em Tempo Real (SSE) ---
+class _Assinante:
+    """Fila de eventos de um cliente conectado em /api/stream."""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=SSE_QUEUE_SIZE)
+        self.dropped = False
+
+def _eventos_do_assinante(sub):
+    """Gera (evento, dados) para um assinante, juntando linhas em lotes "logs".
+
+    Gera None depois de SSE_HEARTBEAT segundos sem eventos (hora do ping) e
+    termina com "dropped" se o assinante foi descartado por lentidão.
+    """
+    while True:
+        if sub.dropped:
+            yield 'dropped', {}
+            return
+        try:
+            items = [sub.queue.get(timeout=SSE_HEARTBEAT)]
+        except queue.Empty:
+            yield None
+            continue
+        # Junta o que já estiver na fila num só evento de logs.
+        while len(items) < LOG_PAGE_LIMIT:
+            try:
+                items.append(sub.queue.get_nowait())
+            except queue.Empty:
+                break
+
+        first_seq, lines = None, []
+        for event, data in items:
+            if event == 'log':
+                if first_seq is None:
+                    first_seq = data[0]
+                lines.append(data[1])
+                continue
+            if event == 'log_lote':
+                if first_seq is None:
+                    first_seq = data[0]
+                lines.extend(data[1])
+                continue
+            if lines:
+                yield 'logs', {"seq": first_seq, "lines": lines, "next": first_seq + len(lines)}
+                first_seq, lines = None, []
+            yield event, data
+        if lines:
+            yield 'logs', {"seq": first_seq, "lines": lines, "next": first_seq + len(lines)}
+
+def _evento_sse(event, data, event_id=None):
+    payload = f"event: {event}\n"
+    if event_id is not None:
+        payload += f"id: {event_id}\n"
+    return payload + f"data: {json.dumps(data)}\n\n"
+
+# --- Regras de Reconhecimento de Logs ---
+def _regex_de_literais(words):
+    """Monta uma regex em forma de trie (prefixos comuns fatorados) para os
+    literais, para que o custo por linha não cresça com o número de regras."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def montar(node):
+        branches = [re.escape(ch) + montar(child) for ch, child in sorted(node.items()) if ch != '']
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Termina aqui ou continua: o quantificador guloso prefere o literal mais longo.
+        return f'(?:{body})?' if '' in node else body
+
+    return montar(trie)
+
+class _AhoCorasick:
+    """Autômato de Aho-Corasick: acha todos os literais contidos num texto,
+    inclusive os que se sobrepõem ou estão um dentro do outro, numa passada."""
+
+    def __init__(self, words):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for word in words:
+            node = 0
+            for ch in word:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] += (word,)
+
+        # Links de falha em largura (os filhos da raiz falham para a raiz);
+        # cada nó herda as saídas do seu maior sufixo que também é prefixo.
+        pending = deque(self._goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for ch, child in self._goto[node].items():
+                pending.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] += self._out[self._fail[child]]
+
+    def buscar(self, text, start=0):
+        """Conjunto dos literais que aparecem em text[start:]."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found, node = set(), 0
+        for i in range(start, len(text)):
+            ch = text[i]
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+class LogRules:
+    """Regras que reconhecem linhas do bot, compiladas por stream numa única
+    regex que só diz se alguma regra casa: a maioria das linhas não casa com
+    nada e é varrida uma vez, não importa quantas regras existam. As que casam
+    passam pelo Aho-Corasick dos literais e pela regex de cada regra, então
+    todas as regras que aparecem na linha contam, mesmo sobrepostas.
+
+    Cada regra é um dict com name e pattern e, opcionalmente, regex (pattern é
+    uma expressão regular), ignore_case, stream ('stdout' ou 'stderr'), state
+    ('online' ou 'error', com message) e event (publicado no stream SSE).
+    """
+    STATES = ('online', 'error')
+    STREAMS = ('stdout', 'stderr')
+
+    def __init__(self, rules):
+        if not isinstance(rules, list):
+            raise ValueError("as regras devem ser uma lista")
+        self.rules = [self._validar(rule) for rule in rules]
+        self.matches = [0] * len(self.rules)
+        self.last_match = [None] * len(self.rules)
+        self.lines = dict.fromkeys(self.STREAMS, 0)
+        self._matchers = {stream: self._compilar(stream) for stream in self.STREAMS}
+
+    def _validar(self, rule):
+        if not isinstance(rule, dict) or not rule.get('name') or not isinstance(rule.get('pattern'), str) or not rule['pattern']:
+            raise ValueError(f"regra inválida: {rule!r}")
+        if rule.get('stream') not in (None,) + self.STREAMS:
+            raise ValueError(f"stream inválido na regra {rule['name']}")
+        if rule.get('state') not in (None,) + self.STATES:
+            raise ValueError(f"state inválido na regra {rule['name']}")
+        if rule.get('regex'):
+            try:
+                # Compila como trecho da regex combinada: flags globais como
+                # (?i) no meio do padrão só falham lá.
+                groups = re.compile(f"(?:{rule['pattern']})").groups
+            except re.error as e:
+                raise ValueError(f"regex inválida na regra {rule['name']}: {e}")
+            if groups:
+                raise ValueError(f"use grupos sem captura (?:...) na regra {rule['name']}")
+        return dict(rule)
+
+    def _compilar(self, stream):
+        literals, patterns = {}, []
+        for i, rule in enumerate(self.rules):
+            if rule.get('stream') not in (None, stream):
+                continue
+            if rule.get('regex') or rule.get('ignore_case'):
+                pattern = rule['pattern'] if rule.get('regex') else re.escape(rule['pattern'])
+                if rule.get('ignore_case'):
+                    pattern = f'(?i:{pattern})'
+                patterns.append((i, pattern))
+            else:
+                literals.setdefault(rule['pattern'], []).append(i)
+        parts = [f'(?:{pattern})' for _, pattern in patterns]
+        if literals:
+            parts.insert(0, _regex_de_literais(literals))
+        if not parts:
+            return None
+        try:
+            return {
+                "any": re.compile('|'.join(parts)),
+                "literals": literals,
+                "automaton": _AhoCorasick(literals) if literals else None,
+                "regexes": [(i, re.compile(pattern)) for i, pattern in patterns],
+            }
+        except re.error as e:
+            raise ValueError(f"não foi possível combinar as regras de {stream}: {e}")
+
+    def avaliar(self, stream, text):
+        """Índices (em ordem de configuração) das regras que casam com a linha."""
+        matcher = self._matchers[stream]
+        if matcher is None:
+            return []
+        first = matcher["any"].search(text)
+        if first is None:
+            return []
+        # Nenhuma regra casa antes do primeiro casamento da regex combinada.
+        start = first.start()
+        hits = set()
+        if matcher["automaton"] is not None:
+            for word in matcher["automaton"].buscar(text, start):
+                hits.update(matcher["literals"][word])
+        for i, regex in matcher["regexes"]:
+            if regex.search(text, start):
+                hits.add(i)
+        return sorted(hits)
+
+    def contar(self, stream, hits):
+        """Atualiza os contadores; chamar com o lock do bot."""
+        self.lines[stream] += 1
+        now = time.time()
+        for i in hits:
+            self.matches[i] += 1
+            self.last_match[i] = now
+
+    def stats(self):
+        return {
+            "lines": dict(self.lines),
+            "rules": [{**rule, "matches": self.matches[i], "last_match": self.last_match[i]}
+                      for i, rule in enumerate(self.rules)],
         }
 
-        .variable-card {
-            background-color: #3c3c3c;
-            border-radius: 6px;
-            padding: 15px;
-            border: 1px solid #555;
-            display: flex;
-            gap: 10px;
-            align-items: center;
-        }
+# --- Leitura dos Pipes dos Bots ---
+def _cortar_linha(text, omitted=0):
+    """Limita uma linha a LOG_MAX_LINE_CHARS, dizendo quantos caracteres saíram."""
+    omitted += max(0, len(text) - LOG_MAX_LINE_CHARS)
+    if not omitted:
+        return text
+    return f"{text[:LOG_MAX_LINE_CHARS]} [... linha cortada, {omitted} caracteres omitidos]"
+
+class _LeituraDePipe:
+    """Estado da leitura de um pipe (stdout ou stderr) de um processo.
+
+    O decodificador incremental guarda os bytes de um caractere UTF-8 cortado
+    entre dois blocos. De uma linha maior que LOG_MAX_LINE_CHARS só o começo
+    fica na memória; o resto é descartado (e contado) até a próxima quebra.
+    """
+
+    def __init__(self, bot, process, stream, pipe):
+        self.bot = bot
+        self.process = process
+        self.stream = stream
+        self.pipe = pipe
+        self.fd = pipe.fileno()
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._pending = ''
+        self._skipped = None   # caracteres descartados da linha longa atual, ou None
+
+    def alimentar(self, chunk):
+        """Devolve as linhas completas de um bloco lido (b'' no fim do pipe)."""
+        text = self._decoder.decode(chunk, final=not chunk)
+        lines = []
+        if self._skipped is not None:
+            end = text.find('\n')
+            if end < 0:
+                self._skipped += len(text)
+                text = ''
+            else:
+                lines.append(_cortar_linha(self._pending, self._skipped + end))
+                self._pending, self._skipped, text = '', None, text[end + 1:]
+        if text:
+            parts = (self._pending + text).split('\n')
+            self._pending = parts.pop()
+            lines.extend(_cortar_linha(part) for part in parts)
+            if len(self._pending) > LOG_MAX_LINE_CHARS:
+                self._skipped = len(self._pending) - LOG_MAX_LINE_CHARS
+                self._pending = self._pending[:LOG_MAX_LINE_CHARS]
+        if not chunk and (self._pending or self._skipped is not None):
+            lines.append(_cortar_linha(self._pending, self._skipped or 0))
+        return lines
+
+class LeitorDePipes:
+    """Drena stdout/stderr de todos os processos de todos os bots.
+
+    No POSIX uma única thread espera em todos os pipes com selectors, então o
+    número de threads não cresce com o número de bots; no Windows, onde
+    select() não aceita pipes, cada pipe ganha a sua thread. Cada bloco lido
+    (até LOG_READ_CHUNK bytes) vira um lote em bot.registrar_linhas(). A saída
+    do processo é percebida pelo VigiaDeProcessos, não pelo fim dos pipes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = {}        # processo -> pipes ainda abertos
+        self._new = []         # leituras esperando o registro no selector
+        self._selector = None
+        self._wake = None
+        self._thread = None
+
+    def acompanhar(self, bot, process):
+        readers = [_LeituraDePipe(bot, process, 'stdout', process.stdout),
+                   _LeituraDePipe(bot, process, 'stderr', process.stderr)]
+        with self._lock:
+            self._open[process] = len(readers)
+            if os.name != 'nt':
+                self._new.extend(readers)
+                if self._thread is None:
+                    self._selector = selectors.DefaultSelector()
+                    self._wake = os.pipe()
+                    os.set_blocking(self._wake[0], False)
+                    self._selector.register(self._wake[0], selectors.EVENT_READ, None)
+                    self._thread = threading.Thread(target=self._laco, daemon=True)
+                    self._thread.start()
+        if os.name == 'nt':
+            for reader in readers:
+                threading.Thread(target=self._drenar, args=(reader,), daemon=True).start()
+        else:
+            os.write(self._wake[1], b'\0')
+
+    def _entregar(self, reader, chunk):
+        try:
+            lines = reader.alimentar(chunk)
+            if lines:
+                reader.bot.registrar_linhas(reader.stream, lines, reader.process)
+        except Exception:
+            logging.exception(f"Erro ao registrar logs do bot {reader.bot.id}")
+        if chunk:
+            return
+        reader.pipe.close()
+        with self._lock:
+            self._open[reader.process] -= 1
+            if not self._open[reader.process]:
+                del self._open[reader.process]
+
+    def _drenar(self, reader):
+        while True:
+            try:
+                chunk = os.read(reader.fd, LOG_READ_CHUNK)
+            except OSError:
+                chunk = b''
+            self._entregar(reader, chunk)
+            if not chunk:
+                return
+
+    def _laco(self):
+        while True:
+            for key, _ in self._selector.select():
+                reader = key.data
+                if reader is None:
+                    os.read(self._wake[0], 4096)
+                    with self._lock:
+                        new, self._new = self._new, []
+                    for reader in new:
+                        self._selector.register(reader.fd, selectors.EVENT_READ, reader)
+                    continue
+                try:
+                    chunk = os.read(reader.fd, LOG_READ_CHUNK)
+                except OSError:
+                    chunk = b''
+                if not chunk:
+                    # Sai do selector antes de o pipe fechar e o fd ser reaproveitado.
+                    self._selector.unregister(reader.fd)
+                self._entregar(reader, chunk)
+
+    def stats(self):
+        with self._lock:
+            return {"processes": len(self._open), "threads": 1 if os.name != 'nt' else 2 * len(self._open)}
+
+leitor_de_pipes = LeitorDePipes()
+
+# --- Vigia de Processos ---
+class VigiaDeProcessos:
+    """Percebe na hora a saída dos processos de todos os bots.
+
+    No Linux cada processo vira um pidfd (os.pidfd_open) esperado por uma
+    única thread com selectors, então a queda é vista no instante em que
+    acontece, mesmo que um neto do bot ainda segure os pipes abertos. Onde não
+    existe pidfd (Windows, Mac, kernels antigos), cada processo ganha uma
+    thread parada em process.wait(). Nos dois casos bot.processo_terminou()
+    recebe o processo já colhido, com o returncode preenchido.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._new = []         # (pidfd, bot, processo) esperando o registro no selector
+        self._watched = 0      # processos vivos sendo vigiados
+        self._waiters = 0      # threads de process.wait() (sem pidfd)
+        self._selector = None
+        self._wake = None
+        self._thread = None
+
+    def acompanhar(self, bot, process):
+        pidfd = None
+        if hasattr(os, 'pidfd_open') and process.poll() is None:
+            try:
+                pidfd = os.pidfd_open(process.pid)
+            except OSError:
+                pidfd = None
+        with self._lock:
+            self._watched += 1
+            if pidfd is None:
+                self._waiters += 1
+            else:
+                self._new.append((pidfd, bot, process))
+                if self._thread is None:
+                    self._selector = selectors.DefaultSelector()
+                    self._wake = os.pipe()
+                    os.set_blocking(self._wake[0], False)
+                    self._selector.register(self._wake[0], selectors.EVENT_READ, None)
+                    self._thread = threading.Thread(target=self._laco, daemon=True)
+                    self._thread.start()
+        if pidfd is None:
+            threading.Thread(target=self._avisar, args=(bot, process, True), daemon=True).start()
+        else:
+            os.write(self._wake[1], b'\0')
+
+    def _avisar(self, bot, process, waiter=False):
+        try:
+            process.wait()
+            bot.processo_terminou(process)
+        except Exception:
+            logging.exception(f"Erro ao tratar a saída do processo do bot {bot.id}")
+        with self._lock:
+            self._watched -= 1
+            if waiter:
+                self._waiters -= 1
+
+    def _laco(self):
+        while True:
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    os.read(self._wake[0], 4096)
+                    with self._lock:
+                        new, self._new = self._new, []
+                    for pidfd, bot, process in new:
+                        self._selector.register(pidfd, selectors.EVENT_READ, (bot, process))
+                    continue
+                self._selector.unregister(key.fd)
+                os.close(key.fd)
+                self._avisar(*key.data)
+
+    def stats(self):
+        with self._lock:
+            return {"processes": self._watched, "threads": (self._thread is not None) + self._waiters}
+
+vigia_de_processos = VigiaDeProcessos()
+
+# --- Métricas de Recursos (/proc) ---
+class MetricsRing:
+    """Série temporal de tamanho fixo com as amostras de recursos de um bot.
+
+    Cada campo é um array('d') circular de METRICS_HISTORY posições, então a
+    memória não muda com o tempo de execução. Não é thread-safe: quem chama
+    deve segurar o lock do bot.
+    """
+    FIELDS = ('ts', 'cpu', 'rss', 'threads', 'fds', 'read', 'write', 'processes')
+    # Ao juntar várias amostras num ponto: média das taxas, pico dos tamanhos.
+    PEAK_FIELDS = ('rss', 'threads', 'fds', 'processes')
+
+    def __init__(self, size):
+        self.size = size
+        self._data = {field: array('d', [0.0]) * size for field in self.FIELDS}
+        self._head = 0       # posição da próxima amostra
+        self._count = 0
+
+    def append(self, sample):
+        for field in self.FIELDS:
+            self._data[field][self._head] = sample[field]
+        self._head = (self._head + 1) % self.size
+        self._count = min(self._count + 1, self.size)
+
+    def latest(self):
+        if not self._count:
+            return None
+        i = (self._head - 1) % self.size
+        return {field: self._data[field][i] for field in self.FIELDS}
+
+    def series(self, since=None, points=None):
+        """Colunas {campo: [valores]} das amostras depois de since, reduzidas a
+        no máximo points pontos."""
+        start = (self._head - self._count) % self.size
+        order = [(start + k) % self.size for k in range(self._count)]
+        if since is not None:
+            ts = self._data['ts']
+            order = [i for i in order if ts[i] > since]
+        columns = {field: [self._data[field][i] for i in order] for field in self.FIELDS}
+        if not points or len(order) <= points:
+            return columns
+
+        # Divide em points grupos consecutivos de tamanho quase igual.
+        n = len(order)
+        bounds = [round(k * n / points) for k in range(points + 1)]
+        reduced = {}
+        for field, values in columns.items():
+            if field == 'ts':
+                reduced[field] = [values[b - 1] for b in bounds[1:]]
+            elif field in self.PEAK_FIELDS:
+                reduced[field] = [max(values[a:b]) for a, b in zip(bounds, bounds[1:])]
+            else:
+                reduced[field] = [sum(values[a:b]) / (b - a) for a, b in zip(bounds, bounds[1:])]
+        return reduced
+
+class ResourceSampler:
+    """Lê de /proc, a cada METRICS_INTERVAL segundos, os recursos do processo
+    de cada bot em execução somados aos dos processos filhos dele.
+
+    Uma única thread atende todos os bots. CPU é a porcentagem de um núcleo
+    (pode passar de 100 com várias threads), rss está em bytes e read/write
+    são bytes por segundo lidos/escritos (rchar/wchar, que incluem pipes e
+    sockets). A thread só começa quando o primeiro bot é iniciado.
+    """
+
+    def __init__(self):
+        self.supported = os.path.isdir('/proc/self/task')
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._previous = {}   # bot id -> (instante, {pid: (ticks de cpu, rchar, wchar)})
+        if self.supported:
+            self._ticks = os.sysconf('SC_CLK_TCK')
+            self._page = os.sysconf('SC_PAGE_SIZE')
+
+    def iniciar(self):
+        if not METRICS_ENABLED or not self.supported:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._amostrar, daemon=True)
+                self._thread.start()
+
+    def _filhos(self, pid):
+        """Pids dos filhos diretos, pelos arquivos children de cada thread."""
+        children = []
+        try:
+            tids = os.listdir(f'/proc/{pid}/task')
+        except OSError:
+            return children
+        for tid in tids:
+            try:
+                with open(f'/proc/{pid}/task/{tid}/children') as f:
+                    children.extend(int(child) for child in f.read().split())
+            except OSError:
+                continue
+        return children
+
+    def _ler(self, pid):
+        """(ticks de cpu, rss em bytes, threads, fds, rchar, wchar) de um pid."""
+        with open(f'/proc/{pid}/stat') as f:
+            # O nome do processo (2º campo) pode ter espaços; o resto vem depois do ')'.
+            fields = f.read().rpartition(')')[2].split()
+        ticks = int(fields[11]) + int(fields[12])
+        threads, rss = int(fields[17]), int(fields[21]) * self._page
+        try:
+            fds = len(os.listdir(f'/proc/{pid}/fd'))
+        except OSError:
+            fds = 0
+        rchar = wchar = 0
+        try:
+            with open(f'/proc/{pid}/io') as f:
+                for line in f:
+                    key, _, value = line.partition(':')
+                    if key == 'rchar':
+                        rchar = int(value)
+                    elif key == 'wchar':
+                        wchar = int(value)
+        except OSError:
+            pass
+        return ticks, rss, threads, fds, rchar, wchar
+
+    def medir(self, bot_id, root_pid):
+        """Uma amostra do processo e dos descendentes; None se ele já saiu."""
+        now = time.monotonic()
+        totals = {"rss": 0, "threads": 0, "fds": 0}
+        counters = {}
+        pending = [root_pid]
+        while pending:
+            pid = pending.pop()
+            try:
+                ticks, rss, threads, fds, rchar, wchar = self._ler(pid)
+            except (OSError, ValueError, IndexError):
+                continue
+            counters[pid] = (ticks, rchar, wchar)
+            totals["rss"] += rss
+            totals["threads"] += threads
+            totals["fds"] += fds
+            pending.extend(self._filhos(pid))
+        if root_pid not in counters:
+            self._previous.pop(bot_id, None)
+            return None
+
+        # Taxas pelos pids que já estavam na amostra anterior.
+        cpu = read = write = 0.0
+        previous = self._previous.get(bot_id)
+        if previous is not None:
+            elapsed = now - previous[0]
+            for pid, (ticks, rchar, wchar) in counters.items():
+                before = previous[1].get(pid)
+                if before is not None and elapsed > 0:
+                    cpu += max(0, ticks - before[0]) / self._ticks / elapsed * 100
+                    read += max(0, rchar - before[1]) / elapsed
+                    write += max(0, wchar - before[2]) / elapsed
+        self._previous[bot_id] = (now, counters)
+        return {"ts": time.time(), "cpu": round(cpu, 1), "read": read, "write": write,
+                "processes": len(counters), **totals}
+
+    def _amostrar(self):
+        while True:
+            started = time.monotonic()
+            for bot in list(bots.values()):
+                process = bot.process
+                if not bot.running or process is None or process.poll() is not None:
+                    self._previous.pop(bot.id, None)
+                    continue
+                try:
+                    sample = self.medir(bot.id, process.pid)
+                except Exception:
+                    logging.exception(f"Erro ao medir os recursos do bot {bot.id}")
+                    continue
+                if sample is not None:
+                    with bot.lock:
+                        bot.metrics.append(sample)
+                    self.samples += 1
+            time.sleep(max(0.0, METRICS_INTERVAL - (time.monotonic() - started)))
+
+resource_sampler = ResourceSampler()
+
+# --- Cliente do Supervisor ---
+supervisor_mirror_started = False
+supervisor_lock = threading.Lock()
+
+def _chamar_supervisor(payload, timeout=SUPERVISOR_TIMEOUT):
+    """Envia uma requisição ao supervisor.py e devolve a resposta (dict)."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(SUPERVISOR_SOCKET)
+            sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as reader:
+                return json.loads(reader.readline())
+    except (OSError, ValueError) as e:
+        return {"success": False, "message": f"Supervisor indisponível: {e}"}
+
+def iniciar_espelho_supervisor():
+    """Uma conexão de assinatura com o supervisor para cada bot registrado."""
+    global supervisor_mirror_started
+    with supervisor_lock:
+        if supervisor_mirror_started:
+            return
+        supervisor_mirror_started = True
+    for bot in bots.values():
+        threading.Thread(target=bot.espelhar_supervisor, daemon=True).start()
+
+@app.before_request
+def _garantir_espelho_supervisor():
+    # Workers iniciados por outro servidor WSGI não passam pelo __main__.
+    if SUPERVISOR_SOCKET and not supervisor_mirror_started:
+        iniciar_espelho_supervisor()
+
+# --- Hot-reload de Comandos no Bot ---
+# O bot roda com `node --require painel-reload.js`; o hook lê pedidos na stdin
+# e responde no stdout com RELOAD_DONE_PREFIX + JSON.
+RELOAD_REQUEST_PREFIX = 'PAINEL_RELOAD '
+RELOAD_DONE_PREFIX = 'PAINEL_RELOAD_DONE '
+
+def _nome_do_sinal(number):
+    try:
+        return signal.Signals(number).name
+    except ValueError:
+        return str(number)
+
+def _encerrar_processo(process, timeout):
+    """Pede para o processo sair (SIGTERM) e mata se não sair a tempo."""
+    process.painel_encerrado = True
+    process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+# --- Instâncias de Bot ---
+class BotInstance:
+    """Um bot gerenciado pelo painel, com pasta, ambiente, processo, status,
+    logs e assinantes próprios.
+
+    O estado do processo e os logs ficam sob self.lock, que também serializa
+    o registro das linhas lidas dos pipes; start, stop e restart passam por
+    self.control_lock. Nada aqui é percorrido por bot: o custo de uma
+    consulta não depende de quantos bots existem.
+    """
+
+    def __init__(self, bot_id, path, file_name=BOT_FILE_NAME, display_name=None, env=None):
+        self.id = bot_id
+        self.path = path
+        self.file_name = file_name
+        self.display_name = display_name or bot_id
+        self.env = dict(env or {})
+        self.commands_path = os.path.join(path, COMMANDS_DIR)
+        self.variables_path = os.path.join(path, VARIABLES_FILE)
+        self.env_path = os.path.join(path, ENV_FILE)
+        self.status_config_path = os.path.join(path, STATUS_CONFIG_FILE)
+        self.log_rules_path = os.path.join(path, LOG_RULES_FILE)
+
+        self.lock = threading.Lock()
+        self.control_lock = threading.RLock()
+        self.logs = LogStore(LOG_MAX_LINES, LOG_MAX_BYTES)
+        self.files = LogSegments(os.path.join(path, LOG_DIR_NAME), segment_writer)
+        self.rules = LogRules(DEFAULT_LOG_RULES)
+        self.process = None
+        self.running = False
+        self.online = False
+        self.status_message = "Desligado"
+
+        # Restart sem queda: o processo novo fica em espera até mandar o sinal de pronto.
+        self.standby_process = None
+        self.standby_ready = threading.Event()
+        self.restart_began = None
+        self.last_restart = None
+
+        # Reinício automático depois de uma queda.
+        self.last_exit = None
+        self.crash_times = deque(maxlen=CRASH_LOOP_MAX)
+        self.crash_streak = 0          # quedas seguidas, para o backoff
+        self.crash_loop = False        # reinício automático suspenso até um start manual
+        self.crashes = 0
+        self.auto_restarts = 0
+        self.restart_timer = None
+        self.restart_at = None
+
+        self.subscribers = []
+        self.subscribers_lock = threading.Lock()
+        self.last_published_status = None
+
+        self.reload_history = deque(maxlen=RELOAD_HISTORY_SIZE)
+        self.reload_lock = threading.Lock()
+        self.reload_counter = 0
+
+        self.command_index = CommandIndex(self.commands_path)
+        self.variables = VariablesModel(self.variables_path)
+        self.commands_lock = threading.Lock()
+        self.metrics = MetricsRing(METRICS_HISTORY)
+        self.lines_ingested = 0
+
+    def resumo(self):
+        return {"id": self.id, "name": self.display_name, "path": self.path, **self.status_atual()}
+
+    def preparar_pastas(self):
+        """Cria as pastas e os arquivos que o painel espera encontrar."""
+        os.makedirs(self.commands_path, exist_ok=True)
+        os.makedirs(os.path.dirname(self.variables_path), exist_ok=True)
+        if not os.path.exists(self.status_config_path):
+            with open(self.status_config_path, 'w', encoding='utf-8') as f:
+                f.write('[]')
+        if not os.path.exists(self.variables_path):
+            with open(self.variables_path, 'w', encoding='utf-8') as f:
+                f.write('module.exports = {};')
+
+    # Eventos em tempo real
+    def publicar_evento(self, event, data):
+        """Entrega um evento a todos os clientes sem nunca bloquear quem publica.
+
+        Um cliente lento cuja fila encheu é marcado e removido: ele recebe um
+        evento "dropped" e reconecta com o seu cursor, em vez de acumular memória.
+        """
+        with self.subscribers_lock:
+            for sub in list(self.subscribers):
+                try:
+                    sub.queue.put_nowait((event, data))
+                except queue.Full:
+                    sub.dropped = True
+                    self.subscribers.remove(sub)
+
+    def status_atual(self):
+        status = "offline"
+        if self.running:
+            status = "online" if self.online else "starting"
+        return {"status": status, "message": self.status_message}
+
+    def notificar_status(self):
+        """Publica o status atual se ele mudou desde a última publicação."""
+        current = self.status_atual()
+        with self.subscribers_lock:
+            if current == self.last_published_status:
+                return
+            self.last_published_status = current
+        self.publicar_evento('status', current)
+
+    def inscrever_assinante(self, since):
+        """Inscreve um assinante e devolve (assinante, status, backlog de logs).
+
+        A inscrição e o backlog acontecem sob o mesmo lock do registro das
+        linhas, assim nenhuma linha cai entre o backlog e os eventos ao vivo.
+        """
+        sub = _Assinante()
+        with self.lock:
+            with self.subscribers_lock:
+                self.subscribers.append(sub)
+            if since is None or since > self.logs.next_seq:
+                lines = self.logs.tail(100)
+                backlog = {"seq": self.logs.next_seq - len(lines), "lines": lines,
+                           "next": self.logs.next_seq, "gap": False, "reset": True}
+            else:
+                lines, next_seq, gap = self.logs.since(since, LOG_MAX_LINES)
+                backlog = {"seq": next_seq - len(lines), "lines": lines,
+                           "next": next_seq, "gap": gap, "reset": False}
+            status = self.status_atual()
+        return sub, status, backlog
+
+    def cancelar_assinante(self, sub):
+        with self.subscribers_lock:
+            if sub in self.subscribers:
+                self.subscribers.remove(sub)
+
+    # Regras de logs
+    def carregar_regras(self):
+        """Ativa as regras do log_rules.json do bot, ou as padrão se o arquivo
+        não existe. Regras inválidas são registradas no log e as atuais continuam."""
+        try:
+            with open(self.log_rules_path, 'r', encoding='utf-8') as f:
+                rules = json.load(f)
+        except FileNotFoundError:
+            rules = DEFAULT_LOG_RULES
+        except (OSError, ValueError) as e:
+            logging.error(f"Não foi possível ler {self.log_rules_path}: {e}")
+            return
+        try:
+            self.rules = LogRules(rules)
+        except ValueError as e:
+            logging.error(f"Regras de log inválidas em {self.log_rules_path}: {e}")
+
+    def salvar_regras(self, rules):
+        """Valida, grava no log_rules.json e ativa na hora um novo conjunto de regras."""
+        try:
+            compiled = LogRules(rules)
+        except ValueError as e:
+            return {"success": False, "message": f"Regras inválidas: {e}"}, 400
+        file_writer.write(self.log_rules_path, json.dumps(rules, indent=2, ensure_ascii=False))
+        self.rules = compiled
+        return {"success": True, "rules": len(compiled.rules)}, 200
+
+    # Logs e status do processo
+    def registrar_linhas(self, stream, texts, process=None):
+        """Carimba o horário num lote de linhas do bot, aplica as regras de log e
+        publica tudo com uma só passagem por self.lock.
+
+        Só o processo atual (self.process) mexe no status; durante um restart
+        sem queda as linhas do processo novo e do antigo ganham um rótulo.
+        """
+        timestamp = time.strftime('%H:%M:%S')
+        rules = self.rules
+        prepared, history = [], []
+        for text in texts:
+            text = text.strip()
+            reload_done = stream == 'stdout' and text.startswith(RELOAD_DONE_PREFIX)
+            hits = [] if reload_done else rules.avaliar(stream, text)
+            state_rule = next((rules.rules[i] for i in hits if rules.rules[i].get('state')), None)
+            prepared.append((text, reload_done, hits, state_rule))
+            if not reload_done:
+                history.append(text)
+        if LOG_HISTORY_ENABLED and history:
+            log_history.registrar_lote(self.id, getattr(process or self.process, 'painel_run', None), stream, history)
+
+        with self.lock:
+            current = process is None or process is self.process
+            if current:
+                label = ''
+            elif process is self.standby_process:
+                label = '[novo] '
+            else:
+                label = '[antigo] '
+
+            first_seq, lines, events = None, [], []
+            for text, reload_done, hits, state_rule in prepared:
+                if stream == 'stderr':
+                    kind = 'ERROR: ' if state_rule and state_rule['state'] == 'error' else 'STDERR: '
+                    line = f"[{timestamp}] {label}{kind}{text}"
+                else:
+                    line = f"[{timestamp}] {label}{text}"
+
+                rules.contar(stream, hits)
+                if reload_done and current:
+                    self.registrar_reload(text[len(RELOAD_DONE_PREFIX):])
+                if state_rule and not current:
+                    if process is self.standby_process and state_rule['state'] == 'online':
+                        self.standby_ready.set()
+                elif state_rule:
+                    message = state_rule.get('message', '{bot} online' if state_rule['state'] == 'online' else 'Erro (Verifique logs)')
+                    self.online = state_rule['state'] == 'online'
+                    self.status_message = message.replace('{bot}', self.display_name)
+                    if self.online and self.restart_began is not None:
+                        self.last_restart = {"mode": "cold", "downtime_ms": round((time.monotonic() - self.restart_began) * 1000, 1),
+                                             "fallback": False, "time": time.time()}
+                        self.restart_began = None
+
+                seq = self.logs.append(line)
+                if first_seq is None:
+                    first_seq = seq
+                lines.append(line)
+                for i in hits:
+                    if rules.rules[i].get('event'):
+                        events.append({"rule": rules.rules[i]['name'], "event": rules.rules[i]['event'], "seq": seq})
+
+            self.lines_ingested += len(lines)
+            if lines:
+                self.publicar_evento('log_lote', (first_seq, lines))
+                if LOG_FILES_ENABLED:
+                    self.files.registrar(lines)
+            for event in events:
+                self.publicar_evento('rule', event)
+            self.notificar_status()
+
+    def processo_terminou(self, process):
+        """Chamada pelo VigiaDeProcessos assim que um processo do bot sai.
+
+        Guarda o código de saída (ou o sinal) e, se a saída não veio de um
+        stop/restart, marca o bot como parado e agenda o reinício automático.
+        """
+        code = process.returncode
+        with self.lock:
+            if process is not self.process:
+                # Processo novo que morreu antes de ficar pronto, ou o antigo já drenado.
+                if process is self.standby_process:
+                    self.standby_ready.set()
+                return
+            expected = getattr(process, 'painel_encerrado', False)
+            self.last_exit = {
+                "code": code if code >= 0 else None,
+                "signal": _nome_do_sinal(-code) if code < 0 else None,
+                "uptime_s": round(time.monotonic() - process.painel_started, 1),
+                "expected": expected,
+                "time": time.time(),
+            }
+            if expected:
+                # O stop/restart que pediu a saída cuida do status.
+                return
+            self.running = False
+            self.online = False
+            self.restart_began = None
+            self.crashes += 1
+            self.status_message = self.agendar_reinicio()
+            self.notificar_status()
+
+    def agendar_reinicio(self):
+        """Aplica a política de reinício à queda em self.last_exit e devolve a
+        mensagem de status. Chamada com self.lock."""
+        exit_info = self.last_exit
+        reason = f"sinal {exit_info['signal']}" if exit_info['signal'] else f"código {exit_info['code']}"
+        if AUTO_RESTART == 'never' or (AUTO_RESTART == 'on-failure' and exit_info['code'] == 0):
+            return f"Processo finalizado ({reason})."
+
+        now = time.monotonic()
+        if exit_info['uptime_s'] >= AUTO_RESTART_STABLE:
+            self.crash_streak = 0
+        self.crash_times.append(now)
+        if len(self.crash_times) >= CRASH_LOOP_MAX and now - self.crash_times[0] <= CRASH_LOOP_WINDOW:
+            self.crash_loop = True
+            return (f"Caiu {CRASH_LOOP_MAX} vezes em menos de {CRASH_LOOP_WINDOW} s ({reason}); "
+                    f"reinício automático suspenso até um start manual.")
+
+        # Backoff exponencial com variação aleatória, para bots que caem juntos
+        # (ex.: queda do Discord) não voltarem todos no mesmo instante.
+        delay = min(AUTO_RESTART_MAX_DELAY, AUTO_RESTART_DELAY * 2 ** self.crash_streak)
+        delay *= 1 + random.uniform(-AUTO_RESTART_JITTER, AUTO_RESTART_JITTER)
+        self.crash_streak += 1
+        timer = threading.Timer(delay, lambda: self.reinicio_automatico(timer))
+        timer.daemon = True
+        self.restart_timer = timer
+        self.restart_at = time.time() + delay
+        timer.start()
+        return f"Processo caiu ({reason}); reiniciando em {delay:.1f} s (tentativa {self.crash_streak})."
+
+    def reinicio_automatico(self, timer):
+        with self.control_lock:
+            with self.lock:
+                if self.restart_timer is not timer:
+                    return     # cancelado por um start/stop manual
+                self.restart_timer = None
+                self.restart_at = None
+            if self.running:
+                return
+            result = self.controlar('start', automatic=True)
+            if result["success"]:
+                self.auto_restarts += 1
+            else:
+                logging.error(f"Reinício automático do bot {self.id} falhou: {result['message']}")
+
+    def cancelar_reinicio(self, reset=False):
+        """Cancela um reinício automático pendente; com reset, zera também a
+        contagem de quedas e religa o reinício automático."""
+        with self.lock:
+            pending = self.restart_timer is not None
+            if pending:
+                self.restart_timer.cancel()
+                self.restart_timer = None
+                self.restart_at = None
+            if reset:
+                self.crash_times.clear()
+                self.crash_streak = 0
+                self.crash_loop = False
+        return pending
+
+    def supervisao(self):
+        """Saída mais recente e estado do reinício automático, para /api/bot/status."""
+        with self.lock:
+            return {
+                "policy": AUTO_RESTART,
+                "last_exit": self.last_exit,
+                "crash_streak": self.crash_streak,
+                "recent_crashes": sum(1 for t in self.crash_times if time.monotonic() - t <= CRASH_LOOP_WINDOW),
+                "crash_loop": self.crash_loop,
+                "crashes": self.crashes,
+                "auto_restarts": self.auto_restarts,
+                "next_restart_in": round(max(0.0, self.restart_at - time.time()), 1) if self.restart_at else None,
+            }
+
+    def restaurar_logs(self):
+        """Recarrega no buffer em memória o fim do segmento ativo, para que os
+        logs de antes de o painel reiniciar continuem na tela."""
+        path = self.files.ativo()
+        if not LOG_FILES_ENABLED or path is None:
+            return
+        lines = self.files.tail(LOG_RESTORE_LINES, path)
+        if not lines:
+            return
+        with self.lock:
+            for line in lines:
+                self.logs.append(line)
+            self.logs.append(f"--- {len(lines)} linhas restauradas de {os.path.basename(path)} ---")
+
+    # Supervisor externo
+    def chamar_supervisor(self, payload, timeout=SUPERVISOR_TIMEOUT):
+        return _chamar_supervisor({**payload, "bot": self.id}, timeout)
+
+    def aplicar_evento_supervisor(self, event, data):
+        """Copia um evento do supervisor para o status e os logs locais."""
+        if event == 'status':
+            with self.lock:
+                self.running = data["status"] != "offline"
+                self.online = data["status"] == "online"
+                self.status_message = data["message"]
+                self.notificar_status()
+        elif event == 'logs':
+            with self.lock:
+                lines = data["lines"]
+                # Mantém a mesma numeração do supervisor, para que um cursor
+                # valha em qualquer worker do painel.
+                renumbered = bool(data.get("reset"))
+                if renumbered or data.get("gap") or data["seq"] > self.logs.next_seq:
+                    self.logs.reset(data["seq"])
+                elif data["seq"] < self.logs.next_seq:
+                    lines = lines[self.logs.next_seq - data["seq"]:]
+                self.lines_ingested += len(lines)
+                first_seq = self.logs.next_seq
+                for line in lines:
+                    self.logs.append(line)
+                if renumbered:
+                    # A numeração recomeçou (ex.: o supervisor reiniciou): os cursores
+                    # dos navegadores não valem mais, então eles recomeçam a tela.
+                    self.publicar_evento('logs', {"seq": first_seq, "lines": lines, "next": self.logs.next_seq, "gap": False, "reset": True})
+                elif lines:
+                    self.publicar_evento('log_lote', (first_seq, lines))
+        elif event == 'reload':
+            with self.lock:
+                self.reload_history.append(data)
+                self.publicar_evento('reload', data)
+
+    def espelhar_supervisor(self):
+        """Assina o supervisor e mantém o estado local em sincronia, reconectando
+        a partir do último cursor sempre que a conexão cai."""
+        since = None
+        while True:
+            subscribed = False
+            error = "conexão encerrada antes da assinatura"
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.settimeout(SSE_HEARTBEAT * 3)
+                    sock.connect(SUPERVISOR_SOCKET)
+                    sock.sendall(json.dumps({"op": "subscribe", "since": since, "bot": self.id}).encode('utf-8') + b'\n')
+                    with sock.makefile('rb') as reader:
+                        for raw in reader:
+                            message = json.loads(raw)
+                            if "event" not in message:
+                                raise ValueError(message.get("message", "resposta inválida"))
+                            subscribed = True
+                            if message["event"] == 'dropped':
+                                break
+                            self.aplicar_evento_supervisor(message["event"], message["data"])
+                            with self.lock:
+                                since = self.logs.next_seq
+            except (OSError, ValueError) as e:
+                error = e
+                if subscribed:
+                    logging.warning(f"Conexão com o supervisor perdida ({self.id}): {e}; reconectando.")
+            if subscribed:
+                # O stream já funcionou (ou o supervisor descartou o espelho por
+                # lentidão): reassina a partir do cursor sem passar por offline.
+                continue
+            logging.warning(f"Supervisor indisponível ({self.id}): {error}")
+            self.aplicar_evento_supervisor('status', {"status": "offline", "message": "Supervisor desconectado."})
+            time.sleep(1)
+
+    # Hot-reload
+    def registrar_reload(self, raw):
+        """Guarda o resultado de um reload informado pelo bot. Chamada com self.lock."""
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return
+        data["files"] = [os.path.basename(path) for path in data.get("files", [])]
+        data["time"] = time.time()
+        self.reload_history.append(data)
+        self.publicar_evento('reload', data)
+
+    def recarregar_comandos(self, changed=(), deleted=()):
+        """Pede ao bot em execução que recarregue só os arquivos de comando informados.
+
+        Devolve o id do pedido (o resultado chega depois pelo evento 'reload'),
+        ou None se o bot não está rodando com o hook.
+        """
+        if not changed and not deleted:
+            return None
+        if SUPERVISOR_SOCKET:
+            return self.chamar_supervisor({"op": "reload", "files": list(changed), "deleted": list(deleted)}).get("id")
+
+        process = self.process
+        if not HOT_RELOAD or not self.running or process is None or process.stdin is None:
+            return None
+        with self.reload_lock:
+            self.reload_counter += 1
+            message = {
+                "id": self.reload_counter,
+                "files": [os.path.join(self.commands_path, name) for name in changed],
+                "deleted": [os.path.join(self.commands_path, name) for name in deleted],
+            }
+            try:
+                process.stdin.write((RELOAD_REQUEST_PREFIX + json.dumps(message) + '\n').encode('utf-8'))
+                process.stdin.flush()
+            except (OSError, ValueError):
+                return None
+            return self.reload_counter
+
+    # Controle do processo
+    def abrir_processo(self, node_executable):
+        """Inicia o Node do bot com os pipes que o painel usa."""
+        hot_reload = HOT_RELOAD and os.path.exists(RELOAD_HOOK_PATH)
+        command_to_run = [node_executable, self.file_name]
+        if hot_reload:
+            command_to_run[1:1] = ['--require', RELOAD_HOOK_PATH]
+        process = subprocess.Popen(
+            command_to_run,
+            stdin=subprocess.PIPE if hot_reload else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=self.path,
+            env={**os.environ, **self.env} if self.env else None
+        )
+        process.painel_started = time.monotonic()
+        # Cada processo é uma execução separada no histórico de logs.
+        process.painel_run = log_history.nova_execucao(self.id, process.pid) if LOG_HISTORY_ENABLED else None
+        resource_sampler.iniciar()
+        return process
+
+    def reiniciar_sem_queda(self, node_executable):
+        """Sobe um processo novo, espera ele ficar pronto e só então drena o antigo.
+
+        Se o novo não ficar pronto em RESTART_READY_TIMEOUT, ele é descartado e o
+        antigo continua atendendo.
+        """
+        old_process = self.process
+        old_was_online = self.online
+        requested = time.monotonic()
+
+        self.standby_ready.clear()
+        self.carregar_regras()
+        try:
+            new_process = self.abrir_processo(node_executable)
+        except Exception as e:
+            return {"success": False, "message": f"Falha ao iniciar o processo novo: {e}"}
+        with self.lock:
+            self.standby_process = new_process
+        leitor_de_pipes.acompanhar(self, new_process)
+        vigia_de_processos.acompanhar(self, new_process)
+
+        ready = self.standby_ready.wait(RESTART_READY_TIMEOUT) and new_process.poll() is None
+        ready_at = time.monotonic()
+
+        if not ready:
+            if new_process.poll() is None:
+                _encerrar_processo(new_process, RESTART_DRAIN_TIMEOUT)
+            with self.lock:
+                self.standby_process = None
+                self.last_restart = {"mode": "warm", "downtime_ms": 0.0, "ready_ms": None, "fallback": True, "time": time.time()}
+            return {"success": False, "restart": self.last_restart,
+                    "message": "O processo novo não ficou pronto; o antigo continua rodando."}
+
+        # Se o antigo caiu durante a espera, o processo novo já o substitui.
+        self.cancelar_reinicio()
+        with self.lock:
+            self.standby_process = None
+            self.process = new_process
+            self.running = True
+            self.online = True
+            self.status_message = f"{self.display_name} online"
+            self.notificar_status()
+
+        # O bot só ficou fora se o antigo já não estava online quando o restart começou.
+        downtime = 0.0 if old_was_online else ready_at - requested
+        drain_started = time.monotonic()
+        try:
+            _encerrar_processo(old_process, RESTART_DRAIN_TIMEOUT)
+        except Exception as e:
+            logging.error(f"Erro ao terminar processo antigo de {self.id}: {e}")
+
+        self.last_restart = {
+            "mode": "warm",
+            "downtime_ms": round(downtime * 1000, 1),
+            "ready_ms": round((ready_at - requested) * 1000, 1),
+            "drain_ms": round((time.monotonic() - drain_started) * 1000, 1),
+            "fallback": False,
+            "time": time.time(),
+        }
+        return {"success": True, "restart": self.last_restart,
+                "message": f"Reiniciado sem queda: processo novo pronto em {self.last_restart['ready_ms']:.0f} ms, "
+                           f"fora do ar por {self.last_restart['downtime_ms']:.0f} ms."}
+
+    def controlar(self, action, automatic=False):
+        """Executa start/stop/restart no processo local e devolve o resultado.
+
+        Um start ou stop pedido pelo usuário cancela o reinício automático
+        pendente; o start também tira o bot do crash loop.
+        """
+        with self.control_lock:
+            if action == 'start':
+                if self.running:
+                    return {"success": False, "message": "O processo do bot já está rodando."}
+                if not automatic:
+                    self.cancelar_reinicio(reset=True)
+
+                node_executable = shutil.which('node')
+                if not node_executable:
+                    return {"success": False, "message": "Node.js não encontrado no sistema."}
+
+                self.online = False
+                self.status_message = "Iniciando..."
+                self.carregar_regras()
+
+                try:
+                    self.process = self.abrir_processo(node_executable)
+
+                    self.running = True
+                    self.notificar_status()
+                    leitor_de_pipes.acompanhar(self, self.process)
+                    vigia_de_processos.acompanhar(self, self.process)
+                    return {"success": True, "message": "Comando de início enviado."}
+
+                except Exception as e:
+                    self.running = False
+                    self.status_message = "Falha ao iniciar."
+                    self.notificar_status()
+                    return {"success": False, "message": str(e)}
+
+            elif action == 'stop':
+                if self.cancelar_reinicio() and not self.running:
+                    self.status_message = "Desligado"
+                    self.notificar_status()
+                    return {"success": True, "message": "Reinício automático cancelado."}
+                if not self.running:
+                    return {"success": False, "message": "O bot não está rodando."}
+                try:
+                    _encerrar_processo(self.process, STOP_TIMEOUT)
+                except Exception as e:
+                    logging.error(f"Erro ao terminar processo de {self.id}: {e}")
+                    return {"success": False, "message": f"Não foi possível parar o processo: {e}"}
+
+                self.running = False
+                self.online = False
+                self.status_message = "Desligado"
+                self.notificar_status()
+                return {"success": True, "message": "Comando de parada enviado."}
+
+            elif action == 'restart':
+                node_executable = shutil.which('node')
+                if RESTART_MODE == 'warm' and self.running and node_executable:
+                    return self.reiniciar_sem_queda(node_executable)
+
+                began = time.monotonic()
+                stop_result = self.controlar('stop')
+                if stop_result.get("success"):
+                    time.sleep(1)
+                    # A queda é medida até o PAINEL_STATUS:BOT_ONLINE_READY do novo processo.
+                    self.restart_began = began
+                    return self.controlar('start')
+                return stop_result
+
+            return {"success": False, "message": "Ação inválida."}
+
+    def metricas(self, since=None, points=None):
+        """Série de recursos para /api/bot/metrics (e para o supervisor)."""
+        with self.lock:
+            latest = self.metrics.latest()
+            samples = self.metrics.series(since, points)
+        return {"supported": resource_sampler.supported and METRICS_ENABLED, "interval": METRICS_INTERVAL,
+                "latest": latest, "samples": samples}
+
+# --- Tokenizador de Arquivos de Comando ---
+_JS_IDENT = re.compile(r'[A-Za-z_$][\w$]*')
+_JS_NUMBER = re.compile(r'-?(?:0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)')
+_JS_SPACE = re.compile(r'\s+')
+_OPENERS = {'{': '}', '[': ']', '(': ')'}
+# Depois destes tokens uma barra começa uma regex (`/'/.test(m)`), não uma divisão.
+_REGEX_AFTER_PUNCT = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_AFTER_WORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                      'throw', 'case', 'do', 'else', 'yield', 'await'}
+
+def _fim_da_string(source, start):
+    """Devolve o índice logo após a aspa que fecha a string iniciada em start."""
+    quote, i, n = source[start], start + 1, len(source)
+    while i < n:
+        c = source[i]
+        if c == '\\':
+            i += 2
+        elif c == quote:
+            return i + 1
+        elif c == '\n':
+            break
+        else:
+            i += 1
+    raise ValueError(f"String não fechada na posição {start}.")
+
+def _fim_do_template(source, start):
+    """Devolve o índice logo após a crase que fecha o template iniciado em start.
+
+    Entende escapes e expressões ${...}, inclusive com chaves, strings e
+    templates aninhados, sem voltar atrás no texto.
+    """
+    n = len(source)
+    i = start + 1
+    stack = [None]  # None: texto do template; int: chaves abertas dentro de ${...}
+    while i < n:
+        c = source[i]
+        if stack[-1] is None:
+            if c == '\\':
+                i += 2
+                continue
+            if c == '`':
+                stack.pop()
+                i += 1
+                if not stack:
+                    return i
+                continue
+            if c == '$' and source.startswith('{', i + 1):
+                stack.append(0)
+                i += 2
+                continue
+            i += 1
+            continue
+
+        if c in '"\'':
+            i = _fim_da_string(source, i)
+            continue
+        if c == '`':
+            stack.append(None)
+        elif source.startswith('//', i):
+            i = source.find('\n', i)
+            i = n if i < 0 else i
+            continue
+        elif source.startswith('/*', i):
+            i = source.find('*/', i + 2)
+            i = n if i < 0 else i + 2
+            continue
+        elif c == '{':
+            stack[-1] += 1
+        elif c == '}':
+            if stack[-1] == 0:
+                stack.pop()
+            else:
+                stack[-1] -= 1
+        i += 1
+    raise ValueError(f"Template não fechado na posição {start}.")
+
+def _fim_da_regex(source, start):
+    """Devolve o índice logo após as flags da regex iniciada em start."""
+    i, n, in_class = start + 1, len(source), False
+    while i < n:
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '\n':
+            break
+        if c == '[':
+            in_class = True
+        elif c == ']':
+            in_class = False
+        elif c == '/' and not in_class:
+            flags = _JS_IDENT.match(source, i + 1)
+            return flags.end() if flags else i + 1
+        i += 1
+    raise ValueError(f"Regex não fechada na posição {start}.")
+
+def _comeca_regex(source, tokens):
+    if not tokens:
+        return True
+    kind, start, end = tokens[-1]
+    if kind == 'punct':
+        return source[start:end] in _REGEX_AFTER_PUNCT
+    return kind == 'ident' and source[start:end] in _REGEX_AFTER_WORDS
+
+def _tokenizar_js(source):
+    """Quebra o código JS em tokens (tipo, início, fim) numa única passada."""
+    tokens = []
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if c.isspace():
+            i = _JS_SPACE.match(source, i).end()
+        elif source.startswith('//', i):
+            i = source.find('\n', i)
+            i = n if i < 0 else i
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+        elif c in '"\'':
+            end = _fim_da_string(source, i)
+            tokens.append(('str', i, end))
+            i = end
+        elif c == '`':
+            end = _fim_do_template(source, i)
+            tokens.append(('tpl', i, end))
+            i = end
+        elif c == '/' and _comeca_regex(source, tokens):
+            end = _fim_da_regex(source, i)
+            tokens.append(('regex', i, end))
+            i = end
+        elif (number := _JS_NUMBER.match(source, i)) and (c != '-' or number.end() > i + 1):
+            tokens.append(('num', i, number.end()))
+            i = number.end()
+        elif ident := _JS_IDENT.match(source, i):
+            tokens.append(('ident', i, ident.end()))
+            i = ident.end()
+        else:
+            tokens.append(('punct', i, i + 1))
+            i += 1
+    return tokens
+
+def _decodificar_string(raw):
+    """Converte uma string JS entre aspas no valor Python equivalente."""
+    try:
+        return ast.literal_eval(raw)
+    except (ValueError, SyntaxError):
+        return raw[1:-1]
+
+class _LeitorComandos:
+    """Lê `module.exports = ({ ... })` (ou uma lista desses objetos) a partir
+    dos tokens, guardando para cada campo o valor e a posição no texto."""
+
+    def __init__(self, source):
+        self.source = source
+        self.tokens = _tokenizar_js(source)
+        self.pos = 0
+
+    def _texto(self, token):
+        return self.source[token[1]:token[2]]
+
+    def _atual(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else ('eof', len(self.source), len(self.source))
+
+    def _eh(self, value):
+        token = self._atual()
+        return token[0] == 'punct' and self._texto(token) == value
+
+    def _pular_balanceado(self):
+        """Pula um valor qualquer até a vírgula ou o fechamento do nível atual."""
+        depth = 0
+        while self.pos < len(self.tokens):
+            token = self._atual()
+            text = self._texto(token) if token[0] == 'punct' else None
+            if text in _OPENERS:
+                depth += 1
+            elif text in (')', ']', '}'):
+                if depth == 0:
+                    return
+                depth -= 1
+            elif text == ',' and depth == 0:
+                return
+            self.pos += 1
+
+    def _valor(self):
+        """Lê um valor; se ele continua numa expressão (`60 * 60`, `"a" + b`),
+        o trecho inteiro fica cru, para não ser reescrito pela metade."""
+        value = self._termo()
+        token = self._atual()
+        if token[0] == 'eof' or (token[0] == 'punct' and self._texto(token) in (',', ';', ')', ']', '}')):
+            return value
+        self._pular_balanceado()
+        start, end = value["start"], self.tokens[self.pos - 1][2]
+        return {"kind": "raw", "value": self.source[start:end], "start": start, "end": end}
+
+    def _termo(self):
+        token = self._atual()
+        kind, start, end = token
+        text = self._texto(token)
+
+        if kind == 'str':
+            self.pos += 1
+            return {"kind": "string", "value": _decodificar_string(text), "start": start, "end": end}
+        if kind == 'tpl':
+            self.pos += 1
+            return {"kind": "template", "value": text[1:-1], "start": start, "end": end}
+        if kind == 'num':
+            self.pos += 1
+            try:
+                value = int(text, 0)
+            except ValueError:
+                value = float(text)
+            return {"kind": "number", "value": value, "start": start, "end": end}
+        if kind == 'ident' and text in ('true', 'false', 'null'):
+            self.pos += 1
+            return {"kind": "literal", "value": {'true': True, 'false': False, 'null': None}[text], "start": start, "end": end}
+        if self._eh('['):
+            return self._lista()
+        if self._eh('{'):
+            return self._objeto()
+
+        begin = self.pos
+        self._pular_balanceado()
+        if self.pos == begin:
+            raise ValueError(f"Valor inesperado na posição {start}.")
+        end = self.tokens[self.pos - 1][2]
+        return {"kind": "raw", "value": self.source[start:end], "start": start, "end": end}
+
+    def _lista(self):
+        start = self._atual()[1]
+        self.pos += 1
+        items = []
+        while not self._eh(']'):
+            if self._atual()[0] == 'eof':
+                raise ValueError("Lista não fechada.")
+            if self._eh(','):
+                self.pos += 1
+                continue
+            items.append(self._valor())
+        end = self._atual()[2]
+        self.pos += 1
+        return {"kind": "array", "value": [item["value"] for item in items], "items": items, "start": start, "end": end}
+
+    def _objeto(self):
+        start = self._atual()[1]
+        self.pos += 1
+        fields = {}
+        while not self._eh('}'):
+            token = self._atual()
+            if token[0] == 'eof':
+                raise ValueError("Objeto não fechado.")
+            if self._eh(','):
+                self.pos += 1
+                continue
+            if token[0] == 'str':
+                key = _decodificar_string(self._texto(token))
+            else:
+                key = self._texto(token)
+            self.pos += 1
+            if self._eh(':'):
+                self.pos += 1
+                fields[key] = self._valor()
+            else:
+                # Atalhos como `run() {...}` ou `{ name, code }`: guardados crus.
+                self._pular_balanceado()
+                end = self.tokens[self.pos - 1][2]
+                fields[key] = {"kind": "raw", "value": self.source[token[1]:end], "start": token[1], "end": end}
+        end = self._atual()[2]
+        self.pos += 1
+        return {"kind": "object", "value": {k: f["value"] for k, f in fields.items()},
+                "fields": fields, "start": start, "end": end}
+
+    def ler(self):
+        tokens, source = self.tokens, self.source
+        for index in range(len(tokens) - 3):
+            if (self._texto(tokens[index]) == 'module' and self._texto(tokens[index + 1]) == '.'
+                    and self._texto(tokens[index + 2]) == 'exports' and self._texto(tokens[index + 3]) == '='):
+                self.pos = index + 4
+                break
+        else:
+            return []
+
+        while self._eh('('):
+            self.pos += 1
+        exported = self._termo()
+        if exported["kind"] == 'object':
+            return [exported]
+        if exported["kind"] == 'array':
+            return [item for item in exported["items"] if item["kind"] == 'object']
+        return []
+
+def ler_arquivo_comando(source):
+    """Devolve o modelo de todos os comandos exportados por um arquivo.
+
+    Cada comando é o objeto lido, com "value" (campos simples) e "fields"
+    (valor e posição de cada campo no texto original).
+    """
+    return _LeitorComandos(source).ler()
+
+def _escapar_template(text):
+    """Escapa crases soltas e uma barra invertida solta no fim, para o texto
+    não fechar o template antes da hora nem escapar a crase de fechamento."""
+    out, backslashes = [], 0
+    for c in text:
+        if c == '`' and backslashes % 2 == 0:
+            out.append('\\')
+        backslashes = backslashes + 1 if c == '\\' else 0
+        out.append(c)
+    if backslashes % 2:
+        out.append('\\')
+    return ''.join(out)
+
+def _serializar_js(value, template=False):
+    if template:
+        return '`' + _escapar_template(value) + '`'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if value is None:
+        return 'null'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, list):
+        return '[' + ', '.join(_serializar_js(item) for item in value) + ']'
+    return json.dumps(str(value), ensure_ascii=False)
+
+def atualizar_arquivo_comando(source, command, changes):
+    """Aplica changes (campo -> novo valor) ao comando e devolve o texto novo.
+
+    Só os trechos dos campos alterados são reescritos; comentários, ordem,
+    formatação e os outros comandos do arquivo ficam exatamente como estavam.
+    """
+    edits = []
+    fields = command["fields"]
+    for key, value in changes.items():
+        field = fields.get(key)
+        if field is not None:
+            if field["value"] == value and field["kind"] != 'raw':
+                continue
+            is_template = field["kind"] == 'template' or (key == 'code' and isinstance(value, str))
+            edits.append((field["start"], field["end"], _serializar_js(value, template=is_template)))
+        else:
+            js_key = key if _JS_IDENT.fullmatch(key) else json.dumps(key)
+            text = f"{js_key}: {_serializar_js(value, template=(key == 'code'))}"
+            if fields:
+                last_end = max(f["end"] for f in fields.values())
+                edits.append((last_end, last_end, f",\n  {text}"))
+            else:
+                edits.append((command["end"] - 1, command["end"] - 1, f"\n  {text}\n"))
+
+    for start, end, text in sorted(edits, reverse=True):
+        source = source[:start] + text + source[end:]
+    return source
+
+# --- Índice de Comandos em Memória ---
+class CommandIndex:
+    """Índice dos arquivos de commands/ mantido em memória.
+
+    Cada entrada guarda nome, tamanho, mtime, código extraído e hash do
+    conteúdo. Um arquivo só é relido quando o mtime ou o tamanho dele muda, e
+    a pasta só é varrida de novo quando o mtime dela muda (arquivo criado,
+    apagado ou renomeado).
+    """
+
+    # mtimes mais novos que isso não são confiáveis em sistemas de arquivos
+    # com resolução grosseira (FAT/sdcard no Android), então a pasta é varrida.
+    MTIME_SLACK_NS = 2_000_000_000
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = {}
+        self._dir_mtime = None
+        self._lock = threading.Lock()
+
+    def _carregar(self, filename, stat):
+        with open(os.path.join(self.path, filename), 'rb') as f:
+            data = f.read()
+        try:
+            commands = ler_arquivo_comando(data.decode('utf-8', errors='replace'))
+        except ValueError:
+            commands = []
+        first = commands[0]["value"] if commands else {}
+        entry = {
+            "file": filename,
+            "name": first.get("name") if isinstance(first.get("name"), str) else "",
+            "code": first.get("code") if isinstance(first.get("code"), str) else "",
+            "commands": [command["value"] for command in commands],
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": hashlib.sha1(data).hexdigest(),
+        }
+        self._entries[filename] = entry
+        return entry
+
+    def _varrer(self):
+        dir_mtime = os.stat(self.path).st_mtime_ns
+        if dir_mtime == self._dir_mtime and time.time_ns() - dir_mtime > self.MTIME_SLACK_NS:
+            return
+
+        seen = set()
+        with os.scandir(self.path) as entries:
+            for dir_entry in entries:
+                if not dir_entry.name.endswith('.js') or not dir_entry.is_file():
+                    continue
+                seen.add(dir_entry.name)
+                stat = dir_entry.stat()
+                cached = self._entries.get(dir_entry.name)
+                if cached is None or cached["mtime"] != stat.st_mtime_ns or cached["size"] != stat.st_size:
+                    self._carregar(dir_entry.name, stat)
+        for filename in self._entries.keys() - seen:
+            del self._entries[filename]
+        self._dir_mtime = dir_mtime
+
+    def listar(self):
+        """Devolve as entradas de todos os comandos, ordenadas pelo arquivo."""
+        with self._lock:
+            self._varrer()
+            return [self._entries[f] for f in sorted(self._entries)]
+
+    def obter(self, filename):
+        """Devolve a entrada de um comando, relendo só se o arquivo mudou."""
+        stat = os.stat(os.path.join(self.path, filename))
+        with self._lock:
+            cached = self._entries.get(filename)
+            if cached is not None and cached["mtime"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                return cached
+            return self._carregar(filename, stat)
+
+    def invalidar(self, filename):
+        """Esquece um arquivo alterado pelo próprio painel."""
+        with self._lock:
+            self._entries.pop(filename, None)
+            self._dir_mtime = None
+
+# --- Variáveis Globais (variables/defaults.js) ---
+_SIMPLE_KINDS = ('string', 'number', 'literal')
+
+def _tipo_do_valor(value):
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    return "string"
+
+def ler_variaveis(source):
+    """Lê `module.exports = { "chave": { type: "...", default: ... }, ... }`.
+
+    Devolve {chave: {"type", "default", "raw"}} na ordem do arquivo. Vírgulas,
+    chaves e aspas dentro dos valores são tratadas pelo tokenizador de JS.
+    Entradas fora desse formato (valor solto, default calculado, campos a mais)
+    guardam em "raw" o texto original, que é gravado de volta sem mudanças.
+    """
+    exported = _LeitorComandos(source).ler()
+    if not exported:
+        if 'module.exports' in source:
+            raise ValueError("module.exports não é um objeto.")
+        return {}
+    variables = {}
+    for key, node in exported[0]["fields"].items():
+        raw = source[node["start"]:node["end"]]
+        if node["kind"] != 'object':
+            default = node["value"] if node["kind"] in _SIMPLE_KINDS else raw
+            variables[key] = {"type": _tipo_do_valor(default), "default": default, "raw": raw}
+            continue
+        fields = node["fields"]
+        type_node, default_node = fields.get("type"), fields.get("default")
+        simple = (set(fields) <= {"type", "default"} and type_node is not None and type_node["kind"] == 'string'
+                  and (default_node is None or default_node["kind"] in _SIMPLE_KINDS))
+        if default_node is None:
+            default = None
+        elif default_node["kind"] in _SIMPLE_KINDS:
+            default = default_node["value"]
+        else:
+            default = source[default_node["start"]:default_node["end"]]
+        var_type = type_node["value"] if type_node is not None and type_node["kind"] == 'string' else _tipo_do_valor(default)
+        variables[key] = {"type": var_type, "default": default, "raw": None if simple else raw}
+    return variables
+
+def serializar_variaveis(variables):
+    """Gera o defaults.js inteiro a partir do modelo; é o único lugar que
+    escreve esse formato."""
+    lines = ["module.exports = {"]
+    for key, entry in variables.items():
+        if entry["raw"] is not None:
+            value = entry["raw"]
+        else:
+            value = f'{{ type: {json.dumps(entry["type"], ensure_ascii=False)}, default: {_serializar_js(entry["default"])} }}'
+        lines.append(f"  {json.dumps(key, ensure_ascii=False)}: {value},")
+    lines.append("};")
+    return '\n'.join(lines) + '\n'
+
+def _normalizar_variavel(value, var_type=None):
+    """Valida o default contra o tipo (deduzido do valor se não vier) e
+    devolve a entrada do modelo."""
+    if var_type is None:
+        var_type = _tipo_do_valor(value)
+    if not isinstance(var_type, str) or not var_type:
+        raise ValueError("Tipo inválido.")
+    if value is None:
+        pass
+    elif var_type == "number" and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        try:
+            text = str(value).strip()
+            value = float(text) if any(c in text for c in '.eE') else int(text, 0)
+        except ValueError:
+            raise ValueError(f"{value!r} não é um número.")
+    elif var_type == "boolean" and not isinstance(value, bool):
+        if value not in ("true", "false"):
+            raise ValueError(f"{value!r} não é true nem false.")
+        value = value == "true"
+    elif var_type == "string" and not isinstance(value, str):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{value!r} não é um texto.")
+        value = str(value)
+    if value is not None and not isinstance(value, (str, int, float, bool)):
+        raise ValueError("O default precisa ser texto, número, booleano ou null.")
+    if isinstance(value, float) and not math.isfinite(value):
+        # nan e inf não existem como literal em JS; o defaults.js não carregaria.
+        raise ValueError(f"{value!r} não é um número finito.")
+    return {"type": var_type, "default": value, "raw": None}
+
+class VariablesModel:
+    """Modelo em memória do defaults.js de um bot.
+
+    O arquivo só é relido e interpretado quando o mtime ou o tamanho muda (ou,
+    com mtime recente demais para confiar, quando o hash muda). Alterações de
+    uma variável mexem no modelo e regravam o arquivo com serializar_variaveis(),
+    sem o cliente precisar mandar as outras.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._variables = {}
+        self._stamp = None     # (mtime_ns, tamanho) da última leitura/gravação
+        self._hash = None
+        self._orders = {}      # ordem -> chaves ordenadas, refeitas só quando o modelo muda
+        self._lock = threading.Lock()
+
+    def _atualizar(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._variables, self._stamp, self._hash, self._orders = {}, None, None, {}
+            return
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp and time.time_ns() - stat.st_mtime_ns > CommandIndex.MTIME_SLACK_NS:
+            return
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()
+        if digest != self._hash:
+            self._variables = ler_variaveis(data.decode('utf-8', errors='replace'))
+            self._orders = {}
+            self._hash = digest
+        self._stamp = stamp
+
+    def _gravar(self, variables):
+        data = serializar_variaveis(variables).encode('utf-8')
+        file_writer.write(self.path, data)
+        stat = os.stat(self.path)
+        self._variables = variables
+        self._orders = {}
+        self._stamp = (stat.st_mtime_ns, stat.st_size)
+        self._hash = hashlib.sha1(data).hexdigest()
+
+    def listar(self):
+        """Devolve {chave: {"type", "default"}} na ordem do arquivo."""
+        with self._lock:
+            self._atualizar()
+            return {key: {"type": e["type"], "default": e["default"]} for key, e in self._variables.items()}
+
+    def _ordem(self, sort):
+        keys = self._orders.get(sort)
+        if keys is None:
+            if sort.lstrip('-') == 'name':
+                keys = sorted(self._variables, key=lambda k: (k.casefold(), k))
+            else:
+                keys = list(self._variables)
+            if sort.startswith('-'):
+                keys.reverse()
+            self._orders[sort] = keys
+        return keys
+
+    def pagina(self, offset=0, limit=100, q='', match='contains', sort='file'):
+        """Uma página da lista, filtrada pelo nome (prefixo ou trecho, sem
+        diferenciar maiúsculas) e ordenada. O custo sem filtro é o da página,
+        não o do arquivo inteiro."""
+        with self._lock:
+            self._atualizar()
+            keys = self._ordem(sort)
+            if q:
+                q = q.casefold()
+                if match == 'prefix':
+                    keys = [k for k in keys if k.casefold().startswith(q)]
+                else:
+                    keys = [k for k in keys if q in k.casefold()]
+            items = [{"name": k, "type": self._variables[k]["type"], "default": self._variables[k]["default"]}
+                     for k in keys[offset:offset + limit]]
+            return {"items": items, "total": len(keys), "all": len(self._variables), "offset": offset, "limit": limit}
+
+    @staticmethod
+    def _aplicar(variables, key, changes):
+        """Aplica changes a uma variável de variables (alterado no lugar) e
+        devolve (chave final, entrada)."""
+        current = variables.get(key)
+        new_key = changes.get("name", key)
+        if not isinstance(new_key, str) or not new_key.strip():
+            raise ValueError("Nome de variável inválido.")
+        new_key = new_key.strip()
+        if new_key != key and new_key in variables:
+            raise KeyError(new_key)
+        if "default" in changes:
+            value = changes["default"]
+        elif current is not None:
+            value = current["default"]
+        else:
+            raise ValueError("Informe o default da variável nova.")
+        if current is not None and current["raw"] is not None and set(changes) <= {"name"}:
+            entry = current
+        else:
+            # O tipo guardado vale até o cliente mandar outro.
+            var_type = changes.get("type", current["type"] if current is not None else None)
+            entry = _normalizar_variavel(value, var_type)
+
+        if new_key == key or current is None:
+            variables[new_key] = entry
+        else:
+            # Renomear mantendo a posição no arquivo.
+            items = list(variables.items())
+            variables.clear()
+            for k, e in items:
+                variables[new_key if k == key else k] = entry if k == key else e
+        return new_key, entry
+
+    def alterar_varias(self, changes, deleted=()):
+        """Aplica várias alterações ({chave: changes}) e remoções numa só
+        gravação; se alguma for inválida, nada é gravado."""
+        with self._lock:
+            self._atualizar()
+            variables = dict(self._variables)
+            for key in deleted:
+                variables.pop(key, None)
+            results = {}
+            for key, change in changes.items():
+                try:
+                    new_key, entry = self._aplicar(variables, key, change)
+                except ValueError as e:
+                    raise ValueError(f"{key}: {e}")
+                results[new_key] = {"type": entry["type"], "default": entry["default"]}
+            self._gravar(variables)
+            return results
+
+    def alterar(self, key, changes):
+        """Cria ou altera uma variável. changes aceita "default", "type" e
+        "name" (renomear, mantendo a posição). Devolve (chave, entrada)."""
+        with self._lock:
+            self._atualizar()
+            variables = dict(self._variables)
+            new_key, entry = self._aplicar(variables, key, changes)
+            self._gravar(variables)
+            return new_key, {"type": entry["type"], "default": entry["default"]}
+
+    def apagar(self, key):
+        """Remove uma variável; devolve False se ela não existe."""
+        with self._lock:
+            self._atualizar()
+            if key not in self._variables:
+                return False
+            self._gravar({k: e for k, e in self._variables.items() if k != key})
+            return True
+
+    def substituir(self, values):
+        """Troca todas as variáveis de uma vez ({chave: default}), como o POST antigo."""
+        variables = {}
+        for key, value in values.items():
+            if isinstance(value, dict):
+                variables[str(key)] = _normalizar_variavel(value.get("default"), value.get("type"))
+            else:
+                variables[str(key)] = _normalizar_variavel(value)
+        with self._lock:
+            self._gravar(variables)
+        return len(variables)
+
+# --- Escrita Atômica de Arquivos ---
+class AtomicWriter:
+    """Camada única de escrita dos arquivos que o bot lê (comandos, variáveis,
+    status e .env).
+
+    Cada gravação vai para um arquivo temporário na mesma pasta, recebe fsync
+    e só então é renomeada por cima do original, então quem lê nunca vê um
+    arquivo pela metade. Sem outra gravação do mesmo arquivo em andamento, o
+    pedido é gravado na hora; os que chegam durante uma gravação são
+    agrupados e a seguinte grava só o conteúdo mais recente, respondendo a
+    todos eles.
+    """
+
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+        self.requested = 0
+        self.physical = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def write(self, path, content):
+        """Grava content (str ou bytes) em path e só retorna quando estiver no
+        disco; levanta OSError se a gravação falhar."""
+        path = os.path.abspath(path)
+        # Codifica antes de entrar na fila: um texto que não vira UTF-8 falha
+        # só para quem o mandou.
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        ticket = {"done": threading.Event(), "error": None}
+        with self._lock:
+            self.requested += 1
+            state = self._files.setdefault(path, {"content": None, "tickets": [], "writing": False})
+            state["content"] = data
+            state["tickets"].append(ticket)
+            leader = not state["writing"]
+            state["writing"] = True
+
+        if leader:
+            self._gravar_pendentes(path, state)
+        ticket["done"].wait()
+        if ticket["error"] is not None:
+            raise ticket["error"]
+
+    def _gravar_pendentes(self, path, state):
+        tickets = []
+        finished = False
+        try:
+            while True:
+                with self._lock:
+                    content, tickets = state["content"], state["tickets"]
+                    state["tickets"] = []
+                    if not tickets:
+                        state["writing"] = False
+                        del self._files[path]
+                        finished = True
+                        return
+
+                error = None
+                start = time.perf_counter()
+                try:
+                    self._gravar(path, content)
+                except Exception as e:
+                    error = e
+                elapsed = time.perf_counter() - start
+
+                with self._lock:
+                    self.physical += 1
+                    self.coalesced += len(tickets) - 1
+                    self.errors += error is not None
+                    self.total_latency += elapsed
+                    self.max_latency = max(self.max_latency, elapsed)
+                for ticket in tickets:
+                    ticket["error"] = error
+                    ticket["done"].set()
+                tickets = []
+        finally:
+            if not finished:
+                # Saída inesperada do líder: libera o arquivo e responde a quem
+                # ainda espera, senão as próximas gravações ficariam presas.
+                with self._lock:
+                    tickets += state["tickets"]
+                    state["tickets"] = []
+                    state["writing"] = False
+                    if self._files.get(path) is state:
+                        del self._files[path]
+                for ticket in tickets:
+                    ticket["error"] = RuntimeError(f"Gravação de {path} interrompida.")
+                    ticket["done"].set()
+
+    def _gravar(self, path, data):
+        directory = os.path.dirname(path)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+            except FileNotFoundError:
+                os.chmod(tmp_path, 0o644)
+
+            for attempt in range(5):
+                try:
+                    os.replace(tmp_path, path)
+                    break
+                except PermissionError:
+                    # No Windows o rename falha enquanto o bot está com o arquivo aberto.
+                    if attempt == 4:
+                        raise
+                    time.sleep(0.05)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        if hasattr(os, 'O_DIRECTORY'):
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requested": self.requested,
+                "physical": self.physical,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "avg_latency_ms": round(self.total_latency / self.physical * 1000, 3) if self.physical else 0.0,
+                "max_latency_ms": round(self.max_latency * 1000, 3),
+            }
+
+file_writer = AtomicWriter()
+
+# --- Registro de Bots ---
+_BOT_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+def _carregar_bots():
+    """Monta o registro com o bot principal e os bots de bots.json.
+
+    Entradas inválidas ou com id repetido são registradas no log e ignoradas.
+    """
+    registry = {DEFAULT_BOT_ID: BotInstance(DEFAULT_BOT_ID, BOT_PATH, BOT_FILE_NAME, BOT_DISPLAY_NAME)}
+    try:
+        with open(BOTS_CONFIG_PATH, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return registry
+    except (OSError, ValueError) as e:
+        logging.error(f"Não foi possível ler {BOTS_CONFIG_PATH}: {e}")
+        return registry
+    if not isinstance(entries, list):
+        logging.error(f"{BOTS_CONFIG_PATH} deve ser uma lista de bots.")
+        return registry
+
+    for entry in entries:
+        bot_id = entry.get('id') if isinstance(entry, dict) else None
+        env = entry.get('env', {}) if isinstance(entry, dict) else None
+        if not isinstance(bot_id, str) or not _BOT_ID.match(bot_id) or bot_id in registry or not isinstance(env, dict):
+            logging.error(f"Bot inválido ou repetido em {BOTS_CONFIG_PATH}: {entry!r}")
+            continue
+        registry[bot_id] = BotInstance(
+            bot_id,
+            os.path.join(BOT_PATH, entry.get('path', os.path.join('bots', bot_id))),
+            entry.get('file', BOT_FILE_NAME),
+            entry.get('name', bot_id),
+            {str(k): str(v) for k, v in env.items()},
+        )
+    return registry
+
+bots = _carregar_bots()
+bot_principal = bots[DEFAULT_BOT_ID]
+
+# --- Operações de Comandos (usadas pela rota individual e pelas em lote) ---
+def _arquivo_comando(name):
+    """Valida o nome vindo do cliente e devolve o nome do arquivo .js (ou None)."""
+    name = escape(name)
+    if not name or '..' in name or '/' in name or '\\' in name:
+        return None
+    return name if name.endswith('.js') else name + '.js'
+
+def _ler_comando(bot, filename, index=0):
+    try:
+        entry = bot.command_index.obter(filename)
+        if entry["commands"] and 0 <= index < len(entry["commands"]):
+            command = entry["commands"][index]
+            command_name = command.get("name") if isinstance(command.get("name"), str) else ""
+            bdfd_code = command.get("code") if isinstance(command.get("code"), str) else ""
+        else:
+            command_name, bdfd_code = entry["name"], entry["code"]
+        return {"code": bdfd_code, "name": command_name, "hash": entry["hash"],
+                "commands": entry["commands"]}, 200
+    except FileNotFoundError:
+        return {"success": False, "message": "Comando não encontrado."}, 404
+    except Exception as e:
+        return {"success": False, "message": f"Erro ao ler o arquivo: {str(e)}"}, 500
+
+def _salvar_comando(bot, filename, command_code, fields=None, index=0):
+    filepath = os.path.join(bot.commands_path, filename)
+    if not isinstance(command_code, str):
+        return {"success": False, "message": "O código deve ser um texto."}, 400
+    if fields is not None and not isinstance(fields, dict):
+        return {"success": False, "message": "fields deve ser um objeto {campo: valor}."}, 400
+    # Outros campos opcionais (aliases, type...) vindos do cliente.
+    changes = dict(fields or {})
+    changes['code'] = command_code
+
+    try:
+        # Leitura, edição e gravação sob o mesmo lock: duas edições simultâneas
+        # do arquivo não podem partir da mesma leitura.
+        with bot.commands_lock:
+            full_code = None
+            if os.path.exists(filepath):
+                # Arquivo existente: reescreve só os campos alterados. Se não dá para
+                # entender o arquivo, ele fica como está em vez de virar o modelo novo.
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    current = f.read()
+                if current.strip():
+                    try:
+                        commands = ler_arquivo_comando(current)
+                    except ValueError as e:
+                        return {"success": False, "message": f"Não foi possível ler {filename} ({e}); edite o arquivo à mão."}, 409
+                    if not commands:
+                        return {"success": False, "message": f"{filename} não exporta nenhum comando; edite o arquivo à mão."}, 409
+                    if not 0 <= index < len(commands):
+                        return {"success": False, "message": f"{filename} não tem o comando de índice {index}."}, 400
+                    full_code = atualizar_arquivo_comando(current, commands[index], changes)
+
+            if full_code is None:
+                command_name = os.path.splitext(os.path.basename(filename))[0]
+                full_code = f"""module.exports = ({{
+  name: "{command_name}",
+  code: `
+{_escapar_template(command_code)}
+  `
+}});"""
+                extra_fields = {k: v for k, v in changes.items() if k != 'code'}
+                if extra_fields:
+                    full_code = atualizar_arquivo_comando(full_code, ler_arquivo_comando(full_code)[0], extra_fields)
+
+            file_writer.write(filepath, full_code)
+            bot.command_index.invalidar(filename)
+        return {"success": True}, 200
+    except Exception as e:
+        return {"success": False, "message": str(e)}, 500
+
+def _apagar_comando(bot, filename):
+    try:
+        with bot.commands_lock:
+            os.remove(os.path.join(bot.commands_path, filename))
+            bot.command_index.invalidar(filename)
+        return {"success": True}, 200
+    except FileNotFoundError:
+        return {"success": False, "message": "Comando não encontrado."}, 404
+    except Exception as e:
+        return {"success": False, "message": str(e)}, 500
 
-        .variable-card input {
-            flex: 1;
-            margin: 0;
-            padding: 8px;
-            background-color: #2d2d2d;
-            border: 1px solid #555;
-            border-radius: 4px;
-            color: #d4d4d4;
-        }
+# --- Exportação/Importação de Comandos ---
+class _SaidaEmPedacos:
+    """Destino de escrita para tarfile/zipfile que só acumula os bytes
+    gerados até o gerador da resposta retirá-los e enviá-los."""
 
-        .variable-name {
-            min-width: 150px;
-        }
+    def __init__(self):
+        self._chunks = []
 
-        .variable-value {
-            flex: 2;
-        }
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
 
-        .remove-variable {
-            background-color: #d9534f;
-            color: white;
-            border: none;
-            padding: 8px 12px;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 16px;
-            width: 36px;
-            height: 36px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
+    def flush(self):
+        pass
 
-        .remove-variable:hover {
-            background-color: #c9302c;
-        }
+    def retirar(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
 
-        .code-editor {
-    font-family: "Consolas", "Monaco", "Courier New", monospace;
-    min-height: 300px;
-    border: 1px solid #555;
-    background-color: #1e1e1e;
-    color: #83ff83ce;
-    padding: 15px;
-    white-space: pre-wrap;
-    overflow-wrap: break-word;
-    border-radius: 6px;
-    line-height: 1.5;
-    caret-color: #b900b3;  /* Cursor roxo/lilás */
-}
+# Nomes aceitos na importação: o nome vira arquivo e aparece na lista do painel.
+_NOME_IMPORTAVEL = re.compile(r'[\w.-]+\.js')
 
-        .code-editor .token-flow {
-    color: #da70d6;  /* Lilás/Magenta puro */
-}
+def _nome_importado(member_name):
+    """Nome final de um arquivo do pacote importado, ou None se deve ser ignorado."""
+    parts = [p for p in member_name.replace('\\', '/').split('/') if p not in ('', '.')]
+    if parts[:1] == ['commands']:
+        parts = parts[1:]
+    if len(parts) != 1 or not parts[0].endswith('.js'):
+        return None
+    return parts[0]
 
-.code-editor .token-command {
-    color: #87ceeb;  /* Azul claro */
-}
+def _extrair_importacao(upload, staging):
+    """Extrai os .js do pacote (tar.gz ou zip) para staging e devolve os nomes
+    extraídos e os pulados por terem caracteres fora de letras, números, _ . -."""
+    magic = upload.read(4)
+    upload.seek(0)
+    filenames, skipped = [], []
 
-.code-editor .token-symbol {
-    color: #ffa500;  /* Laranja */
-}
+    def aceitar(filename):
+        if _NOME_IMPORTAVEL.fullmatch(filename) and '..' not in filename:
+            return True
+        skipped.append(filename)
+        return False
 
-.code-editor .token-link {
-    color: #1e90ff;
-    background-color: rgba(30, 144, 255, 0.2);
-    border-radius: 3px;
-    padding: 0 2px;
-}
+    def guardar(filename, source, size):
+        if size > IMPORT_MAX_FILE_BYTES:
+            raise ValueError(f"{filename} passa do limite de {IMPORT_MAX_FILE_BYTES} bytes.")
+        if len(filenames) >= IMPORT_MAX_FILES:
+            raise ValueError(f"O pacote passa do limite de {IMPORT_MAX_FILES} arquivos.")
+        with open(os.path.join(staging, filename), 'wb') as f:
+            shutil.copyfileobj(source, f)
+        filenames.append(filename)
 
-.code-editor .command-closed {
-    background-color: rgba(0, 0, 0, 0.3);
-    border-radius: 3px;
-    padding: 0 2px;
-    color: #ffa500;  /* LARANJA para os colchetes */
-}
+    if magic.startswith(b'PK'):
+        with zipfile.ZipFile(upload) as archive:
+            for info in archive.infolist():
+                filename = _nome_importado(info.filename)
+                if filename is None or info.is_dir() or not aceitar(filename):
+                    continue
+                with archive.open(info) as source:
+                    guardar(filename, source, info.file_size)
+    elif magic.startswith(b'\x1f\x8b'):
+        with tarfile.open(fileobj=upload, mode='r|gz') as archive:
+            for member in archive:
+                filename = _nome_importado(member.name)
+                if filename is None or not member.isfile() or not aceitar(filename):
+                    continue
+                guardar(filename, archive.extractfile(member), member.size)
+    else:
+        raise ValueError("Formato não reconhecido (use .tar.gz ou .zip).")
+    return filenames, skipped
 
-.code-editor .command-closed-content {
-    /* Gradiente roxo-rosa molhado */
-    background: linear-gradient(135deg, 
-        rgba(186, 85, 211, 0.4) 0%,
-        rgba(219, 112, 214, 0.3) 25%,
-        rgba(199, 21, 133, 0.35) 50%,
-        rgba(219, 112, 214, 0.3) 75%,
-        rgba(186, 85, 211, 0.4) 100%);
-    color: #da70d6;  /* Roxo/Magenta */
-    padding: 2px 4px;
-    border-radius: 20px;
-}
+def _aplicar_importacao(bot, staging, filenames):
+    """Move os arquivos extraídos para o commands/ do bot como uma única transação.
 
-.code-editor .command-open {
-    background-color: rgba(255, 0, 0, 0.3);
-    border-radius: 3px;
-    padding: 0 2px;
-    color: #ffa500;  /* LARANJA para os colchetes */
-}
+    Arquivos substituídos vão antes para um backup; se qualquer passo falhar,
+    os novos são removidos e os antigos voltam para o lugar.
+    """
+    backup = tempfile.mkdtemp(prefix='.painel-backup-', dir=os.path.dirname(bot.commands_path))
+    replaced, created = [], []
+    try:
+        for filename in filenames:
+            target = os.path.join(bot.commands_path, filename)
+            if os.path.exists(target):
+                os.replace(target, os.path.join(backup, filename))
+                replaced.append(filename)
+            else:
+                created.append(filename)
+            os.replace(os.path.join(staging, filename), target)
+    except OSError:
+        for filename in created:
+            target = os.path.join(bot.commands_path, filename)
+            if os.path.exists(target):
+                os.remove(target)
+        for filename in replaced:
+            os.replace(os.path.join(backup, filename), os.path.join(bot.commands_path, filename))
+        raise
+    finally:
+        shutil.rmtree(backup, ignore_errors=True)
+        for filename in filenames:
+            bot.command_index.invalidar(filename)
 
-.code-editor .command-open-content {
-    /* Gradiente roxo-rosa molhado */
-    background: linear-gradient(135deg, 
-        rgba(186, 85, 211, 0.4) 0%,
-        rgba(219, 112, 214, 0.3) 25%,
-        rgba(199, 21, 133, 0.35) 50%,
-        rgba(219, 112, 214, 0.3) 75%,
-        rgba(186, 85, 211, 0.4) 100%);
-    color: #da70d6;  /* Roxo/Magenta */
-    padding: 2px 4px;
-    border-radius: 20px;
-}
-    </style>
+# HTML Template completo e funcional
+HTML_TEMPLATE = '''<!DOCTYPE html>
+<html lang="pt-br">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Painel de Controle - Styllena Bot</title>
+    <link rel="stylesheet" href="{{ css_url }}">
 </head>
 <body>
     <div class="container">
-        <div class="header"><h1>Painel de Controle - Styllena Bot</h1></div>
+        <div class="header">
+            <h1>Painel de Controle - Styllena Bot</h1>
+            <select id="bot-select" class="bot-select" style="display: none;" onchange="selectBot(this.value)"></select>
+        </div>
         <div class="tabs">
             <button class="tab-button active" onclick="showTab('dashboard')">Principal</button>
             <button class="tab-button" onclick="showTab('comandos')">Comandos</button>
@@ -428,16 +3045,36 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                     <button onclick="controlBot('restart')">Reiniciar Bot</button>
                 </div>
             </div>
+            <div class="card">
+                <h3>Recursos do Processo</h3>
+                <div id="metrics" class="metrics">Aguardando amostras...</div>
+            </div>
             <div class="card">
                 <h3>Logs do Bot</h3>
                 <div id="bot-logs" class="log-container">Aguardando logs...</div>
             </div>
+            <div class="card">
+                <h3>Buscar no Histórico</h3>
+                <input type="text" id="log-search-query" placeholder="Ex: Missing Permissions" onkeydown="if (event.key === 'Enter') searchLogs()">
+                <select id="log-search-stream">
+                    <option value="">stdout e stderr</option>
+                    <option value="stdout">stdout</option>
+                    <option value="stderr">stderr</option>
+                </select>
+                <button onclick="searchLogs()">Buscar</button>
+                <div id="log-search-results" class="log-container" style="display: none;"></div>
+                <button id="log-search-more" style="display: none;" onclick="searchLogs(true)">Mais antigos</button>
+            </div>
         </div>
 
         <div id="comandos" class="tab-content">
             <div class="card">
                 <h3>Gerenciar Comandos</h3>
                 <button onclick="showNewCommandForm()">+ Novo Comando</button>
+                <button onclick="window.location = apiBase + 'commands/export?format=zip'">Exportar</button>
+                <button onclick="document.getElementById('import-file').click()">Importar</button>
+                <input type="file" id="import-file" accept=".zip,.tar.gz,.tgz" style="display: none;" onchange="importCommands(this)">
+                <div id="reload-status" class="reload-status"></div>
                 <ul id="command-list" class="file-list"></ul>
             </div>
             <div id="command-editor" class="card" style="display: none;">
@@ -455,8 +3092,25 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
         <div id="variaveis" class="tab-content">
             <div class="card">
                 <h3>Variáveis Globais</h3>
+                <div class="variables-toolbar">
+                    <input type="text" id="variables-search" placeholder="Buscar pelo nome..." oninput="searchVariables()">
+                    <select id="variables-match" onchange="loadVariables()">
+                        <option value="contains">Contém</option>
+                        <option value="prefix">Começa com</option>
+                    </select>
+                    <select id="variables-sort" onchange="loadVariables()">
+                        <option value="file">Ordem do arquivo</option>
+                        <option value="name">Nome (A-Z)</option>
+                        <option value="-name">Nome (Z-A)</option>
+                    </select>
+                    <span id="variables-count" class="variables-count"></span>
+                </div>
                 <button onclick="addVariableCard()">+ Nova Variável</button>
-                <div id="variables-list" class="variables-list"></div>
+                <div id="variables-new" class="variables-list"></div>
+                <div id="variables-list" class="variables-viewport" onscroll="renderVariables()">
+                    <div id="variables-spacer"></div>
+                    <div id="variables-rows" class="variables-rows"></div>
+                </div>
                 <button onclick="saveVariables()">Salvar Variáveis</button>
             </div>
         </div>
@@ -512,887 +3166,603 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
         </div>
     </div>
 
-    <script>
-        let currentEditingFile = null;
-        let currentEditingStatusIndex = -1;
+    <script src="{{ js_url }}"></script>
+</body>
+</html>'''
 
-        function showTab(tabName) {
-            // Esconder todas as abas
-            document.querySelectorAll('.tab-content').forEach(tab => {
-                tab.classList.remove('active');
-            });
-            
-            // Remover active de todos os botões
-            document.querySelectorAll('.tab-button').forEach(button => {
-                button.classList.remove('active');
-            });
-            
-            // Mostrar aba selecionada
-            document.getElementById(tabName).classList.add('active');
-            
-            // Ativar botão clicado
-            event.target.classList.add('active');
-            
-            // Carregar conteúdo específico da aba
-            if (tabName === 'comandos') {
-                loadCommands();
-                initializeCodeEditor();
-            } else if (tabName === 'variaveis') {
-                loadVariables();
-            } else if (tabName === 'status') {
-                loadStatus();
-            } else if (tabName === 'configuracoes') {
-                loadEnv();
-            }
-        }
-        
-        // Controle do Bot
-        async function controlBot(action) {
-            try {
-                const response = await fetch('/api/bot/' + action, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    }
-                });
-                const data = await response.json();
-                if (data.success) {
-                    alert('Ação executada com sucesso!');
-                } else {
-                    alert('Erro: ' + data.message);
-                }
-            } catch (error) {
-                alert('Erro: ' + error.message);
-            }
-        }
-        
-        // Atualizar status e logs
-        async function updateStatus() {
-            try {
-                const statusResponse = await fetch('/api/bot/status');
-                const statusData = await statusResponse.json();
-                
-                const indicator = document.getElementById('bot-status-indicator');
-                const text = document.getElementById('bot-status-text');
-                
-                indicator.className = 'status-indicator';
-                if (statusData.status === 'online') {
-                    indicator.classList.add('status-online');
-                } else if (statusData.status === 'starting') {
-                    indicator.classList.add('status-starting');
-                } else {
-                    indicator.classList.add('status-offline');
-                }
-                
-                text.textContent = statusData.message;
-                
-                // Atualizar logs
-                const logsResponse = await fetch('/api/logs');
-                const logsData = await logsResponse.json();
-                document.getElementById('bot-logs').textContent = logsData.logs.join('\\n');
-            } catch (error) {
-                console.error('Erro ao atualizar status:', error);
-            }
-        }
-        
-        // Comandos
-        async function loadCommands() {
-            try {
-                const response = await fetch('/api/commands');
-                const commands = await response.json();
-                const list = document.getElementById('command-list');
-                list.innerHTML = '';
-                
-                commands.forEach(cmd => {
-                    const li = document.createElement('li');
-                    li.innerHTML = `<span>${cmd}</span> <a onclick="editCommand('${cmd}')">Editar</a>`;
-                    list.appendChild(li);
-                });
-            } catch (error) {
-                console.error('Erro ao carregar comandos:', error);
-            }
-        }
-        
-        function showNewCommandForm() {
-            currentEditingFile = null;
-            document.getElementById('editor-title').textContent = 'Novo Comando';
-            document.getElementById('command-name').value = '';
-            
-            const editor = document.getElementById('command-code');
-            editor.textContent = '';
-            editor.innerHTML = '';
-            
-            document.getElementById('command-editor').style.display = 'block';
-            
-            setTimeout(() => {
-                applySyntaxHighlighting(editor);
-                editor.focus();
-            }, 100);
-        }
-        
-        async function editCommand(filename) {
-            try {
-                currentEditingFile = filename;
-                document.getElementById('editor-title').textContent = 'Editar ' + filename;
-                
-                const response = await fetch('/api/command/' + encodeURIComponent(filename));
-                const data = await response.json();
-                
-                document.getElementById('command-name').value = data.name || filename.replace('.js', '');
-                
-                const editor = document.getElementById('command-code');
-                editor.textContent = data.code || '';
-                
-                document.getElementById('command-editor').style.display = 'block';
-                
-                setTimeout(() => applySyntaxHighlighting(editor), 100);
-            } catch (error) {
-                alert('Erro ao carregar comando: ' + error.message);
-            }
-        }
-        
-        async function saveCommand() {
-            try {
-                const name = document.getElementById('command-name').value.trim();
-                const editor = document.getElementById('command-code');
-                const code = editor.textContent || editor.innerText;
-                
-                if (!name || !code) {
-                    alert('Preencha nome e código do comando');
-                    return;
-                }
-                
-                const filename = currentEditingFile || (name + '.js');
-                const response = await fetch('/api/command/' + encodeURIComponent(filename), {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({ code: code })
-                });
-                
-                const data = await response.json();
-                if (data.success) {
-                    alert('Comando salvo!');
-                    cancelEdit();
-                    loadCommands();
-                } else {
-                    alert('Erro: ' + data.message);
-                }
-            } catch (error) {
-                alert('Erro ao salvar: ' + error.message);
-            }
-        }
-        
-        async function deleteCommand() {
-            if (!currentEditingFile || !confirm('Apagar este comando?')) return;
-            
-            try {
-                const response = await fetch('/api/command/' + encodeURIComponent(currentEditingFile), {
-                    method: 'DELETE'
-                });
-                
-                const data = await response.json();
-                if (data.success) {
-                    alert('Comando apagado!');
-                    cancelEdit();
-                    loadCommands();
-                } else {
-                    alert('Erro: ' + data.message);
-                }
-            } catch (error) {
-                alert('Erro ao apagar: ' + error.message);
-            }
-        }
-        
-        function cancelEdit() {
-            document.getElementById('command-editor').style.display = 'none';
-            currentEditingFile = null;
-        }
-        
-        // Syntax Highlighting
-        function applySyntaxHighlighting(editor) {
-    // Salvar posição do cursor
-    const selection = window.getSelection();
-    let cursorOffset = 0;
-    
-    if (selection.rangeCount > 0 && editor.contains(selection.anchorNode)) {
-        const range = selection.getRangeAt(0).cloneRange();
-        range.selectNodeContents(editor);
-        range.setEnd(selection.getRangeAt(0).endContainer, selection.getRangeAt(0).endOffset);
-        cursorOffset = range.toString().length;
-    }
-    
-    const text = editor.textContent || '';
-    let html = text;
-    
-    // Escape HTML chars first
-    html = html
-        .replace(/&/g, '&amp;')
-        .replace(/</g, '&lt;')
-        .replace(/>/g, '&gt;')
-        .replace(/"/g, '&quot;');
-    
-    // ===== FASE 1: URLs =====
-    html = html.replace(/(https?:\/\/[^\s]+)/g, '<span class="token-link">$1</span>');
-    
-    // ===== FASE 2: Flow Commands =====
-    html = html.replace(/\$endif(?![a-zA-Z0-9_])/g, '<span class="token-flow">$endif</span>');
-    html = html.replace(/\$endfor(?![a-zA-Z0-9_])/g, '<span class="token-flow">$endfor</span>');
-    html = html.replace(/\$endwhile(?![a-zA-Z0-9_])/g, '<span class="token-flow">$endwhile</span>');
-    html = html.replace(/\$elseif(?![a-zA-Z0-9_])/g, '<span class="token-flow">$elseif</span>');
-    html = html.replace(/\$else(?![a-zA-Z0-9_])/g, '<span class="token-flow">$else</span>');
-    html = html.replace(/\$if(?![a-zA-Z0-9_])/g, '<span class="token-flow">$if</span>');
-    html = html.replace(/\$for(?![a-zA-Z0-9_])/g, '<span class="token-flow">$for</span>');
-    html = html.replace(/\$while(?![a-zA-Z0-9_])/g, '<span class="token-flow">$while</span>');
-    
-    // ===== FASE 3: Outros comandos $ =====
-    html = html.replace(/\$[a-zA-Z_][a-zA-Z0-9_]*/g, function(match) {
-        const flowCommands = ['$if', '$elseif', '$else', '$endif', '$for', '$endfor', '$while', '$endwhile'];
-        if (!flowCommands.includes(match) && !match.includes('span')) {
-            return '<span class="token-command">' + match + '</span>';
-        }
-        return match;
-    });
-    
-    // ===== FASE 4: Colchetes - SIMPLES E RÁPIDO =====
-    // Colchetes FECHADOS: [ com conteúdo até ] na mesma linha ou próxima
-    html = html.replace(/\[([^\[\]]*)\]/g, '<span class="command-closed">[<span class="command-closed-content">$1</span>]</span>');
-    
-    // Colchetes ABERTOS: [ no final de linha sem ]
-    html = html.replace(/\[([^\[\]]*?)$/gm, '<span class="command-open">[<span class="command-open-content">$1</span></span>');
-    
-    editor.innerHTML = html;
-    
-    // Restaurar posição do cursor
-    try {
-        const range = document.createRange();
-        let charCount = 0;
-        let nodeStack = [editor];
-        let node, foundStart = false;
-
-        while (!foundStart && (node = nodeStack.pop())) {
-            if (node.nodeType === Node.TEXT_NODE) {
-                const nextCharCount = charCount + node.length;
-                if (cursorOffset <= nextCharCount) {
-                    range.setStart(node, cursorOffset - charCount);
-                    foundStart = true;
-                }
-                charCount = nextCharCount;
-            } else {
-                let i = node.childNodes.length;
-                while (i--) {
-                    nodeStack.push(node.childNodes[i]);
-                }
-            }
-        }
+# --- ROTAS DA API ---
+
+# --- Instrumentação do Painel ---
+class RouteMetrics:
+    """Contagem, erros e histograma de latência de cada rota do painel.
+
+    Cada requisição custa uma busca binária nos limites dos buckets e alguns
+    incrementos sob um lock; o texto do Prometheus só é montado em /metrics.
+    Rotas de stream (/api/stream, exportação) contam até a resposta começar.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._routes = {}   # rota -> [contagem por status, contagem por bucket, soma, erros]
+
+    def registrar(self, route, status, seconds):
+        bucket = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = [{}, [0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][status] = entry[0].get(status, 0) + 1
+            entry[1][bucket] += 1
+            entry[2] += seconds
+            if status >= 500:
+                entry[3] += 1
+
+    def exportar(self):
+        """Linhas no formato de texto do Prometheus (histograma cumulativo)."""
+        with self._lock:
+            routes = {route: (dict(e[0]), list(e[1]), e[2], e[3]) for route, e in self._routes.items()}
+        out = [
+            "# HELP painel_http_requests_total Requisições atendidas, por rota e status.",
+            "# TYPE painel_http_requests_total counter",
+        ]
+        for route, (statuses, _, _, _) in sorted(routes.items()):
+            for status, count in sorted(statuses.items()):
+                out.append(f'painel_http_requests_total{{route="{route}",status="{status}"}} {count}')
+        out += [
+            "# HELP painel_http_request_errors_total Requisições que terminaram com status 5xx.",
+            "# TYPE painel_http_request_errors_total counter",
+        ]
+        for route, (_, _, _, errors) in sorted(routes.items()):
+            out.append(f'painel_http_request_errors_total{{route="{route}"}} {errors}')
+        out += [
+            "# HELP painel_http_request_duration_seconds Latência das requisições.",
+            "# TYPE painel_http_request_duration_seconds histogram",
+        ]
+        for route, (_, counts, total, _) in sorted(routes.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                out.append(f'painel_http_request_duration_seconds_bucket{{route="{route}",le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            out.append(f'painel_http_request_duration_seconds_bucket{{route="{route}",le="+Inf"}} {cumulative}')
+            out.append(f'painel_http_request_duration_seconds_sum{{route="{route}"}} {total:.6f}')
+            out.append(f'painel_http_request_duration_seconds_count{{route="{route}"}} {cumulative}')
+        return out
+
+route_metrics = RouteMetrics(LATENCY_BUCKETS)
+
+@app.before_request
+def _iniciar_medicao():
+    g.request_started = time.perf_counter()
+
+def _medir_requisicao(status):
+    started = g.pop('request_started', None)
+    if started is None or not PANEL_METRICS_ENABLED:
+        return
+    # O mesmo nome para /api/... e /api/bots/<id>/...: o blueprint sai do rótulo.
+    route = (request.endpoint or 'nao_encontrada').rpartition('.')[2]
+    route_metrics.registrar(route, status, time.perf_counter() - started)
+
+@app.after_request
+def _registrar_medicao(response):
+    _medir_requisicao(response.status_code)
+    return response
+
+@app.teardown_request
+def _registrar_falha(exc):
+    # Só chega aqui medida se a exceção escapou sem resposta (modo debug).
+    if exc is not None:
+        _medir_requisicao(500)
+
+def _metricas_internas():
+    """Contadores e medidores dos bots e das filas, para /metrics."""
+    def serie(name, kind, help_text, values):
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for labels, value in values:
+            label_text = ','.join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return lines
 
-        range.collapse(true);
-        selection.removeAllRanges();
-        selection.addRange(range);
-    } catch (e) {
-        editor.focus();
+    per_bot = list(bots.values())
+    history = log_history.stats()
+    writes = file_writer.stats()
+    out = []
+    out += serie("painel_log_lines_ingested_total", "counter", "Linhas de log recebidas de cada bot.",
+                 [({"bot": b.id}, b.lines_ingested) for b in per_bot])
+    out += serie("painel_log_lines_evicted_total", "counter", "Linhas descartadas do buffer em memória (limite atingido).",
+                 [({"bot": b.id}, b.logs.dropped) for b in per_bot])
+    out += serie("painel_log_buffer_bytes", "gauge", "Bytes ocupados pelas linhas no buffer em memória.",
+                 [({"bot": b.id}, b.logs.stats()["bytes"]) for b in per_bot])
+    out += serie("painel_log_files_lines_total", "counter", "Linhas gravadas nos segmentos em disco.",
+                 [({"bot": b.id}, b.files.written) for b in per_bot])
+    out += serie("painel_log_files_dropped_total", "counter", "Linhas que não couberam na fila dos segmentos.",
+                 [({"bot": b.id}, b.files.dropped) for b in per_bot])
+    out += serie("painel_log_history_inserted_total", "counter", "Linhas gravadas no logs.db.",
+                 [({}, history["inserted"])])
+    out += serie("painel_log_history_dropped_total", "counter", "Linhas que não couberam na fila do logs.db.",
+                 [({}, history["dropped"])])
+    out += serie("painel_log_history_pending", "gauge", "Itens na fila do logs.db.",
+                 [({}, history["pending"])])
+    out += serie("painel_sse_clients", "gauge", "Clientes conectados em /api/stream.",
+                 [({"bot": b.id}, len(b.subscribers)) for b in per_bot])
+    out += serie("painel_bot_up", "gauge", "1 se o processo do bot está rodando.",
+                 [({"bot": b.id}, int(b.running)) for b in per_bot])
+    out += serie("painel_bot_online", "gauge", "1 se o bot avisou que está pronto.",
+                 [({"bot": b.id}, int(b.running and b.online)) for b in per_bot])
+    out += serie("painel_bot_exits_unexpected_total", "counter", "Saídas do processo do bot que não vieram de um stop/restart.",
+                 [({"bot": b.id}, b.crashes) for b in per_bot])
+    out += serie("painel_bot_auto_restarts_total", "counter", "Reinícios automáticos depois de uma queda.",
+                 [({"bot": b.id}, b.auto_restarts) for b in per_bot])
+    out += serie("painel_bot_crash_loop", "gauge", "1 se o reinício automático está suspenso por quedas seguidas.",
+                 [({"bot": b.id}, int(b.crash_loop)) for b in per_bot])
+    samples = [(b, b.metrics.latest()) for b in per_bot]
+    out += serie("painel_bot_cpu_percent", "gauge", "CPU do bot e dos filhos na última amostra.",
+                 [({"bot": b.id}, latest["cpu"]) for b, latest in samples if latest])
+    out += serie("painel_bot_rss_bytes", "gauge", "Memória (RSS) do bot e dos filhos na última amostra.",
+                 [({"bot": b.id}, int(latest["rss"])) for b, latest in samples if latest])
+    out += serie("painel_file_writes_requested_total", "counter", "Escritas de arquivo pedidas ao AtomicWriter.",
+                 [({}, writes["requested"])])
+    out += serie("painel_file_writes_physical_total", "counter", "Escritas que chegaram ao disco.",
+                 [({}, writes["physical"])])
+    out += serie("painel_file_write_errors_total", "counter", "Escritas de arquivo que falharam.",
+                 [({}, writes["errors"])])
+    return out
+
+@app.route('/metrics')
+def prometheus_metrics():
+    lines = route_metrics.exportar() + _metricas_internas()
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+# --- Página Principal e Arquivos Estáticos Pré-compilados ---
+page_build = None
+page_lock = threading.Lock()
+
+def _variantes_comprimidas(body):
+    """Devolve o hash do conteúdo e as versões identity/gzip/br do corpo.
+
+    Cada codificação tem seu próprio ETag forte, derivado do conteúdo.
+    """
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    variants = {
+        'identity': (body, digest),
+        'gzip': (gzip.compress(body, compresslevel=9, mtime=0), f"{digest}-gz"),
     }
-}
+    if brotli is not None:
+        variants['br'] = (brotli.compress(body, quality=11), f"{digest}-br")
+    return digest, variants
 
-        let highlightTimeout;
-        function scheduleHighlight(editor) {
-            clearTimeout(highlightTimeout);
-            highlightTimeout = setTimeout(() => applySyntaxHighlighting(editor), 300);
-        }
+def _responder_variantes(variants, mimetype, cache_control):
+    encoding = request.accept_encodings.best_match([e for e in ('br', 'gzip') if e in variants]) or 'identity'
+    body, etag = variants[encoding]
 
-        function initializeCodeEditor() {
-            const editor = document.getElementById('command-code');
-            if (editor) {
-                editor.addEventListener('input', () => scheduleHighlight(editor));
-                editor.addEventListener('paste', (e) => {
-                    e.preventDefault();
-                    const text = e.clipboardData.getData('text/plain');
-                    document.execCommand('insertText', false, text);
-                    scheduleHighlight(editor);
-                });
-                
-                // Aplicar highlight inicial
-                applySyntaxHighlighting(editor);
-            }
-        }
-        
-        // Variáveis
-        async function loadVariables() {
-            try {
-                const response = await fetch('/api/variables');
-                const data = await response.json();
-                const variablesList = document.getElementById('variables-list');
-                variablesList.innerHTML = '';
-
-                if (data.content && typeof data.content === 'object') {
-                    const entries = Object.entries(data.content);
-                    if (entries.length > 0) {
-                        for (const [key, config] of entries) {
-                            addVariableCard(key, config.default);
-                        }
-                    }
-                }
-            } catch (error) {
-                console.error('Erro ao carregar variáveis:', error);
-            }
-        }
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype=mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
 
-        function addVariableCard(name = '', value = '') {
-            const variablesList = document.getElementById('variables-list');
-            const card = document.createElement('div');
-            card.className = 'variable-card';
-            card.innerHTML = `
-                <input type="text" class="variable-name" placeholder="Nome (ex: coins)" value="${name}">
-                <input type="text" class="variable-value" placeholder="Valor (ex: 100)" value="${value}">
-                <button class="remove-variable" onclick="this.parentElement.remove()">×</button>
-            `;
-            variablesList.appendChild(card);
-        }
+def _construir_pagina():
+    """Lê os assets de static/, nomeia cada um pelo hash do conteúdo e
+    renderiza o HTML (uma vez) apontando para esses nomes."""
+    assets, urls, mtimes = {}, {}, {}
+    for key, (filename, mimetype) in STATIC_ASSETS.items():
+        path = os.path.join(STATIC_PATH, filename)
+        mtimes[path] = os.stat(path).st_mtime_ns
+        with open(path, 'rb') as f:
+            digest, variants = _variantes_comprimidas(f.read())
+        base, ext = os.path.splitext(filename)
+        hashed_name = f"{base}.{digest[:12]}{ext}"
+        assets[hashed_name] = (mimetype, variants)
+        urls[key] = f"/static/{hashed_name}"
 
-        async function saveVariables() {
-            try {
-                const cards = document.querySelectorAll('.variable-card');
-                const variables = {};
-                
-                cards.forEach(card => {
-                    const name = card.querySelector('.variable-name').value.trim();
-                    const value = card.querySelector('.variable-value').value.trim();
-                    
-                    if (name) {
-                        if (!isNaN(value) && value !== '') {
-                            variables[name] = Number(value);
-                        } else {
-                            variables[name] = value;
-                        }
-                    }
-                });
-                
-                const response = await fetch('/api/variables', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({ content: variables })
-                });
-                
-                const data = await response.json();
-                if (data.success) {
-                    alert('Variáveis salvas!');
-                } else {
-                    alert('Erro: ' + data.message);
-                }
-            } catch (error) {
-                alert('Erro ao salvar: ' + error.message);
-            }
-        }
-        
-        // Status
-        async function loadStatus() {
-            try {
-                const response = await fetch('/api/status');
-                const data = await response.json();
-                const statusList = document.getElementById('status-list');
-                statusList.innerHTML = '';
-                
-                let statuses = [];
-                try {
-                    statuses = JSON.parse(data.content);
-                } catch (e) {
-                    statuses = [];
-                }
-                
-                statuses.forEach((status, index) => {
-                    const card = document.createElement('div');
-                    card.className = 'status-card';
-                    card.innerHTML = `
-                        <div class="status-header">
-                            <strong>${status.text}</strong>
-                            <div class="status-actions">
-                                <button onclick="editStatus(${index})">Editar</button>
-                                <button class="danger" onclick="deleteStatusConfirm(${index})">Excluir</button>
-                            </div>
-                        </div>
-                        <div>
-                            <span>${status.type}</span> | 
-                            <span>${status.status}</span>
-                            ${status.url ? '<br>URL: ' + status.url : ''}
-                        </div>
-                    `;
-                    statusList.appendChild(card);
-                });
-            } catch (error) {
-                console.error('Erro ao carregar status:', error);
-            }
-        }
-        
-        function showNewStatusForm() {
-            currentEditingStatusIndex = -1;
-            document.getElementById('status-editor-title').textContent = 'Novo Status';
-            document.getElementById('status-text').value = '';
-            document.getElementById('status-type').value = 'PLAYING';
-            document.getElementById('status-status').value = 'online';
-            document.getElementById('status-url').value = '';
-            document.getElementById('status-url-group').style.display = 'none';
-            document.getElementById('status-editor').style.display = 'block';
-        }
-        
-        async function editStatus(index) {
-            try {
-                currentEditingStatusIndex = index;
-                const response = await fetch('/api/status');
-                const data = await response.json();
-                
-                let statuses = [];
-                try {
-                    statuses = JSON.parse(data.content);
-                } catch (e) {
-                    statuses = [];
-                }
-                
-                const status = statuses[index];
-                document.getElementById('status-editor-title').textContent = 'Editar Status';
-                document.getElementById('status-text').value = status.text;
-                document.getElementById('status-type').value = status.type;
-                document.getElementById('status-status').value = status.status;
-                
-                if (status.type === 'STREAMING') {
-                    document.getElementById('status-url-group').style.display = 'block';
-                    document.getElementById('status-url').value = status.url || '';
-                } else {
-                    document.getElementById('status-url-group').style.display = 'none';
-                }
-                
-                document.getElementById('status-editor').style.display = 'block';
-            } catch (error) {
-                alert('Erro ao editar status: ' + error.message);
-            }
-        }
-        
-        async function saveStatus() {
-            try {
-                const text = document.getElementById('status-text').value.trim();
-                const type = document.getElementById('status-type').value;
-                const statusValue = document.getElementById('status-status').value;
-                const url = document.getElementById('status-url').value.trim();
-                
-                if (!text) {
-                    alert('Texto do status é obrigatório');
-                    return;
-                }
-                
-                if (type === 'STREAMING' && !url) {
-                    alert('URL é obrigatória para STREAMING');
-                    return;
-                }
-                
-                const statusObject = {
-                    text: text,
-                    type: type,
-                    status: statusValue
-                };
-                
-                if (type === 'STREAMING') {
-                    statusObject.url = url;
-                }
-                
-                // Carregar status existentes
-                const response = await fetch('/api/status');
-                const data = await response.json();
-                let statuses = [];
-                try {
-                    statuses = JSON.parse(data.content);
-                } catch (e) {
-                    statuses = [];
-                }
-                
-                // Adicionar ou atualizar
-                if (currentEditingStatusIndex === -1) {
-                    statuses.push(statusObject);
-                } else {
-                    statuses[currentEditingStatusIndex] = statusObject;
-                }
-                
-                // Salvar
-                const saveResponse = await fetch('/api/status', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({ content: JSON.stringify(statuses, null, 2) })
-                });
-                
-                const saveData = await saveResponse.json();
-                if (saveData.success) {
-                    alert('Status salvo!');
-                    cancelStatusEdit();
-                    loadStatus();
-                } else {
-                    alert('Erro: ' + saveData.message);
-                }
-            } catch (error) {
-                alert('Erro ao salvar status: ' + error.message);
-            }
-        }
-        
-        async function deleteStatusConfirm(index) {
-            if (confirm('Excluir este status?')) {
-                await deleteStatus(index);
-            }
-        }
-        
-        async function deleteStatus(index) {
-            try {
-                const response = await fetch('/api/status');
-                const data = await response.json();
-                let statuses = [];
-                try {
-                    statuses = JSON.parse(data.content);
-                } catch (e) {
-                    statuses = [];
-                }
-                
-                statuses.splice(index, 1);
-                
-                const saveResponse = await fetch('/api/status', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({ content: JSON.stringify(statuses, null, 2) })
-                });
-                
-                const saveData = await saveResponse.json();
-                if (saveData.success) {
-                    alert('Status excluído!');
-                    loadStatus();
-                } else {
-                    alert('Erro: ' + saveData.message);
-                }
-            } catch (error) {
-                alert('Erro ao excluir status: ' + error.message);
-            }
-        }
-        
-        function cancelStatusEdit() {
-            document.getElementById('status-editor').style.display = 'none';
-            currentEditingStatusIndex = -1;
-        }
-        
-        // Configurações .env
-        async function loadEnv() {
-            try {
-                const response = await fetch('/api/config');
-                const data = await response.json();
-                const form = document.getElementById('env-form');
-                form.innerHTML = '';
-                
-                for (const [key, value] of Object.entries(data.content)) {
-                    addEnvEntry(key, value, form);
-                }
-                
-                if (Object.keys(data.content).length === 0) {
-                    addEnvEntry('', '', form);
-                }
-            } catch (error) {
-                console.error('Erro ao carregar env:', error);
-            }
-        }
-        
-        function addEnvEntry(key = '', value = '', container = null) {
-            if (!container) container = document.getElementById('env-form');
-            
-            const entry = document.createElement('div');
-            entry.className = 'env-entry';
-            const isSensitive = /token|key|secret|password/i.test(key);
-            
-            entry.innerHTML = `
-                <label>Chave:</label>
-                <input type="text" class="env-key" value="${key}" placeholder="ex: TOKEN">
-                <label>Valor:</label>
-                <div class="env-input-wrapper">
-                    <input type="${isSensitive ? 'password' : 'text'}" class="env-value" value="${value}">
-                    <button type="button" class="env-toggle">👁</button>
-                </div>
-            `;
-            
-            container.appendChild(entry);
-            
-            // Toggle para mostrar/esconder senha
-            const toggle = entry.querySelector('.env-toggle');
-            const input = entry.querySelector('.env-value');
-            toggle.addEventListener('click', () => {
-                input.type = input.type === 'password' ? 'text' : 'password';
-            });
-        }
-        
-        async function saveEnv() {
-            try {
-                const entries = document.querySelectorAll('.env-entry');
-                const content = {};
-                
-                entries.forEach(entry => {
-                    const key = entry.querySelector('.env-key').value.trim();
-                    const value = entry.querySelector('.env-value').value;
-                    if (key) {
-                        content[key] = value;
-                    }
-                });
-                
-                const response = await fetch('/api/config', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({ content: content })
-                });
-                
-                const data = await response.json();
-                if (data.success) {
-                    alert('.env salvo!');
-                } else {
-                    alert('Erro: ' + data.message);
-                }
-            } catch (error) {
-                alert('Erro ao salvar: ' + error.message);
-            }
-        }
-        
-        // Configurar evento para mostrar/ocultar URL do streaming
-        document.getElementById('status-type').addEventListener('change', function() {
-            document.getElementById('status-url-group').style.display = 
-                this.value === 'STREAMING' ? 'block' : 'none';
-        });
-        
-        // Inicialização
-        setInterval(updateStatus, 2000);
-        updateStatus();
-    </script>
-</body>
-</html>'''
+    html = render_template_string(HTML_TEMPLATE, **urls).encode('utf-8')
+    return {"index": _variantes_comprimidas(html)[1], "assets": assets, "mtimes": mtimes}
 
-# --- ROTAS DA API ---
+def _pagina_atual():
+    """Devolve a build atual, refazendo-a se algum asset mudou no disco."""
+    global page_build
+    with page_lock:
+        if page_build is None or any(
+            os.stat(path).st_mtime_ns != mtime for path, mtime in page_build["mtimes"].items()
+        ):
+            page_build = _construir_pagina()
+        return page_build
 
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    return _responder_variantes(_pagina_atual()["index"], 'text/html', 'no-cache')
+
+@app.route('/static/<filename>')
+def static_asset(filename):
+    asset = _pagina_atual()["assets"].get(filename)
+    if asset is None:
+        return jsonify({"success": False, "message": "Arquivo não encontrado."}), 404
+    mimetype, variants = asset
+    return _responder_variantes(variants, mimetype, 'public, max-age=31536000, immutable')
+
+# --- API por Bot ---
+# As mesmas rotas respondem em /api/... (bot principal) e em /api/bots/<id>/...;
+# o bot da requisição fica em g.bot.
+api = Blueprint('api', __name__)
+
+@api.url_value_preprocessor
+def _escolher_bot(endpoint, values):
+    bot_id = values.pop('bot_id', DEFAULT_BOT_ID) if values else DEFAULT_BOT_ID
+    g.bot = bots.get(bot_id)
+
+@api.before_request
+def _exigir_bot():
+    if g.bot is None:
+        return jsonify({"success": False, "message": "Bot não encontrado."}), 404
+
+@app.route('/api/bots', methods=['GET'])
+def list_bots():
+    return jsonify([bot.resumo() for bot in bots.values()])
 
-@app.route('/api/bot/<action>', methods=['POST'])
+@api.route('/bot/<action>', methods=['POST'])
 def control_bot(action):
-    global bot_process, is_bot_process_running, is_bot_truly_online, bot_status_message
+    if SUPERVISOR_SOCKET:
+        timeout = SUPERVISOR_TIMEOUT + RESTART_READY_TIMEOUT + RESTART_DRAIN_TIMEOUT if action == 'restart' else SUPERVISOR_TIMEOUT
+        return jsonify(g.bot.chamar_supervisor({"op": action}, timeout))
+    return jsonify(g.bot.controlar(action))
 
-    if action == 'start':
-        if is_bot_process_running:
-            return jsonify({"success": False, "message": "O processo do bot já está rodando."})
-        
-        node_executable = shutil.which('node')
-        if not node_executable:
-            return jsonify({"success": False, "message": "Node.js não encontrado no sistema."})
-        
-        is_bot_truly_online = False
-        bot_status_message = "Iniciando..."
-        
+@api.route('/bot/status', methods=['GET'])
+def get_bot_status():
+    if SUPERVISOR_SOCKET:
+        result = g.bot.chamar_supervisor({"op": "status"})
+        if "status" in result:
+            return jsonify(result)
+    return jsonify({**g.bot.status_atual(), "last_restart": g.bot.last_restart, "supervision": g.bot.supervisao()})
+
+@api.route('/bot/metrics', methods=['GET'])
+def get_bot_metrics():
+    since = request.args.get('since', type=float)
+    points = max(1, min(request.args.get('points', 120, type=int), METRICS_MAX_POINTS))
+    if SUPERVISOR_SOCKET:
+        return jsonify(g.bot.chamar_supervisor({"op": "metrics", "since": since, "points": points}))
+    return jsonify(g.bot.metricas(since, points))
+
+@api.route('/bot/reloads', methods=['GET'])
+def get_bot_reloads():
+    with g.bot.lock:
+        return jsonify(list(g.bot.reload_history))
+
+@api.route('/logs')
+def get_logs():
+    since = request.args.get('since', type=int)
+    limit = min(request.args.get('limit', LOG_PAGE_LIMIT, type=int), LOG_PAGE_LIMIT)
+    bot_logs = g.bot.logs
+    with g.bot.lock:
+        if since is None or since > bot_logs.next_seq:
+            # Sem cursor (ou cursor de uma execução anterior do painel):
+            # manda as últimas linhas e o cliente substitui o que tinha.
+            return jsonify({
+                "logs": bot_logs.tail(100),
+                "next": bot_logs.next_seq,
+                "gap": False,
+                "reset": True,
+                "dropped": bot_logs.dropped,
+            })
+        lines, next_seq, gap = bot_logs.since(since, limit)
+        return jsonify({
+            "logs": lines,
+            "next": next_seq,
+            "gap": gap,
+            "reset": False,
+            "dropped": bot_logs.dropped,
+        })
+
+def _instante(value):
+    """Aceita segundos desde a época ou data ISO (2024-05-01T13:00:00)."""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+@api.route('/logs/search', methods=['GET'])
+def search_logs():
+    args = request.args
+    try:
+        since, until = _instante(args.get('since')), _instante(args.get('until'))
+    except ValueError:
+        return jsonify({"success": False, "message": "Data inválida (use segundos ou ISO 8601)."}), 400
+    stream = args.get('stream') or None
+    if stream not in (None, 'stdout', 'stderr'):
+        return jsonify({"success": False, "message": "Stream inválido (use stdout ou stderr)."}), 400
+    limit = max(1, min(args.get('limit', 100, type=int), LOG_SEARCH_LIMIT))
+
+    results = log_history.buscar(g.bot.id, args.get('q', '').strip() or None, since, until, stream,
+                                 args.get('run', type=int), args.get('before', type=int), limit)
+    # Próxima página: mesmos filtros com before=next_before.
+    next_before = results[-1]["id"] if len(results) == limit else None
+    return jsonify({"results": results, "next_before": next_before, "history": log_history.stats()})
+
+@api.route('/logs/runs', methods=['GET'])
+def list_log_runs():
+    return jsonify(log_history.execucoes(g.bot.id, request.args.get('limit', 50, type=int)))
+
+@api.route('/logs/files', methods=['GET'])
+def list_log_files():
+    files = []
+    log_files = g.bot.files
+    for name in log_files.segmentos():
+        path = os.path.join(log_files.directory, name)
         try:
-            command_to_run = [node_executable, BOT_FILE_NAME]
-            bot_process = subprocess.Popen(
-                command_to_run, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE, 
-                cwd=BOT_PATH
-            )
-            
-            is_bot_process_running = True
-            threading.Thread(target=stream_logs, args=(bot_process,), daemon=True).start()
-            return jsonify({"success": True, "message": "Comando de início enviado."})
-            
-        except Exception as e:
-            is_bot_process_running = False
-            bot_status_message = "Falha ao iniciar."
-            return jsonify({"success": False, "message": str(e)})
-            
-    elif action == 'stop':
-        if not is_bot_process_running:
-            return jsonify({"success": False, "message": "O bot não está rodando."})
+            info = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files.append({"name": name, "size": info.st_size, "mtime": info.st_mtime, "compressed": name.endswith('.gz')})
+    return jsonify({"files": files, "writer": log_files.stats()})
+
+@api.route('/logs/files/<name>', methods=['GET'])
+def download_log_file(name):
+    if name not in g.bot.files.segmentos():
+        return jsonify({"success": False, "message": "Arquivo de log não encontrado."}), 404
+    return send_from_directory(g.bot.files.directory, name, as_attachment=True)
+
+@api.route('/logs/rules', methods=['GET', 'POST'])
+def handle_log_rules():
+    rules = (request.get_json(silent=True) or {}).get('rules') if request.method == 'POST' else None
+    if SUPERVISOR_SOCKET:
+        payload = {"op": "rules"} if request.method == 'GET' else {"op": "rules", "rules": rules}
+        return jsonify(g.bot.chamar_supervisor(payload))
+
+    if request.method == 'GET':
+        with g.bot.lock:
+            return jsonify(g.bot.rules.stats())
+    payload, status = g.bot.salvar_regras(rules)
+    return jsonify(payload), status
+
+@api.route('/stream')
+def stream_events():
+    since = request.headers.get('Last-Event-ID', type=int)
+    if since is None:
+        since = request.args.get('since', type=int)
+
+    # O limite vale para o painel todo: cada stream ocupa uma thread do
+    # servidor, não importa de qual bot. Acima dele o cliente usa polling.
+    if sum(len(bot.subscribers) for bot in bots.values()) >= SSE_MAX_CLIENTS:
+        return jsonify({"success": False, "message": "Limite de streams atingido."}), 503
+
+    bot = g.bot
+    sub, status, backlog = bot.inscrever_assinante(since)
+
+    def generate():
         try:
-            bot_process.terminate()
-            bot_process.wait(timeout=5)
-        except Exception as e:
-            print(f"Erro ao terminar processo: {e}")
-        
-        is_bot_process_running = False
-        is_bot_truly_online = False
-        bot_status_message = "Desligado"
-        return jsonify({"success": True, "message": "Comando de parada enviado."})
-        
-    elif action == 'restart':
-        stop_result = control_bot('stop').get_json()
-        if stop_result.get("success"):
-            import time
-            time.sleep(1)
-            start_result = control_bot('start').get_json()
-            return start_result
-        return stop_result
-        
-    return jsonify({"success": False, "message": "Ação inválida."})
+            yield "retry: 3000\n\n"
+            yield _evento_sse('status', status)
+            yield _evento_sse('logs', backlog, event_id=backlog["next"])
+            for item in _eventos_do_assinante(sub):
+                if item is None:
+                    yield ": ping\n\n"
+                    continue
+                event, data = item
+                yield _evento_sse(event, data, event_id=data["next"] if event == 'logs' else None)
+        finally:
+            bot.cancelar_assinante(sub)
 
-@app.route('/api/bot/status', methods=['GET'])
-def get_bot_status():
-    global is_bot_process_running, is_bot_truly_online, bot_status_message
-    if is_bot_process_running and bot_process and bot_process.poll() is not None:
-        is_bot_process_running = False
-        is_bot_truly_online = False
-        bot_status_message = "Processo morreu inesperadamente."
-    status = "offline"
-    if is_bot_process_running:
-        status = "online" if is_bot_truly_online else "starting"
-    return jsonify({"status": status, "message": bot_status_message})
-
-@app.route('/api/logs')
-def get_logs():
-    global bot_logs
-    with log_lock:
-        return jsonify({"logs": bot_logs[-100:]})
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-@app.route('/api/commands', methods=['GET'])
+@api.route('/commands', methods=['GET'])
 def list_commands():
     try:
-        files = [f for f in os.listdir(COMMANDS_PATH) if f.endswith('.js')]
-        return jsonify(files)
+        entries = g.bot.command_index.listar()
+        if request.args.get('details'):
+            return jsonify([{k: v for k, v in entry.items() if k not in ("code", "commands")} for entry in entries])
+        return jsonify([entry["file"] for entry in entries])
     except FileNotFoundError:
         return jsonify({"error": "Pasta de comandos não encontrada."}), 404
 
-@app.route('/api/command/<name>', methods=['GET', 'POST', 'DELETE'])
+@api.route('/command/<name>', methods=['GET', 'POST', 'DELETE'])
 def handle_command(name):
-    name = escape(name)
-    if not name or '..' in name:
+    filename = _arquivo_comando(name)
+    if filename is None:
         return jsonify({"success": False, "message": "Nome de comando inválido."}), 400
     
-    filename = name if name.endswith('.js') else name + '.js'
-    filepath = os.path.join(COMMANDS_PATH, filename)
-    
     if request.method == 'GET':
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                full_content = f.read()
-
-            name_match = re.search(r'name:\s*"([^"]*)"', full_content)
-            command_name = name_match.group(1) if name_match else ""
-            
-            code_match = re.search(r'code:\s*`(.*?)`', full_content, re.DOTALL)
-            bdfd_code = code_match.group(1) if code_match else ""
-
-            return jsonify({"code": bdfd_code, "name": command_name})
-        except FileNotFoundError:
-            return jsonify({"success": False, "message": "Comando não encontrado."}), 404
-        except Exception as e:
-            return jsonify({"success": False, "message": f"Erro ao ler o arquivo: {str(e)}"}), 500
+        payload, status = _ler_comando(g.bot, filename, request.args.get('index', 0, type=int))
 
     elif request.method == 'POST':
         command_code = request.json.get('code')
         if command_code is None:
             return jsonify({"success": False, "message": "Código não fornecido."}), 400
-        
-        command_name = os.path.splitext(os.path.basename(filename))[0]
-        full_code = f"""module.exports = ({{
-  name: "{command_name}",
-  code: `
-{command_code}
-  `
-}});"""
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(full_code)
-            return jsonify({"success": True})
-        except Exception as e:
-            return jsonify({"success": False, "message": str(e)}), 500
+        index = request.json.get('index', 0)
+        if not isinstance(index, int):
+            return jsonify({"success": False, "message": "Índice de comando inválido."}), 400
+        payload, status = _salvar_comando(g.bot, filename, command_code, request.json.get('fields'), index)
+        if status < 400:
+            payload["reload_id"] = g.bot.recarregar_comandos(changed=[filename])
             
     elif request.method == 'DELETE':
-        try:
-            os.remove(filepath)
-            return jsonify({"success": True})
-        except FileNotFoundError:
-            return jsonify({"success": False, "message": "Comando não encontrado."}), 404
-        except Exception as e:
-            return jsonify({"success": False, "message": str(e)}), 500
+        payload, status = _apagar_comando(g.bot, filename)
+        if status < 400:
+            payload["reload_id"] = g.bot.recarregar_comandos(deleted=[filename])
+
+    return jsonify(payload), status
+
+@api.route('/commands/batch', methods=['POST'])
+def batch_commands():
+    operations = (request.get_json(silent=True) or {}).get('operations')
+    if not isinstance(operations, list):
+        return jsonify({"success": False, "message": "Envie {\"operations\": [...]}."}), 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return jsonify({"success": False, "message": f"Máximo de {BATCH_MAX_OPERATIONS} operações por requisição."}), 400
+
+    results = []
+    for operation in operations:
+        if not isinstance(operation, dict):
+            results.append({"success": False, "status": 400, "message": "Operação inválida."})
+            continue
+        kind = operation.get('op')
+        filename = _arquivo_comando(str(operation.get('name', '')))
+        index = operation.get('index', 0)
+        if filename is None or not isinstance(index, int):
+            payload, status = {"success": False, "message": "Nome de comando inválido."}, 400
+        elif kind == 'read':
+            payload, status = _ler_comando(g.bot, filename, index)
+        elif kind == 'write':
+            if operation.get('code') is None:
+                payload, status = {"success": False, "message": "Código não fornecido."}, 400
+            else:
+                payload, status = _salvar_comando(g.bot, filename, operation['code'], operation.get('fields'), index)
+        elif kind == 'delete':
+            payload, status = _apagar_comando(g.bot, filename)
+        else:
+            payload, status = {"success": False, "message": "Operação inválida."}, 400
+        results.append({"op": kind, "file": filename, "status": status, "success": status < 400, **payload})
+
+    changed = [r["file"] for r in results if r["success"] and r.get("op") == 'write']
+    deleted = [r["file"] for r in results if r["success"] and r.get("op") == 'delete']
+    return jsonify({"results": results, "reload_id": g.bot.recarregar_comandos(changed, deleted)})
+
+@api.route('/commands/export', methods=['GET'])
+def export_commands():
+    archive_format = request.args.get('format', 'tar.gz')
+    if archive_format not in ('tar.gz', 'zip'):
+        return jsonify({"success": False, "message": "Formato inválido (use tar.gz ou zip)."}), 400
+    commands_path = g.bot.commands_path
+    try:
+        filenames = [entry["file"] for entry in g.bot.command_index.listar()]
+    except FileNotFoundError:
+        return jsonify({"error": "Pasta de comandos não encontrada."}), 404
+
+    def generate():
+        # O pacote é montado arquivo por arquivo enquanto é enviado.
+        out = _SaidaEmPedacos()
+        if archive_format == 'zip':
+            archive = zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED)
+        else:
+            archive = tarfile.open(fileobj=out, mode='w|gz')
+        with archive:
+            for filename in filenames:
+                path = os.path.join(commands_path, filename)
+                try:
+                    if archive_format == 'zip':
+                        archive.write(path, arcname=filename)
+                    else:
+                        archive.add(path, arcname=filename, recursive=False)
+                except FileNotFoundError:
+                    continue
+                chunk = out.retirar()
+                if chunk:
+                    yield chunk
+        yield out.retirar()
+
+    download_name = f"commands-{time.strftime('%Y%m%d-%H%M%S')}.{archive_format}"
+    mimetype = 'application/zip' if archive_format == 'zip' else 'application/gzip'
+    return Response(generate(), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{download_name}"'})
+
+@api.route('/commands/import', methods=['POST'])
+def import_commands():
+    upload = request.files.get('file')
+    source = upload.stream if upload else request.stream
+    staging = tempfile.mkdtemp(prefix='.painel-import-', dir=os.path.dirname(g.bot.commands_path))
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+            shutil.copyfileobj(source, spool)
+            spool.seek(0)
+            try:
+                filenames, skipped = _extrair_importacao(spool, staging)
+            except (ValueError, tarfile.TarError, zipfile.BadZipFile, EOFError, OSError) as e:
+                return jsonify({"success": False, "message": f"Pacote inválido: {e}"}), 400
+
+        with g.bot.commands_lock:
+            _aplicar_importacao(g.bot, staging, filenames)
+        return jsonify({"success": True, "imported": len(filenames), "files": filenames, "skipped": skipped,
+                        "reload_id": g.bot.recarregar_comandos(changed=filenames)})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
 
-@app.route('/api/variables', methods=['GET', 'POST'])
+@app.route('/api/writes', methods=['GET'])
+def get_write_stats():
+    return jsonify(file_writer.stats())
+
+@api.route('/variables', methods=['GET', 'POST', 'PATCH'])
 def handle_variables():
     if request.method == 'GET':
         try:
-            with open(VARIABLES_PATH, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            variables_dict = {}
-            if "module.exports" in content:
-                try:
-                    start = content.find('{')
-                    end = content.rfind('}') + 1
-                    js_object_content = content[start:end]
-                    
-                    lines = js_object_content.split('\n')
-                    for line in lines:
-                        line = line.strip().rstrip(',')
-                        if ':' in line and '"' in line:
-                            key_match = re.search(r'"([^"]+)"', line)
-                            if key_match:
-                                key = key_match.group(1)
-                                
-                                type_match = re.search(r'type:\s*"([^"]+)"', line)
-                                default_match = re.search(r'default:\s*([^,}]+)', line)
-                                
-                                if type_match and default_match:
-                                    var_type = type_match.group(1)
-                                    default_value = default_match.group(1).strip()
-                                    
-                                    if var_type == "number":
-                                        try:
-                                            default_value = float(default_value) if '.' in default_value else int(default_value)
-                                        except ValueError:
-                                            default_value = 0
-                                    else:
-                                        default_value = default_value.strip('"\'')
-                                    
-                                    variables_dict[key] = {"type": var_type, "default": default_value}
-                except Exception as e:
-                    print(f"Erro ao parsear variáveis: {e}")
-                    variables_dict = {}
-            
-            return jsonify({"content": variables_dict})
+            # Com offset/limit/q/sort a resposta é paginada; sem eles, tudo de uma vez.
+            if request.args.keys() & {'offset', 'limit', 'q', 'sort'}:
+                sort = request.args.get('sort', 'file')
+                match = request.args.get('match', 'contains')
+                if sort not in VARIABLES_SORTS or match not in ('contains', 'prefix'):
+                    return jsonify({"error": "Parâmetro sort ou match inválido."}), 400
+                offset = max(0, request.args.get('offset', 0, type=int))
+                limit = max(1, min(request.args.get('limit', 100, type=int), VARIABLES_PAGE_LIMIT))
+                return jsonify(g.bot.variables.pagina(offset, limit, request.args.get('q', ''), match, sort))
+            return jsonify({"content": g.bot.variables.listar()})
+        except ValueError as e:
+            return jsonify({"error": f"Não foi possível ler {VARIABLES_FILE}: {e}"}), 500
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-            
+
     elif request.method == 'POST':
-        variables_dict = request.json.get('content')
-        if variables_dict is None:
+        variables_dict = (request.get_json(silent=True) or {}).get('content')
+        if not isinstance(variables_dict, dict):
             return jsonify({"success": False, "message": "Conteúdo não fornecido."}), 400
-        
         try:
-            js_content = "module.exports = {\n"
-            for key, value in variables_dict.items():
-                if isinstance(value, (int, float)):
-                    var_type = "number"
-                    default_value = value
-                else:
-                    var_type = "string" 
-                    default_value = f'"{value}"'
-                
-                js_content += f'  "{key}": {{ type: "{var_type}", default: {default_value} }},\n'
-            
-            js_content += "};"
-            
-            with open(VARIABLES_PATH, 'w', encoding='utf-8') as f:
-                f.write(js_content)
-                
-            return jsonify({"success": True})
+            count = g.bot.variables.substituir(variables_dict)
+            return jsonify({"success": True, "variables": count})
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        except Exception as e:
+            return jsonify({"success": False, "message": str(e)}), 500
+
+    elif request.method == 'PATCH':
+        # Várias alterações e remoções numa gravação só (o botão Salvar da aba).
+        data = request.get_json(silent=True) or {}
+        changes, deleted = data.get('changes', {}), data.get('deleted', [])
+        if (not isinstance(changes, dict) or not all(isinstance(c, dict) for c in changes.values())
+                or not isinstance(deleted, list)):
+            return jsonify({"success": False, "message": "Envie changes ({nome: {default, type, name}}) e deleted ([nomes])."}), 400
+        try:
+            return jsonify({"success": True, "variables": g.bot.variables.alterar_varias(changes, deleted)})
+        except KeyError as e:
+            return jsonify({"success": False, "message": f"Já existe uma variável chamada {e.args[0]}."}), 409
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
         except Exception as e:
             return jsonify({"success": False, "message": str(e)}), 500
 
-@app.route('/api/status', methods=['GET', 'POST'])
+@api.route('/variables/<path:key>', methods=['PATCH', 'DELETE'])
+def handle_variable(key):
+    """Cria, altera, renomeia ou apaga uma variável sem mandar as outras."""
+    try:
+        if request.method == 'DELETE':
+            if not g.bot.variables.apagar(key):
+                return jsonify({"success": False, "message": "Variável não encontrada."}), 404
+            return jsonify({"success": True})
+
+        changes = request.get_json(silent=True)
+        if not isinstance(changes, dict) or not changes.keys() & {"default", "type", "name"}:
+            return jsonify({"success": False, "message": "Informe default, type ou name."}), 400
+        name, variable = g.bot.variables.alterar(key, changes)
+        return jsonify({"success": True, "name": name, "variable": variable})
+    except KeyError as e:
+        return jsonify({"success": False, "message": f"Já existe uma variável chamada {e.args[0]}."}), 409
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+@api.route('/status', methods=['GET', 'POST'])
 def handle_status_config():
     if request.method == 'GET':
         try:
-            if os.path.exists(STATUS_CONFIG_PATH):
-                with open(STATUS_CONFIG_PATH, 'r', encoding='utf-8') as f:
+            if os.path.exists(g.bot.status_config_path):
+                with open(g.bot.status_config_path, 'r', encoding='utf-8') as f:
                     content = f.read()
                 return jsonify({"content": content})
             else:
@@ -1406,8 +3776,7 @@ def handle_status_config():
             return jsonify({"success": False, "message": "Conteúdo do status não fornecido."}), 400
         try:
             json.loads(raw_json_array)
-            with open(STATUS_CONFIG_PATH, 'w', encoding='utf-8') as f:
-                f.write(raw_json_array)
+            file_writer.write(g.bot.status_config_path, raw_json_array)
             return jsonify({"success": True})
         except json.JSONDecodeError:
             return jsonify({"success": False, "message": "O conteúdo fornecido não é um JSON array válido."}), 400
@@ -1424,11 +3793,11 @@ def parse_env(content):
                 env_dict[key.strip()] = value.strip()
     return env_dict
 
-@app.route('/api/config', methods=['GET', 'POST'])
+@api.route('/config', methods=['GET', 'POST'])
 def handle_config():
     if request.method == 'GET':
         try:
-            with open(ENV_PATH, 'r', encoding='utf-8') as f:
+            with open(g.bot.env_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             env_dict = parse_env(content)
             return jsonify({"content": env_dict})
@@ -1441,25 +3810,59 @@ def handle_config():
             return jsonify({"success": False, "message": "Conteúdo não fornecido."}), 400
         try:
             content_str = '\n'.join(f"{k}={v}" for k, v in content_dict.items() if k)
-            with open(ENV_PATH, 'w', encoding='utf-8') as f:
-                f.write(content_str)
+            file_writer.write(g.bot.env_path, content_str)
             return jsonify({"success": True})
         except Exception as e:
             return jsonify({"success": False, "message": str(e)}), 500
 
+app.register_blueprint(api, url_prefix='/api')
+app.register_blueprint(api, url_prefix='/api/bots/<bot_id>', name='bot_api')
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=f"Painel de controle do bot {BOT_DISPLAY_NAME}.")
+    parser.add_argument('--producao', action='store_true', default=PRODUCTION_MODE,
+                        help="Servidor WSGI multithread, sem debug e sem log DEBUG por requisição.")
+    parser.add_argument('--threads', type=int, default=PRODUCTION_THREADS,
+                        help="Threads do servidor no modo produção.")
+    parser.add_argument('--host', default=PANEL_HOST)
+    parser.add_argument('--porta', type=int, default=PANEL_PORT)
+    parser.add_argument('--supervisor', default=SUPERVISOR_SOCKET, metavar='SOCKET',
+                        help="Controla o bot através do supervisor.py escutando neste socket Unix.")
+    return parser.parse_args()
+
+def _servir_producao(host, port, threads):
+    """Roda o mesmo app num servidor WSGI de produção (waitress, se instalado)."""
+    global SSE_MAX_CLIENTS
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    # Cada stream SSE prende uma thread; metade delas fica livre para a API.
+    SSE_MAX_CLIENTS = min(SSE_MAX_CLIENTS, max(1, threads // 2))
+
+    try:
+        from waitress import serve
+    except ImportError:
+        print("waitress não instalado (pip install waitress); usando o servidor multithread do Werkzeug sem debug.")
+        app.run(host=host, port=port, debug=False, threaded=True, use_reloader=False)
+        return
+
+    print(f"Painel em modo produção: http://{host}:{port} ({threads} threads)")
+    # send_bytes=1 faz o waitress enviar cada evento SSE assim que é gerado.
+    serve(app, host=host, port=port, threads=threads, send_bytes=1)
+
 if __name__ == '__main__':
-    # Criar diretórios necessários
-    os.makedirs(COMMANDS_PATH, exist_ok=True)
-    os.makedirs(os.path.dirname(VARIABLES_PATH), exist_ok=True)
-    
-    # Garantir que o arquivo de status existe
-    if not os.path.exists(STATUS_CONFIG_PATH):
-        with open(STATUS_CONFIG_PATH, 'w', encoding='utf-8') as f:
-            f.write('[]')
-    
-    # Garantir que o arquivo de variáveis existe
-    if not os.path.exists(VARIABLES_PATH):
-        with open(VARIABLES_PATH, 'w', encoding='utf-8') as f:
-            f.write('module.exports = {};')
-    
-    app.run(debug=True, port=2000, use_reloader=False)
+    # Criar diretórios e arquivos necessários de cada bot
+    for bot in bots.values():
+        bot.preparar_pastas()
+
+    args = _parse_args()
+    if args.supervisor:
+        SUPERVISOR_SOCKET = args.supervisor
+        iniciar_espelho_supervisor()
+    else:
+        for bot in bots.values():
+            bot.restaurar_logs()
+    if args.producao:
+        _servir_producao(args.host, args.porta, args.threads)
+    else:
+        app.run(debug=True, host=args.host, port=args.porta, use_reloader=False)
@@ -0,0 +1,1104 @@
+let currentEditingFile = null;
+let currentEditingStatusIndex = -1;
+// Bot escolhido no topo: todas as chamadas da API passam por aqui
+let apiBase = '/api/';
+
+function showTab(tabName) {
+    // Esconder todas as abas
+    document.querySelectorAll('.tab-content').forEach(tab => {
+        tab.classList.remove('active');
+    });
+    
+    // Remover active de todos os botões
+    document.querySelectorAll('.tab-button').forEach(button => {
+        button.classList.remove('active');
+    });
+    
+    // Mostrar aba selecionada
+    document.getElementById(tabName).classList.add('active');
+    
+    // Ativar botão clicado
+    event.target.classList.add('active');
+    
+    // Carregar conteúdo específico da aba
+    if (tabName === 'comandos') {
+        loadCommands();
+        initializeCodeEditor();
+    } else if (tabName === 'variaveis') {
+        loadVariables();
+    } else if (tabName === 'status') {
+        loadStatus();
+    } else if (tabName === 'configuracoes') {
+        loadEnv();
+    }
+}
+
+// Controle do Bot
+async function controlBot(action) {
+    try {
+        const response = await fetch(apiBase + 'bot/' + action, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            }
+        });
+        const data = await response.json();
+        if (data.success) {
+            alert(data.restart ? data.message : 'Ação executada com sucesso!');
+        } else {
+            alert('Erro: ' + data.message);
+        }
+    } catch (error) {
+        alert('Erro: ' + error.message);
+    }
+}
+
+// Atualizar status e logs
+function renderStatus(statusData) {
+    const indicator = document.getElementById('bot-status-indicator');
+    const text = document.getElementById('bot-status-text');
+    
+    indicator.className = 'status-indicator';
+    if (statusData.status === 'online') {
+        indicator.classList.add('status-online');
+    } else if (statusData.status === 'starting') {
+        indicator.classList.add('status-starting');
+    } else {
+        indicator.classList.add('status-offline');
+    }
+    
+    text.textContent = statusData.message;
+}
+
+async function updateStatus() {
+    try {
+        const statusResponse = await fetch(apiBase + 'bot/status');
+        renderStatus(await statusResponse.json());
+        await updateLogs();
+    } catch (error) {
+        console.error('Erro ao atualizar status:', error);
+    }
+}
+
+// Recursos do processo: sparklines com a série de /api/bot/metrics
+const METRIC_CHARTS = [
+    { field: 'cpu', label: 'CPU', format: v => v.toFixed(1) + '%' },
+    { field: 'rss', label: 'Memória', format: v => formatBytes(v) },
+    { field: 'threads', label: 'Threads', format: v => String(v) },
+    { field: 'fds', label: 'Arquivos abertos', format: v => String(v) },
+    { field: 'read', label: 'Leitura', format: v => formatBytes(v) + '/s' },
+    { field: 'write', label: 'Escrita', format: v => formatBytes(v) + '/s' },
+];
+
+function formatBytes(value) {
+    const units = ['B', 'KB', 'MB', 'GB'];
+    let i = 0;
+    while (value >= 1024 && i < units.length - 1) {
+        value /= 1024;
+        i++;
+    }
+    return value.toFixed(i === 0 ? 0 : 1) + ' ' + units[i];
+}
+
+function sparklinePoints(values) {
+    if (values.length === 0) return '';
+    const max = Math.max(...values) || 1;
+    const step = values.length > 1 ? 100 / (values.length - 1) : 0;
+    return values.map((v, i) => (i * step).toFixed(2) + ',' + (30 - v / max * 28).toFixed(2)).join(' ');
+}
+
+function renderMetrics(data) {
+    const box = document.getElementById('metrics');
+    if (!data.supported) {
+        box.textContent = 'Métricas indisponíveis neste sistema (sem /proc).';
+        return;
+    }
+    if (!box.dataset.ready) {
+        box.textContent = '';
+        METRIC_CHARTS.forEach(chart => {
+            const row = document.createElement('div');
+            row.className = 'metric';
+            const label = document.createElement('span');
+            label.className = 'metric-label';
+            label.textContent = chart.label;
+            const svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
+            svg.setAttribute('class', 'sparkline');
+            svg.setAttribute('viewBox', '0 0 100 30');
+            svg.setAttribute('preserveAspectRatio', 'none');
+            const line = document.createElementNS('http://www.w3.org/2000/svg', 'polyline');
+            line.id = 'metric-' + chart.field;
+            svg.appendChild(line);
+            const value = document.createElement('span');
+            value.className = 'metric-value';
+            value.id = 'metric-' + chart.field + '-value';
+            row.append(label, svg, value);
+            box.appendChild(row);
+        });
+        box.dataset.ready = '1';
+    }
+    METRIC_CHARTS.forEach(chart => {
+        document.getElementById('metric-' + chart.field).setAttribute('points', sparklinePoints(data.samples[chart.field] || []));
+        document.getElementById('metric-' + chart.field + '-value').textContent =
+            data.latest ? chart.format(data.latest[chart.field]) : '-';
+    });
+}
+
+async function updateMetrics() {
+    // Só busca com a aba Principal visível.
+    if (document.hidden || !document.getElementById('dashboard').classList.contains('active')) return;
+    try {
+        const response = await fetch(apiBase + 'bot/metrics?points=120');
+        renderMetrics(await response.json());
+    } catch (error) {
+        console.error('Erro ao atualizar métricas:', error);
+    }
+}
+
+// Logs incrementais: só as linhas novas desde o último cursor
+const MAX_LOG_LINES_DOM = 1000;
+let logCursor = null;
+let logBatches = [];
+let logLineCount = 0;
+
+function appendLogLines(lines) {
+    if (lines.length === 0) return;
+    const container = document.getElementById('bot-logs');
+    const atBottom = container.scrollHeight - container.scrollTop - container.clientHeight < 5;
+    const node = document.createTextNode(lines.join('\n') + '\n');
+    container.appendChild(node);
+    logBatches.push({ node: node, count: lines.length });
+    logLineCount += lines.length;
+
+    while (logLineCount > MAX_LOG_LINES_DOM && logBatches.length > 1) {
+        const oldest = logBatches.shift();
+        oldest.node.remove();
+        logLineCount -= oldest.count;
+    }
+    if (atBottom) container.scrollTop = container.scrollHeight;
+}
+
+function resetLogs() {
+    document.getElementById('bot-logs').textContent = '';
+    logBatches = [];
+    logLineCount = 0;
+}
+
+async function updateLogs() {
+    const url = logCursor === null ? apiBase + 'logs' : apiBase + 'logs?since=' + logCursor;
+    const logsResponse = await fetch(url);
+    const logsData = await logsResponse.json();
+
+    if (logsData.reset) {
+        resetLogs();
+    } else if (logsData.gap) {
+        appendLogLines(['[... linhas antigas descartadas ...]']);
+    }
+    appendLogLines(logsData.logs);
+    logCursor = logsData.next;
+}
+
+// Busca no histórico de logs (mais novos primeiro, paginado por "before")
+let searchBefore = null;
+
+async function searchLogs(more = false) {
+    const params = new URLSearchParams({ limit: 100 });
+    const query = document.getElementById('log-search-query').value.trim();
+    const stream = document.getElementById('log-search-stream').value;
+    if (query) params.set('q', query);
+    if (stream) params.set('stream', stream);
+    if (more && searchBefore !== null) params.set('before', searchBefore);
+
+    try {
+        const response = await fetch(apiBase + 'logs/search?' + params);
+        const data = await response.json();
+        const box = document.getElementById('log-search-results');
+        box.style.display = 'block';
+        if (!more) box.textContent = data.results.length ? '' : 'Nada encontrado.';
+        const lines = data.results.map(r =>
+            `[${new Date(r.ts * 1000).toLocaleString()}] #${r.run} ${r.stream === 'stderr' ? 'STDERR: ' : ''}${r.text}`);
+        if (lines.length) box.appendChild(document.createTextNode(lines.join('\n') + '\n'));
+        searchBefore = data.next_before;
+        document.getElementById('log-search-more').style.display = searchBefore === null ? 'none' : 'inline-block';
+    } catch (error) {
+        alert('Erro na busca: ' + error.message);
+    }
+}
+
+// Comandos
+async function loadCommands() {
+    try {
+        const response = await fetch(apiBase + 'commands');
+        const commands = await response.json();
+        const list = document.getElementById('command-list');
+        list.innerHTML = '';
+        
+        commands.forEach(cmd => {
+            const li = document.createElement('li');
+            const name = document.createElement('span');
+            name.textContent = cmd;
+            const edit = document.createElement('a');
+            edit.textContent = 'Editar';
+            edit.addEventListener('click', () => editCommand(cmd));
+            li.append(name, ' ', edit);
+            list.appendChild(li);
+        });
+    } catch (error) {
+        console.error('Erro ao carregar comandos:', error);
+    }
+}
+
+function showNewCommandForm() {
+    currentEditingFile = null;
+    document.getElementById('editor-title').textContent = 'Novo Comando';
+    document.getElementById('command-name').value = '';
+    
+    const editor = document.getElementById('command-code');
+    editor.textContent = '';
+    editor.innerHTML = '';
+    
+    document.getElementById('command-editor').style.display = 'block';
+    
+    setTimeout(() => {
+        applySyntaxHighlighting(editor);
+        editor.focus();
+    }, 100);
+}
+
+async function editCommand(filename) {
+    try {
+        currentEditingFile = filename;
+        document.getElementById('editor-title').textContent = 'Editar ' + filename;
+        
+        const response = await fetch(apiBase + 'command/' + encodeURIComponent(filename));
+        const data = await response.json();
+        
+        document.getElementById('command-name').value = data.name || filename.replace('.js', '');
+        
+        const editor = document.getElementById('command-code');
+        editor.textContent = data.code || '';
+        
+        document.getElementById('command-editor').style.display = 'block';
+        
+        setTimeout(() => applySyntaxHighlighting(editor), 100);
+    } catch (error) {
+        alert('Erro ao carregar comando: ' + error.message);
+    }
+}
+
+async function saveCommand() {
+    try {
+        const name = document.getElementById('command-name').value.trim();
+        const editor = document.getElementById('command-code');
+        const code = editor.textContent || editor.innerText;
+        
+        if (!name || !code) {
+            alert('Preencha nome e código do comando');
+            return;
+        }
+        
+        const filename = currentEditingFile || (name + '.js');
+        const response = await fetch(apiBase + 'command/' + encodeURIComponent(filename), {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ code: code })
+        });
+        
+        const data = await response.json();
+        if (data.success) {
+            alert('Comando salvo!');
+            cancelEdit();
+            loadCommands();
+        } else {
+            alert('Erro: ' + data.message);
+        }
+    } catch (error) {
+        alert('Erro ao salvar: ' + error.message);
+    }
+}
+
+async function deleteCommand() {
+    if (!currentEditingFile || !confirm('Apagar este comando?')) return;
+    
+    try {
+        const response = await fetch(apiBase + 'command/' + encodeURIComponent(currentEditingFile), {
+            method: 'DELETE'
+        });
+        
+        const data = await response.json();
+        if (data.success) {
+            alert('Comando apagado!');
+            cancelEdit();
+            loadCommands();
+        } else {
+            alert('Erro: ' + data.message);
+        }
+    } catch (error) {
+        alert('Erro ao apagar: ' + error.message);
+    }
+}
+
+async function importCommands(input) {
+    const file = input.files[0];
+    if (!file) return;
+
+    const form = new FormData();
+    form.append('file', file);
+    try {
+        const response = await fetch(apiBase + 'commands/import', {
+            method: 'POST',
+            body: form
+        });
+
+        const data = await response.json();
+        if (data.success) {
+            let message = data.imported + ' comando(s) importado(s)!';
+            if (data.skipped && data.skipped.length) {
+                message += '\nIgnorados (nome inválido): ' + data.skipped.join(', ');
+            }
+            alert(message);
+            loadCommands();
+        } else {
+            alert('Erro: ' + data.message);
+        }
+    } catch (error) {
+        alert('Erro ao importar: ' + error.message);
+    }
+    input.value = '';
+}
+
+// Hot-reload: o bot informa pelo evento 'reload' quanto levou para recarregar
+function renderReload(data) {
+    const el = document.getElementById('reload-status');
+    const files = data.files.join(', ') || 'nenhum arquivo';
+    if (data.errors && data.errors.length) {
+        el.className = 'reload-status error';
+        el.textContent = 'Falha ao recarregar ' + files + ': ' + data.errors.map(e => e.error).join('; ');
+    } else {
+        el.className = 'reload-status';
+        el.textContent = 'Recarregado no bot: ' + files + ' em ' + data.ms.toFixed(1) + ' ms';
+    }
+}
+
+function cancelEdit() {
+    document.getElementById('command-editor').style.display = 'none';
+    currentEditingFile = null;
+}
+
+// Syntax Highlighting
+function applySyntaxHighlighting(editor) {
+// Salvar posição do cursor
+const selection = window.getSelection();
+let cursorOffset = 0;
+
+if (selection.rangeCount > 0 && editor.contains(selection.anchorNode)) {
+const range = selection.getRangeAt(0).cloneRange();
+range.selectNodeContents(editor);
+range.setEnd(selection.getRangeAt(0).endContainer, selection.getRangeAt(0).endOffset);
+cursorOffset = range.toString().length;
+}
+
+const text = editor.textContent || '';
+let html = text;
+
+// Escape HTML chars first
+html = html
+.replace(/&/g, '&amp;')
+.replace(/</g, '&lt;')
+.replace(/>/g, '&gt;')
+.replace(/"/g, '&quot;');
+
+// ===== FASE 1: URLs =====
+html = html.replace(/(https?:\/\/[^\s]+)/g, '<span class="token-link">$1</span>');
+
+// ===== FASE 2: Flow Commands =====
+html = html.replace(/\$endif(?![a-zA-Z0-9_])/g, '<span class="token-flow">$endif</span>');
+html = html.replace(/\$endfor(?![a-zA-Z0-9_])/g, '<span class="token-flow">$endfor</span>');
+html = html.replace(/\$endwhile(?![a-zA-Z0-9_])/g, '<span class="token-flow">$endwhile</span>');
+html = html.replace(/\$elseif(?![a-zA-Z0-9_])/g, '<span class="token-flow">$elseif</span>');
+html = html.replace(/\$else(?![a-zA-Z0-9_])/g, '<span class="token-flow">$else</span>');
+html = html.replace(/\$if(?![a-zA-Z0-9_])/g, '<span class="token-flow">$if</span>');
+html = html.replace(/\$for(?![a-zA-Z0-9_])/g, '<span class="token-flow">$for</span>');
+html = html.replace(/\$while(?![a-zA-Z0-9_])/g, '<span class="token-flow">$while</span>');
+
+// ===== FASE 3: Outros comandos $ =====
+html = html.replace(/\$[a-zA-Z_][a-zA-Z0-9_]*/g, function(match) {
+const flowCommands = ['$if', '$elseif', '$else', '$endif', '$for', '$endfor', '$while', '$endwhile'];
+if (!flowCommands.includes(match) && !match.includes('span')) {
+    return '<span class="token-command">' + match + '</span>';
+}
+return match;
+});
+
+// ===== FASE 4: Colchetes - SIMPLES E RÁPIDO =====
+// Colchetes FECHADOS: [ com conteúdo até ] na mesma linha ou próxima
+html = html.replace(/\[([^\[\]]*)\]/g, '<span class="command-closed">[<span class="command-closed-content">$1</span>]</span>');
+
+// Colchetes ABERTOS: [ no final de linha sem ]
+html = html.replace(/\[([^\[\]]*?)$/gm, '<span class="command-open">[<span class="command-open-content">$1</span></span>');
+
+editor.innerHTML = html;
+
+// Restaurar posição do cursor
+try {
+const range = document.createRange();
+let charCount = 0;
+let nodeStack = [editor];
+let node, foundStart = false;
+
+while (!foundStart && (node = nodeStack.pop())) {
+    if (node.nodeType === Node.TEXT_NODE) {
+        const nextCharCount = charCount + node.length;
+        if (cursorOffset <= nextCharCount) {
+            range.setStart(node, cursorOffset - charCount);
+            foundStart = true;
+        }
+        charCount = nextCharCount;
+    } else {
+        let i = node.childNodes.length;
+        while (i--) {
+            nodeStack.push(node.childNodes[i]);
+        }
+    }
+}
+
+range.collapse(true);
+selection.removeAllRanges();
+selection.addRange(range);
+} catch (e) {
+editor.focus();
+}
+}
+
+let highlightTimeout;
+function scheduleHighlight(editor) {
+    clearTimeout(highlightTimeout);
+    highlightTimeout = setTimeout(() => applySyntaxHighlighting(editor), 300);
+}
+
+function initializeCodeEditor() {
+    const editor = document.getElementById('command-code');
+    if (editor) {
+        editor.addEventListener('input', () => scheduleHighlight(editor));
+        editor.addEventListener('paste', (e) => {
+            e.preventDefault();
+            const text = e.clipboardData.getData('text/plain');
+            document.execCommand('insertText', false, text);
+            scheduleHighlight(editor);
+        });
+        
+        // Aplicar highlight inicial
+        applySyntaxHighlighting(editor);
+    }
+}
+
+// Variáveis
+// A lista só tem no DOM as linhas visíveis; as páginas vêm do servidor
+// conforme a rolagem, então abrir a aba custa o mesmo com 10 ou 10000 variáveis.
+const VARIABLE_ROW_HEIGHT = 56;     // px; igual à altura do .variable-card + espaço
+const VARIABLES_PAGE_SIZE = 200;
+const VARIABLES_OVERSCAN = 10;      // linhas extras acima e abaixo da área visível
+
+let variablesQuery = 0;             // muda a cada busca; respostas antigas são ignoradas
+let variablesTotal = 0;
+let variablePages = new Map();      // página -> itens, ou a Promise enquanto carrega
+let variableEdits = new Map();      // nome original -> {name, value, type, original}
+let variableDeletes = new Set();
+let variablesSearchTimer = null;
+
+async function loadVariables() {
+    // Recarregar descarta o que não foi salvo, como antes.
+    variableEdits.clear();
+    variableDeletes.clear();
+    document.getElementById('variables-new').innerHTML = '';
+    await refreshVariables();
+}
+
+async function refreshVariables() {
+    variablesQuery++;
+    variablePages = new Map();
+    variablesTotal = 0;
+    document.getElementById('variables-list').scrollTop = 0;
+    renderVariables();
+    await fetchVariablePage(0);
+}
+
+function searchVariables() {
+    clearTimeout(variablesSearchTimer);
+    variablesSearchTimer = setTimeout(refreshVariables, 250);
+}
+
+function fetchVariablePage(page) {
+    if (variablePages.has(page)) return variablePages.get(page);
+    const query = variablesQuery;
+    const params = new URLSearchParams({
+        offset: page * VARIABLES_PAGE_SIZE,
+        limit: VARIABLES_PAGE_SIZE,
+        q: document.getElementById('variables-search').value.trim(),
+        match: document.getElementById('variables-match').value,
+        sort: document.getElementById('variables-sort').value
+    });
+    const request = fetch(apiBase + 'variables?' + params)
+        .then(response => response.json())
+        .then(data => {
+            if (query !== variablesQuery) return;
+            if (data.error) throw new Error(data.error);
+            variablePages.set(page, data.items);
+            variablesTotal = data.total;
+            document.getElementById('variables-count').textContent = data.total === data.all
+                ? `${data.all} variáveis`
+                : `${data.total} de ${data.all} variáveis`;
+            renderVariables();
+        })
+        .catch(error => {
+            if (query === variablesQuery) variablePages.delete(page);
+            console.error('Erro ao carregar variáveis:', error);
+        });
+    variablePages.set(page, request);
+    return request;
+}
+
+function renderVariables() {
+    const list = document.getElementById('variables-list');
+    const rows = document.getElementById('variables-rows');
+    document.getElementById('variables-spacer').style.height = (variablesTotal * VARIABLE_ROW_HEIGHT) + 'px';
+
+    const first = Math.max(0, Math.floor(list.scrollTop / VARIABLE_ROW_HEIGHT) - VARIABLES_OVERSCAN);
+    const last = Math.min(variablesTotal, Math.ceil((list.scrollTop + list.clientHeight) / VARIABLE_ROW_HEIGHT) + VARIABLES_OVERSCAN);
+    rows.style.transform = `translateY(${first * VARIABLE_ROW_HEIGHT}px)`;
+
+    // As linhas são reaproveitadas: só o conteúdo muda durante a rolagem.
+    while (rows.children.length < last - first) rows.appendChild(createVariableRow());
+    while (rows.children.length > Math.max(0, last - first)) rows.lastChild.remove();
+
+    for (let i = first; i < last; i++) {
+        const page = Math.floor(i / VARIABLES_PAGE_SIZE);
+        const items = variablePages.get(page);
+        if (Array.isArray(items)) {
+            fillVariableRow(rows.children[i - first], items[i - page * VARIABLES_PAGE_SIZE]);
+        } else {
+            fillVariableRow(rows.children[i - first], null);
+            fetchVariablePage(page);
+        }
+    }
+}
+
+function createVariableRow(isNew = false) {
+    const row = document.createElement('div');
+    row.className = 'variable-card';
+    const name = document.createElement('input');
+    name.type = 'text';
+    name.className = 'variable-name';
+    name.placeholder = 'Nome (ex: coins)';
+    const value = document.createElement('input');
+    value.type = 'text';
+    value.className = 'variable-value';
+    value.placeholder = 'Valor (ex: 100)';
+    const remove = document.createElement('button');
+    remove.className = 'remove-variable';
+    remove.textContent = '×';
+    row.append(name, value, remove);
+
+    if (isNew) {
+        remove.onclick = () => row.remove();
+    } else {
+        name.oninput = value.oninput = () => recordVariableEdit(row);
+        remove.onclick = () => toggleVariableDelete(row);
+    }
+    return row;
+}
+
+function setInputValue(input, text) {
+    // Não mexe no campo se nada mudou, para não pular o cursor de quem digita.
+    if (input.value !== text) input.value = text;
+}
+
+function fillVariableRow(row, item) {
+    const [name, value, remove] = row.children;
+    const loading = item === null || item === undefined;
+    name.disabled = value.disabled = remove.disabled = loading;
+    row.classList.toggle('loading', loading);
+    if (loading) {
+        row.dataset.name = '';
+        setInputValue(name, '');
+        setInputValue(value, '');
+        return;
+    }
+    const edit = variableEdits.get(item.name);
+    row.dataset.name = item.name;
+    row.dataset.type = item.type;
+    row.dataset.value = String(item.default ?? '');
+    setInputValue(name, edit ? edit.name : item.name);
+    setInputValue(value, edit ? edit.value : row.dataset.value);
+    row.classList.toggle('dirty', edit !== undefined);
+    row.classList.toggle('deleted', variableDeletes.has(item.name));
+}
+
+function recordVariableEdit(row) {
+    const original = row.dataset.name;
+    if (!original) return;
+    const [name, value] = row.children;
+    variableEdits.set(original, { name: name.value, value: value.value, type: row.dataset.type, original: row.dataset.value });
+    row.classList.add('dirty');
+}
+
+function toggleVariableDelete(row) {
+    const name = row.dataset.name;
+    if (!name) return;
+    if (variableDeletes.has(name)) {
+        variableDeletes.delete(name);
+    } else {
+        variableDeletes.add(name);
+    }
+    row.classList.toggle('deleted', variableDeletes.has(name));
+}
+
+function addVariableCard(name = '', value = '') {
+    const row = createVariableRow(true);
+    row.children[0].value = name;
+    row.children[1].value = value;
+    const newList = document.getElementById('variables-new');
+    newList.insertBefore(row, newList.firstChild);
+    row.children[0].focus();
+}
+
+function variableValue(text, type) {
+    const value = text.trim();
+    if (type === 'string') return value;
+    if (type === 'boolean' && (value === 'true' || value === 'false')) return value === 'true';
+    if (!isNaN(value) && value !== '') return Number(value);
+    return value;
+}
+
+async function saveVariables() {
+    // Só vai para o servidor o que mudou, numa única gravação do arquivo. Um
+    // default só é mandado se o valor mudou, assim renomear não transforma um
+    // default calculado (ex.: 60 * 60) em texto.
+    const changes = {};
+    for (const [original, edit] of variableEdits) {
+        const name = edit.name.trim();
+        if (!name || variableDeletes.has(original)) continue;
+        const change = {};
+        if (name !== original) change.name = name;
+        if (edit.value !== edit.original) {
+            change.default = variableValue(edit.value, edit.type);
+            change.type = edit.type;
+        }
+        if (Object.keys(change).length > 0) changes[original] = change;
+    }
+    document.querySelectorAll('#variables-new .variable-card').forEach(card => {
+        const name = card.querySelector('.variable-name').value.trim();
+        if (name) changes[name] = { default: variableValue(card.querySelector('.variable-value').value) };
+    });
+    const deleted = [...variableDeletes];
+    if (Object.keys(changes).length === 0 && deleted.length === 0) {
+        alert('Nenhuma alteração para salvar.');
+        return;
+    }
+
+    try {
+        const response = await fetch(apiBase + 'variables', {
+            method: 'PATCH',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ changes: changes, deleted: deleted })
+        });
+
+        const data = await response.json();
+        if (data.success) {
+            alert('Variáveis salvas!');
+            loadVariables();
+        } else {
+            alert('Erro: ' + data.message);
+        }
+    } catch (error) {
+        alert('Erro ao salvar: ' + error.message);
+    }
+}
+
+// Status
+async function loadStatus() {
+    try {
+        const response = await fetch(apiBase + 'status');
+        const data = await response.json();
+        const statusList = document.getElementById('status-list');
+        statusList.innerHTML = '';
+        
+        let statuses = [];
+        try {
+            statuses = JSON.parse(data.content);
+        } catch (e) {
+            statuses = [];
+        }
+        
+        statuses.forEach((status, index) => {
+            const card = document.createElement('div');
+            card.className = 'status-card';
+            card.innerHTML = `
+                <div class="status-header">
+                    <strong>${status.text}</strong>
+                    <div class="status-actions">
+                        <button onclick="editStatus(${index})">Editar</button>
+                        <button class="danger" onclick="deleteStatusConfirm(${index})">Excluir</button>
+                    </div>
+                </div>
+                <div>
+                    <span>${status.type}</span> | 
+                    <span>${status.status}</span>
+                    ${status.url ? '<br>URL: ' + status.url : ''}
+                </div>
+            `;
+            statusList.appendChild(card);
+        });
+    } catch (error) {
+        console.error('Erro ao carregar status:', error);
+    }
+}
+
+function showNewStatusForm() {
+    currentEditingStatusIndex = -1;
+    document.getElementById('status-editor-title').textContent = 'Novo Status';
+    document.getElementById('status-text').value = '';
+    document.getElementById('status-type').value = 'PLAYING';
+    document.getElementById('status-status').value = 'online';
+    document.getElementById('status-url').value = '';
+    document.getElementById('status-url-group').style.display = 'none';
+    document.getElementById('status-editor').style.display = 'block';
+}
+
+async function editStatus(index) {
+    try {
+        currentEditingStatusIndex = index;
+        const response = await fetch(apiBase + 'status');
+        const data = await response.json();
+        
+        let statuses = [];
+        try {
+            statuses = JSON.parse(data.content);
+        } catch (e) {
+            statuses = [];
+        }
+        
+        const status = statuses[index];
+        document.getElementById('status-editor-title').textContent = 'Editar Status';
+        document.getElementById('status-text').value = status.text;
+        document.getElementById('status-type').value = status.type;
+        document.getElementById('status-status').value = status.status;
+        
+        if (status.type === 'STREAMING') {
+            document.getElementById('status-url-group').style.display = 'block';
+            document.getElementById('status-url').value = status.url || '';
+        } else {
+            document.getElementById('status-url-group').style.display = 'none';
+        }
+        
+        document.getElementById('status-editor').style.display = 'block';
+    } catch (error) {
+        alert('Erro ao editar status: ' + error.message);
+    }
+}
+
+async function saveStatus() {
+    try {
+        const text = document.getElementById('status-text').value.trim();
+        const type = document.getElementById('status-type').value;
+        const statusValue = document.getElementById('status-status').value;
+        const url = document.getElementById('status-url').value.trim();
+        
+        if (!text) {
+            alert('Texto do status é obrigatório');
+            return;
+        }
+        
+        if (type === 'STREAMING' && !url) {
+            alert('URL é obrigatória para STREAMING');
+            return;
+        }
+        
+        const statusObject = {
+            text: text,
+            type: type,
+            status: statusValue
+        };
+        
+        if (type === 'STREAMING') {
+            statusObject.url = url;
+        }
+        
+        // Carregar status existentes
+        const response = await fetch(apiBase + 'status');
+        const data = await response.json();
+        let statuses = [];
+        try {
+            statuses = JSON.parse(data.content);
+        } catch (e) {
+            statuses = [];
+        }
+        
+        // Adicionar ou atualizar
+        if (currentEditingStatusIndex === -1) {
+            statuses.push(statusObject);
+        } else {
+            statuses[currentEditingStatusIndex] = statusObject;
+        }
+        
+        // Salvar
+        const saveResponse = await fetch(apiBase + 'status', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ content: JSON.stringify(statuses, null, 2) })
+        });
+        
+        const saveData = await saveResponse.json();
+        if (saveData.success) {
+            alert('Status salvo!');
+            cancelStatusEdit();
+            loadStatus();
+        } else {
+            alert('Erro: ' + saveData.message);
+        }
+    } catch (error) {
+        alert('Erro ao salvar status: ' + error.message);
+    }
+}
+
+async function deleteStatusConfirm(index) {
+    if (confirm('Excluir este status?')) {
+        await deleteStatus(index);
+    }
+}
+
+async function deleteStatus(index) {
+    try {
+        const response = await fetch(apiBase + 'status');
+        const data = await response.json();
+        let statuses = [];
+        try {
+            statuses = JSON.parse(data.content);
+        } catch (e) {
+            statuses = [];
+        }
+        
+        statuses.splice(index, 1);
+        
+        const saveResponse = await fetch(apiBase + 'status', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ content: JSON.stringify(statuses, null, 2) })
+        });
+        
+        const saveData = await saveResponse.json();
+        if (saveData.success) {
+            alert('Status excluído!');
+            loadStatus();
+        } else {
+            alert('Erro: ' + saveData.message);
+        }
+    } catch (error) {
+        alert('Erro ao excluir status: ' + error.message);
+    }
+}
+
+function cancelStatusEdit() {
+    document.getElementById('status-editor').style.display = 'none';
+    currentEditingStatusIndex = -1;
+}
+
+// Configurações .env
+async function loadEnv() {
+    try {
+        const response = await fetch(apiBase + 'config');
+        const data = await response.json();
+        const form = document.getElementById('env-form');
+        form.innerHTML = '';
+        
+        for (const [key, value] of Object.entries(data.content)) {
+            addEnvEntry(key, value, form);
+        }
+        
+        if (Object.keys(data.content).length === 0) {
+            addEnvEntry('', '', form);
+        }
+    } catch (error) {
+        console.error('Erro ao carregar env:', error);
+    }
+}
+
+function addEnvEntry(key = '', value = '', container = null) {
+    if (!container) container = document.getElementById('env-form');
+    
+    const entry = document.createElement('div');
+    entry.className = 'env-entry';
+    const isSensitive = /token|key|secret|password/i.test(key);
+    
+    entry.innerHTML = `
+        <label>Chave:</label>
+        <input type="text" class="env-key" value="${key}" placeholder="ex: TOKEN">
+        <label>Valor:</label>
+        <div class="env-input-wrapper">
+            <input type="${isSensitive ? 'password' : 'text'}" class="env-value" value="${value}">
+            <button type="button" class="env-toggle">👁</button>
+        </div>
+    `;
+    
+    container.appendChild(entry);
+    
+    // Toggle para mostrar/esconder senha
+    const toggle = entry.querySelector('.env-toggle');
+    const input = entry.querySelector('.env-value');
+    toggle.addEventListener('click', () => {
+        input.type = input.type === 'password' ? 'text' : 'password';
+    });
+}
+
+async function saveEnv() {
+    try {
+        const entries = document.querySelectorAll('.env-entry');
+        const content = {};
+        
+        entries.forEach(entry => {
+            const key = entry.querySelector('.env-key').value.trim();
+            const value = entry.querySelector('.env-value').value;
+            if (key) {
+                content[key] = value;
+            }
+        });
+        
+        const response = await fetch(apiBase + 'config', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ content: content })
+        });
+        
+        const data = await response.json();
+        if (data.success) {
+            alert('.env salvo!');
+        } else {
+            alert('Erro: ' + data.message);
+        }
+    } catch (error) {
+        alert('Erro ao salvar: ' + error.message);
+    }
+}
+
+// Configurar evento para mostrar/ocultar URL do streaming
+document.getElementById('status-type').addEventListener('change', function() {
+    document.getElementById('status-url-group').style.display = 
+        this.value === 'STREAMING' ? 'block' : 'none';
+});
+
+// Tempo real: /api/stream (SSE), com polling só quando o stream cair
+let eventSource = null;
+let pollTimer = null;
+
+function startPolling() {
+    if (pollTimer !== null) return;
+    updateStatus();
+    pollTimer = setInterval(updateStatus, 2000);
+}
+
+function stopPolling() {
+    if (pollTimer === null) return;
+    clearInterval(pollTimer);
+    pollTimer = null;
+}
+
+function handleLogEvent(data) {
+    if (data.reset) {
+        resetLogs();
+    } else if (data.gap || (logCursor !== null && data.seq > logCursor)) {
+        appendLogLines(['[... linhas antigas descartadas ...]']);
+    }
+    let lines = data.lines;
+    if (!data.reset && logCursor !== null && data.seq < logCursor) {
+        lines = lines.slice(logCursor - data.seq);
+    }
+    appendLogLines(lines);
+    logCursor = data.next;
+}
+
+function startStream() {
+    if (eventSource !== null) return;
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    const url = logCursor === null ? apiBase + 'stream' : apiBase + 'stream?since=' + logCursor;
+    eventSource = new EventSource(url);
+    eventSource.onopen = stopPolling;
+    eventSource.addEventListener('status', event => renderStatus(JSON.parse(event.data)));
+    eventSource.addEventListener('logs', event => handleLogEvent(JSON.parse(event.data)));
+    eventSource.addEventListener('reload', event => renderReload(JSON.parse(event.data)));
+    eventSource.onerror = () => {
+        // Fecha e reconecta com o cursor atual; enquanto isso, polling.
+        eventSource.close();
+        eventSource = null;
+        startPolling();
+        setTimeout(startStream, 5000);
+    };
+}
+
+// Vários bots: a lista vem de /api/bots; trocar de bot recomeça logs e abas
+async function loadBots() {
+    try {
+        const response = await fetch('/api/bots');
+        const bots = await response.json();
+        const select = document.getElementById('bot-select');
+        select.innerHTML = '';
+        bots.forEach(bot => {
+            const option = document.createElement('option');
+            option.value = bot.id;
+            option.textContent = bot.name;
+            select.appendChild(option);
+        });
+        select.style.display = bots.length > 1 ? 'inline-block' : 'none';
+    } catch (error) {
+        console.error('Erro ao listar bots:', error);
+    }
+}
+
+function selectBot(botId) {
+    apiBase = '/api/bots/' + encodeURIComponent(botId) + '/';
+    if (eventSource !== null) {
+        eventSource.close();
+        eventSource = null;
+    }
+    stopPolling();
+    logCursor = null;
+    resetLogs();
+
+    searchBefore = null;
+    document.getElementById('log-search-results').style.display = 'none';
+    document.getElementById('log-search-more').style.display = 'none';
+    document.getElementById('reload-status').textContent = '';
+    cancelEdit();
+    cancelStatusEdit();
+
+    const active = document.querySelector('.tab-content.active').id;
+    if (active === 'comandos') {
+        loadCommands();
+    } else if (active === 'variaveis') {
+        loadVariables();
+    } else if (active === 'status') {
+        loadStatus();
+    } else if (active === 'configuracoes') {
+        loadEnv();
+    }
+    updateMetrics();
+    startStream();
+}
+
+// Inicialização
+loadBots();
+startStream();
+updateMetrics();
+setInterval(updateMetrics, 5000);
+window.addEventListener('resize', renderVariables);
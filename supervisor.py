@@ -0,0 +1,147 @@
+"""Supervisor do bot: mantém o processo Node e os logs fora do painel.
+
+O painel (servidor.py) pode rodar com vários workers e ser reiniciado sem
+derrubar o bot, porque quem cuida do processo e dos pipes é este daemon.
+
+Uso (na pasta do bot):
+    python supervisor.py --socket painel.sock --iniciar
+    python servidor.py --producao --supervisor painel.sock
+
+Protocolo: JSON, uma mensagem por linha, no socket Unix. Toda mensagem aceita
+"bot": id para escolher um dos bots de bots.json (sem ele, vale o principal).
+    {"op": "start" | "stop" | "restart"}   -> {"success": bool, "message": str}
+    {"op": "status"}                       -> {"status": str, "message": str, "last_restart": ..., "supervision": {...}}
+    {"op": "tail", "n": 100}               -> {"logs": [...], "next": int, "dropped": int}
+    {"op": "reload", "files": [...], "deleted": [...]} -> {"id": int|null}
+    {"op": "rules", "rules": [...]?}       -> contadores das regras (ou salva as novas)
+    {"op": "metrics", "since": float|null, "points": 120} -> série de CPU/memória do bot
+    {"op": "subscribe", "since": int|null} -> fluxo de {"event": str, "data": {...}}
+"""
+import os
+import json
+import socket
+import socketserver
+import argparse
+import logging
+import signal
+
+import servidor
+
+DEFAULT_SOCKET = os.path.join(servidor.BOT_PATH, 'painel.sock')
+
+def _responder(bot, op, request):
+    if op in ('start', 'stop', 'restart'):
+        return bot.controlar(op)
+    if op == 'status':
+        return {**bot.status_atual(), "last_restart": bot.last_restart, "supervision": bot.supervisao()}
+    if op == 'reload':
+        return {"id": bot.recarregar_comandos(request.get('files', []), request.get('deleted', []))}
+    if op == 'rules':
+        if 'rules' in request:
+            return bot.salvar_regras(request['rules'])[0]
+        with bot.lock:
+            return bot.rules.stats()
+    if op == 'metrics':
+        points = min(int(request.get('points', 120)), servidor.METRICS_MAX_POINTS)
+        return bot.metricas(request.get('since'), points)
+    if op == 'tail':
+        n = min(int(request.get('n', 100)), servidor.LOG_PAGE_LIMIT)
+        with bot.lock:
+            return {
+                "logs": bot.logs.tail(n),
+                "next": bot.logs.next_seq,
+                "dropped": bot.logs.dropped,
+            }
+    return {"success": False, "message": "Operação inválida."}
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _enviar(self, message):
+        self.wfile.write(json.dumps(message, separators=(',', ':')).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+    def _assinar(self, bot, since):
+        sub, status, backlog = bot.inscrever_assinante(since)
+        try:
+            self._enviar({"event": "status", "data": status})
+            self._enviar({"event": "logs", "data": backlog})
+            for item in servidor._eventos_do_assinante(sub):
+                if item is None:
+                    self._enviar({"event": "ping", "data": {}})
+                    continue
+                event, data = item
+                self._enviar({"event": event, "data": data})
+        except OSError:
+            pass
+        finally:
+            bot.cancelar_assinante(sub)
+
+    def handle(self):
+        for raw in self.rfile:
+            try:
+                request = json.loads(raw)
+            except ValueError:
+                self._enviar({"success": False, "message": "JSON inválido."})
+                continue
+            op = request.get('op')
+            bot = servidor.bots.get(request.get('bot', servidor.DEFAULT_BOT_ID))
+            if bot is None:
+                self._enviar({"success": False, "message": "Bot não encontrado."})
+                continue
+            if op == 'subscribe':
+                self._assinar(bot, request.get('since'))
+                return
+            self._enviar(_responder(bot, op, request))
+
+class _Servidor(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def _liberar_socket(path):
+    """Remove um socket abandonado; falha se outro supervisor estiver ativo."""
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            os.unlink(path)
+            return
+    raise SystemExit(f"Já existe um supervisor escutando em {path}.")
+
+def _encerrar(signum, frame):
+    raise KeyboardInterrupt
+
+def main():
+    parser = argparse.ArgumentParser(description="Supervisor do bot para o painel.")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help="Caminho do socket Unix.")
+    parser.add_argument('--iniciar', action='store_true', help="Liga os bots assim que o supervisor sobe.")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.INFO)
+    # Quem controla o bot aqui é o próprio supervisor, nunca outro socket.
+    servidor.SUPERVISOR_SOCKET = None
+    signal.signal(signal.SIGTERM, _encerrar)
+    _liberar_socket(args.socket)
+
+    for bot in servidor.bots.values():
+        bot.preparar_pastas()
+        bot.restaurar_logs()
+    server = _Servidor(args.socket, _Handler)
+    os.chmod(args.socket, 0o600)
+    print(f"Supervisor escutando em {args.socket}")
+
+    if args.iniciar:
+        for bot in servidor.bots.values():
+            print(f"{bot.id}: {bot.controlar('start')['message']}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+        for bot in servidor.bots.values():
+            if bot.running:
+                bot.controlar('stop')
+
+if __name__ == '__main__':
+    main()
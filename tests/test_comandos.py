@@ -0,0 +1,133 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import servidor
+
+MULTI = '''module.exports = {
+  name: "multi",
+  aliases: ["m"],
+  type: "messageCreate",
+  run(m) { return /'/.test(m) && /[/]x/g.test(m) },
+  code: `oi`
+};'''
+
+class _Bot:
+    """O mínimo de BotInstance que as operações de comando usam."""
+
+    def __init__(self, path):
+        self.commands_path = path
+        self.command_index = servidor.CommandIndex(path)
+        self.commands_lock = threading.Lock()
+
+class TokenizadorTest(unittest.TestCase):
+    def test_regex_literal(self):
+        command = servidor.ler_arquivo_comando(MULTI)[0]
+        self.assertEqual(command["value"]["aliases"], ["m"])
+        self.assertEqual(command["value"]["code"], "oi")
+        self.assertIn("/'/.test(m)", command["value"]["run"])
+
+    def test_divisao_nao_e_regex(self):
+        command = servidor.ler_arquivo_comando('module.exports = { n: 4 / 2 / 1, code: "x" };')[0]
+        self.assertEqual(command["value"]["n"], "4 / 2 / 1")
+        self.assertEqual(command["value"]["code"], "x")
+
+    def test_atualizar_mantem_o_resto(self):
+        command = servidor.ler_arquivo_comando(MULTI)[0]
+        updated = servidor.atualizar_arquivo_comando(MULTI, command, {"code": "novo"})
+        self.assertEqual(updated, MULTI.replace('`oi`', '`novo`'))
+
+class SalvarComandoTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bot = _Bot(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _escrever(self, filename, content):
+        with open(os.path.join(self.tmp.name, filename), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def _ler(self, filename):
+        with open(os.path.join(self.tmp.name, filename), encoding='utf-8') as f:
+            return f.read()
+
+    def test_salva_so_o_codigo(self):
+        self._escrever('multi.js', MULTI)
+        payload, status = servidor._salvar_comando(self.bot, 'multi.js', 'novo')
+        self.assertEqual(status, 200, payload)
+        self.assertEqual(self._ler('multi.js'), MULTI.replace('`oi`', '`novo`'))
+
+    def test_barra_no_fim_nao_escapa_a_crase(self):
+        self._escrever('multi.js', MULTI)
+        payload, status = servidor._salvar_comando(self.bot, 'multi.js', 'echo \\')
+        self.assertEqual(status, 200, payload)
+        code = servidor.ler_arquivo_comando(self._ler('multi.js'))[0]["value"]["code"]
+        self.assertEqual(code, 'echo \\\\')
+        # Salvar de novo o que foi lido não muda mais o arquivo.
+        saved = self._ler('multi.js')
+        servidor._salvar_comando(self.bot, 'multi.js', code)
+        self.assertEqual(self._ler('multi.js'), saved)
+
+    def test_edicoes_simultaneas_nao_se_perdem(self):
+        self._escrever('dois.js', 'module.exports = [{\n  name: "a",\n  code: `1`\n}, {\n  name: "b",\n  code: `2`\n}];')
+        workers = [threading.Thread(target=servidor._salvar_comando, args=(self.bot, 'dois.js', f'novo{i}'), kwargs={"index": i})
+                   for i in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        codes = [c["value"]["code"] for c in servidor.ler_arquivo_comando(self._ler('dois.js'))]
+        self.assertEqual(codes, ['novo0', 'novo1'])
+
+    def test_indice_inexistente_nao_apaga_o_arquivo(self):
+        self._escrever('multi.js', MULTI)
+        payload, status = servidor._salvar_comando(self.bot, 'multi.js', 'novo', index=3)
+        self.assertEqual(status, 400, payload)
+        self.assertEqual(self._ler('multi.js'), MULTI)
+
+    def test_arquivo_ilegivel_nao_e_sobrescrito(self):
+        broken = 'module.exports = { name: "x", code: "sem fim };'
+        self._escrever('quebrado.js', broken)
+        payload, status = servidor._salvar_comando(self.bot, 'quebrado.js', 'novo')
+        self.assertEqual(status, 409, payload)
+        self.assertEqual(self._ler('quebrado.js'), broken)
+
+    def test_fields_invalido_falha_so_no_item(self):
+        ops = [{"op": "write", "name": "a", "code": "1"},
+               {"op": "write", "name": "b", "code": "2", "fields": "zz"},
+               {"op": "write", "name": "c", "code": 3}]
+        results = [servidor._salvar_comando(self.bot, f"{op['name']}.js", op["code"], op.get("fields"))[1] for op in ops]
+        self.assertEqual(results, [200, 400, 400])
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['a.js'])
+
+    def test_arquivo_novo_usa_o_modelo(self):
+        payload, status = servidor._salvar_comando(self.bot, 'novo.js', 'oi', {"aliases": ["n"]})
+        self.assertEqual(status, 200, payload)
+        command = servidor.ler_arquivo_comando(self._ler('novo.js'))[0]["value"]
+        self.assertEqual(command["name"], "novo")
+        self.assertEqual(command["aliases"], ["n"])
+        self.assertEqual(command["code"].strip(), "oi")
+
+class ImportacaoTest(unittest.TestCase):
+    def test_nomes_fora_do_padrao_sao_pulados(self):
+        upload = io.BytesIO()
+        with zipfile.ZipFile(upload, 'w') as archive:
+            for name in ('commands/ok-1.js', "x');alert(1);('.js", 'a&b.js', 'leia.txt'):
+                archive.writestr(name, 'module.exports = { code: `x` };')
+        upload.seek(0)
+        with tempfile.TemporaryDirectory() as staging:
+            filenames, skipped = servidor._extrair_importacao(upload, staging)
+            self.assertEqual(os.listdir(staging), ['ok-1.js'])
+        self.assertEqual(filenames, ['ok-1.js'])
+        self.assertEqual(skipped, ["x');alert(1);('.js", 'a&b.js'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import servidor
+
+class AtomicWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'status.json')
+        self.writer = servidor.AtomicWriter()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _gravar_com_prazo(self, content):
+        worker = threading.Thread(target=self.writer.write, args=(self.path, content), daemon=True)
+        worker.start()
+        worker.join(timeout=5)
+        self.assertFalse(worker.is_alive(), "a gravação ficou presa")
+
+    def test_texto_invalido_nao_trava_o_arquivo(self):
+        with self.assertRaises(UnicodeEncodeError):
+            self.writer.write(self.path, '["\ud800"]')
+        self._gravar_com_prazo('["ok"]')
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), '["ok"]')
+
+    def test_erro_inesperado_chega_a_quem_pediu(self):
+        with mock.patch.object(self.writer, '_gravar', side_effect=RuntimeError("falhou")):
+            with self.assertRaises(RuntimeError):
+                self.writer.write(self.path, 'a')
+        self.assertEqual(self.writer.errors, 1)
+        self.assertEqual(self.writer._files, {})
+        self._gravar_com_prazo('b')
+
+if __name__ == '__main__':
+    unittest.main()
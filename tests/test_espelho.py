@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import servidor
+
+class EspelhoTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bot = servidor.BotInstance('teste', self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _proximo(self, events):
+        return next(event for event in events if event is not None)
+
+    def test_reinicio_do_supervisor_avisa_os_clientes(self):
+        self.bot.aplicar_evento_supervisor('logs', {"seq": 0, "lines": ["a", "b", "c"], "next": 3, "gap": False, "reset": True})
+        sub, _, backlog = self.bot.inscrever_assinante(3)
+        self.assertEqual(backlog["next"], 3)
+        events = servidor._eventos_do_assinante(sub)
+
+        self.bot.aplicar_evento_supervisor('logs', {"seq": 3, "lines": ["d"], "next": 4, "gap": False, "reset": False})
+        self.assertEqual(self._proximo(events), ('logs', {"seq": 3, "lines": ["d"], "next": 4}))
+
+        # O supervisor reiniciou e recomeçou a contagem do zero.
+        self.bot.aplicar_evento_supervisor('logs', {"seq": 0, "lines": ["novo"], "next": 1, "gap": False, "reset": True})
+        event, data = self._proximo(events)
+        self.assertEqual(event, 'logs')
+        self.assertTrue(data["reset"])
+        self.assertEqual((data["seq"], data["lines"], data["next"]), (0, ["novo"], 1))
+        self.bot.cancelar_assinante(sub)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import json
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import servidor
+
+class LogRulesTest(unittest.TestCase):
+    def test_regras_sobrepostas_contam_todas(self):
+        rules = servidor.LogRules([
+            {"name": "permissao", "pattern": "Missing Permissions"},
+            {"name": "permissions", "pattern": "Permissions"},
+            {"name": "miss", "pattern": "Miss"},
+            {"name": "erro", "pattern": r"\w*Error", "regex": True},
+            {"name": "api", "pattern": "API", "regex": True},
+        ])
+        self.assertEqual(rules.avaliar('stdout', "DiscordAPIError: Missing Permissions"), [0, 1, 2, 3, 4])
+        self.assertEqual(rules.avaliar('stdout', "linha comum"), [])
+
+    def test_literais_que_atravessam_outro(self):
+        rules = servidor.LogRules([{"name": "ab", "pattern": "ab"}, {"name": "bcd", "pattern": "bcd"}])
+        self.assertEqual(rules.avaliar('stdout', "xabcd"), [0, 1])
+
+    def test_aho_corasick_igual_a_busca_ingenua(self):
+        words = ['he', 'she', 'his', 'hers', 'a', 'aa', 'aaa', 'ab', 'bab']
+        automaton = servidor._AhoCorasick(words)
+        rng = random.Random(7)
+        for _ in range(500):
+            text = ''.join(rng.choice('abhesr') for _ in range(rng.randint(0, 15)))
+            self.assertEqual(automaton.buscar(text), {w for w in words if w in text}, text)
+
+    def test_flag_global_no_meio_e_regra_invalida(self):
+        rule = {"name": "bar", "pattern": "(?i)bar", "regex": True}
+        with self.assertRaises(ValueError):
+            servidor.LogRules([rule])
+        with tempfile.TemporaryDirectory() as tmp:
+            bot = servidor.BotInstance('teste', tmp)
+            payload, status = bot.salvar_regras([rule])
+            self.assertEqual(status, 400, payload)
+            with open(bot.log_rules_path, 'w', encoding='utf-8') as f:
+                json.dump([rule], f)
+            bot.carregar_regras()
+            self.assertEqual(len(bot.rules.rules), len(servidor.DEFAULT_LOG_RULES))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import servidor
+
+DEFAULTS = '''module.exports = {
+  "money": { type: "number", default: 0 },
+  "hora": { type: "number", default: 60 * 60 },
+};
+'''
+
+class VariablesModelTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'defaults.js')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(DEFAULTS)
+        self.model = servidor.VariablesModel(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_default_mantem_o_tipo(self):
+        self.assertEqual(self.model.alterar("money", {"default": "12"}), ("money", {"type": "number", "default": 12}))
+        with self.assertRaises(ValueError):
+            self.model.alterar("money", {"default": "abc"})
+        self.assertEqual(self.model.listar()["money"], {"type": "number", "default": 12})
+
+    def test_numero_infinito_e_recusado(self):
+        for value in ("1e999", float('nan'), float('inf')):
+            with self.assertRaises(ValueError):
+                self.model.alterar("money", {"default": value})
+        self.assertEqual(self.model.listar()["money"], {"type": "number", "default": 0})
+
+    def test_renomear_mantem_default_calculado(self):
+        self.model.alterar("hora", {"name": "segundos"})
+        with open(self.path, encoding='utf-8') as f:
+            self.assertIn('"segundos": { type: "number", default: 60 * 60 },', f.read())
+
+if __name__ == '__main__':
+    unittest.main()